@@ -3,3 +3,7 @@
 __author__ = """StdTom"""
 __email__ = "stdtom@gmx.net"
 __version__ = "1.1.2"
+
+from ssl_certinfo.scanner import scan, scan_async  # noqa: E402
+
+__all__ = ["scan", "scan_async"]
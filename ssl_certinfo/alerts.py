@@ -0,0 +1,59 @@
+"""Alert on certificates expiring soon, with Nagios plugin exit codes."""
+
+OK = 0
+WARNING = 1
+CRITICAL = 2
+UNKNOWN = 3
+
+STATUS_NAMES = {OK: "OK", WARNING: "WARNING", CRITICAL: "CRITICAL", UNKNOWN: "UNKNOWN"}
+# Order in which a status overrides the overall status of the scan
+SEVERITY = (OK, UNKNOWN, WARNING, CRITICAL)
+
+
+class ExpiryThresholds:
+    """Filter result records by the days until their certificate expires.
+
+    Certificates expiring within crit_days days are critical, those expiring
+    within warn_days days warnings. Hosts that could not be checked are
+    unknown. The worst status of all records is kept as exit_code.
+    """
+
+    def __init__(self, warn_days=None, crit_days=None):
+        self.warn_days = warn_days
+        self.crit_days = crit_days
+        self.exit_code = OK
+        self.counts = dict.fromkeys(STATUS_NAMES, 0)
+
+    def status(self, record):
+        if "error" in record:
+            return UNKNOWN
+        days = record["expire_in_days"]
+        if self.crit_days is not None and days <= self.crit_days:
+            return CRITICAL
+        if self.warn_days is not None and days <= self.warn_days:
+            return WARNING
+        return OK
+
+    def filter(self, records):
+        """Yield the records that are not OK, adding their status as "alert".
+
+        Records of certificates that are OK are dropped as they arrive.
+        """
+        for record in records:
+            status = self.status(record)
+            self.counts[status] += 1
+            if SEVERITY.index(status) > SEVERITY.index(self.exit_code):
+                self.exit_code = status
+            if status != OK:
+                record["alert"] = STATUS_NAMES[status].lower()
+                yield record
+
+    def format_summary(self):
+        """Return the status line of a Nagios plugin, e.g. "WARNING - ..."."""
+        return "{} - {} critical, {} warning, {} unknown, {} ok".format(
+            STATUS_NAMES[self.exit_code],
+            self.counts[CRITICAL],
+            self.counts[WARNING],
+            self.counts[UNKNOWN],
+            self.counts[OK],
+        )
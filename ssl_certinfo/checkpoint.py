@@ -0,0 +1,115 @@
+"""Checkpoint long-running scans so that they can be resumed."""
+import json
+import logging
+import os
+import time
+
+from ssl_certinfo import serializers
+from ssl_certinfo.targets import IntervalSet
+
+FLUSH_INTERVAL = 5
+
+
+class CheckpointError(ValueError):
+    """The checkpoint file can not be used to resume the scan."""
+
+
+class Checkpoint:
+    """Journal of the completed hosts of a scan in a JSON lines file.
+
+    The first line describes the scan, every further line holds the position
+    of a completed host in the expanded target sequence and its result
+    record. Lines are buffered and flushed every flush_interval seconds, a
+    crash loses at most the results of the last interval. When resuming, the
+    completed positions are kept as IntervalSet, the results are read again
+    from the file when they are replayed.
+    """
+
+    def __init__(self, path, scan, resume=False, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.scan = scan
+        self.flush_interval = flush_interval
+        self.done = IntervalSet()
+        self.replay_size = 0
+        self.pending = {}
+        self.file = None
+        self.last_flush = time.monotonic()
+        if resume and os.path.exists(path):
+            self.load()
+        elif resume:
+            logging.warning("Checkpoint %s not found, starting a new scan", path)
+
+    def load(self):
+        with open(self.path, "rb") as f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                raise CheckpointError("{} is not a checkpoint file".format(self.path))
+            if header.get("scan") != self.scan:
+                raise CheckpointError(
+                    "{} was written for a different scan".format(self.path)
+                )
+            size = f.tell()
+            for line in f:
+                try:
+                    index = json.loads(line)["index"]
+                except (ValueError, KeyError):
+                    # Incomplete last line of an interrupted run
+                    break
+                self.done.add(index, index)
+                size += len(line)
+        self.replay_size = size
+        logging.info("Resuming from %s, skipping completed hosts", self.path)
+
+    def open(self):
+        if self.replay_size:
+            self.file = open(self.path, "r+b")
+            # Drop an incomplete last line before appending
+            self.file.truncate(self.replay_size)
+            self.file.seek(self.replay_size)
+        else:
+            self.file = open(self.path, "wb")
+            self.file.write(json.dumps({"scan": self.scan}).encode() + b"\n")
+        return self
+
+    def completed_records(self):
+        """Yield the result records of the hosts completed before resuming."""
+        if not self.replay_size:
+            return
+        with open(self.path, "rb") as f:
+            f.readline()
+            while f.tell() < self.replay_size:
+                yield json.loads(f.readline())["record"]
+
+    def remaining(self, hosts):
+        """Yield the hosts that have not been completed yet."""
+        for index, host in enumerate(hosts):
+            if index not in self.done:
+                self.pending[host] = index
+                yield host
+
+    def track(self, records):
+        """Write every record of the scan to the journal and yield it."""
+        for record in records:
+            index = self.pending.pop(record["peername"], None)
+            if index is not None:
+                line = serializers.json_dumps_compact(
+                    {"index": index, "record": record}
+                )
+                self.file.write(line.encode() + b"\n")
+                now = time.monotonic()
+                if now - self.last_flush >= self.flush_interval:
+                    self.file.flush()
+                    self.last_flush = now
+            yield record
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
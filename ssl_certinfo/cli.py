@@ -1,15 +1,41 @@
 """Console script for ssl_certinfo."""
 import argparse
-import ipaddress
 import logging
 import os
 import re
 import sys
 from typing import Tuple
 
-from ssl_certinfo import __author__, __email__, __version__, ssl_certinfo, validation
+from OpenSSL import SSL
+
+from ssl_certinfo import (
+    __author__,
+    __email__,
+    __version__,
+    alerts,
+    checkpoint,
+    columnar,
+    distributed,
+    exporter,
+    extractors,
+    instrumentation,
+    limits,
+    output,
+    planfile,
+    profiles,
+    retry,
+    scheduler,
+    ssl_certinfo,
+    table,
+    targets,
+    tlsconfig,
+    validation,
+)
+from ssl_certinfo.probe import ProtocolProber
 from ssl_certinfo.ssl_certinfo import OutputFormat
 
+SPLIT_FORMATS = (OutputFormat.JSON, OutputFormat.YAML, OutputFormat.CSV)
+
 VERSION = rf"""
 ssl_certinfo {__version__}
 Copyright (C) 2020 {__author__} ({__email__})
@@ -31,6 +57,28 @@ def check_hostname_or_ip_address(value):
     return value
 
 
+def check_exclusion(value):
+    """Validate argparse type hostname/ip address, *.domain wildcards allowed."""
+    if value.startswith("*.") and validation.is_valid_hostname(value[2:]):
+        return value
+    return check_hostname_or_ip_address(value)
+
+
+def read_exclude_file(path):
+    """Return the exclusions in path, one per line, # starts a comment."""
+    exclusions = []
+    with open(path) as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            try:
+                exclusions.append(check_exclusion(line))
+            except argparse.ArgumentTypeError as err:
+                raise ValueError("{}:{}: {}".format(path, lineno, err))
+    return exclusions
+
+
 def check_proxy_url(value):
     """Validate if parameter is a valid proxy url."""
     try:
@@ -51,7 +99,7 @@ def parse_proxy_url(proxyurl) -> Tuple[str, str, int]:
         x, proto, host, x, port = match.groups(default="")
     else:
         locallogger = logging.getLogger("validate.parse_proxy_url")
-        locallogger.debug("Not a valid proxy url: {}".format(proxyurl))
+        locallogger.debug("Not a valid proxy url: %s", proxyurl)
         raise ValueError("Not a valid proxy url: {}".format(proxyurl))
 
     if not proto:
@@ -82,6 +130,73 @@ def check_positive(value):
     return ivalue
 
 
+def check_non_negative(value):
+    """Validate argparse type non-negative integer."""
+    try:
+        ivalue = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("%s is not an int value" % value)
+
+    if ivalue < 0:
+        raise argparse.ArgumentTypeError("%s is a negative int value" % value)
+    return ivalue
+
+
+def check_non_negative_float(value):
+    """Validate argparse type non-negative float."""
+    try:
+        fvalue = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("%s is not a float value" % value)
+
+    if fvalue < 0:
+        raise argparse.ArgumentTypeError("%s is a negative float value" % value)
+    return fvalue
+
+
+def check_fraction(value):
+    """Validate argparse type float between 0 and 1."""
+    fvalue = check_non_negative_float(value)
+    if fvalue > 1:
+        raise argparse.ArgumentTypeError("%s is not between 0 and 1" % value)
+    return fvalue
+
+
+def check_error_classes(value):
+    """Validate argparse type comma separated list of error classes."""
+    classes = [item.strip() for item in value.split(",") if item.strip()]
+    for item in classes:
+        if item not in ssl_certinfo.ERROR_CLASSES:
+            raise argparse.ArgumentTypeError(
+                "%s is not a valid error class (choose from %s)"
+                % (item, ", ".join(ssl_certinfo.ERROR_CLASSES))
+            )
+    return classes
+
+
+def check_fields(value):
+    """Validate argparse type comma separated list of certificate fields."""
+    names = [item.strip() for item in value.split(",") if item.strip()]
+    try:
+        return extractors.select(names)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(
+            "%s is not a valid field (choose from all, default, %s)"
+            % (err, ", ".join(list(extractors.FIELDS) + list(extractors.CHECKS)))
+        )
+
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def check_size(value):
+    """Validate argparse type size in bytes with optional K, M or G suffix."""
+    match = re.match(r"^(\d+)([KMG]?)B?$", value.strip().upper())
+    if not match or int(match.group(1)) <= 0:
+        raise argparse.ArgumentTypeError("%s is not a valid size" % value)
+    return int(match.group(1)) * SIZE_UNITS[match.group(2)]
+
+
 def check_valid_port(value):
     """Validate argparse type TCP port number."""
     try:
@@ -94,37 +209,38 @@ def check_valid_port(value):
     return ivalue
 
 
-def expand_hosts(hostlist):
-    result = []
+def check_listen_address(value):
+    """Validate argparse type listen address [host:]port."""
+    host, sep, port = value.rpartition(":")
+    if not sep:
+        host = "127.0.0.1"
+    host = host.strip("[]")
+    if (
+        host
+        and not validation.is_valid_hostname(host)
+        and not validation.is_valid_ip_address(host)
+    ):
+        raise argparse.ArgumentTypeError("%s is not a valid listen address" % value)
+    try:
+        port = check_valid_port(port)
+    except argparse.ArgumentTypeError:
+        raise argparse.ArgumentTypeError("%s is not a valid listen address" % value)
+    return host, port
 
-    for elem in hostlist:
-        if validation.is_valid_hostname(elem) or validation.is_valid_ip_address(elem):
-            result.append(elem)
-        elif validation.is_valid_ip_range(elem):
-            separator = re.compile(r" *- *")
-            (start, end) = separator.split(elem)
-            try:
-                start_addr = ipaddress.ip_address(start)
-                end_addr = ipaddress.ip_address(end)
-            except ValueError:
-                pass
-            else:
-                logging.debug("Expanding ip address range " + elem)
-                current_ipaddr = start_addr
-                while current_ipaddr <= end_addr:
-                    result.append(str(current_ipaddr))
-                    current_ipaddr = current_ipaddr + 1
-        else:
-            try:
-                net = ipaddress.ip_network(elem, False)
-            except ValueError:
-                pass
-            else:
-                logging.debug("Expanding ip network " + elem)
-                for ipaddr in net:
-                    result.append(str(ipaddr))
 
-    return result
+def check_node_address(value):
+    """Validate argparse type node address unix:PATH or [address:]port."""
+    if value.startswith(distributed.UNIX_PREFIX):
+        path = value.partition(":")[2]
+        if not path:
+            raise argparse.ArgumentTypeError("%s is not a valid address" % value)
+        return path
+    return check_listen_address(value)
+
+
+def expand_hosts(hostlist, max_targets=None):
+    """Expand ip ranges and networks in hostlist into a list of hosts."""
+    return list(targets.plan_targets(hostlist, max_targets))
 
 
 def create_parser():
@@ -183,6 +299,88 @@ def create_parser():
         help="Maximum time allowed for connection",
     )
 
+    parser.add_argument(
+        "-w",
+        "--workers",
+        default=1,
+        type=check_positive,
+        help="Number of hosts to scan concurrently",
+    )
+
+    parser.add_argument(
+        "--raise-fd-limit",
+        action="store_true",
+        help="Raise the soft limit of open files to the hard limit, to allow "
+        "more concurrent connections",
+    )
+
+    parser.add_argument(
+        "-e",
+        "--exclude",
+        action="append",
+        default=[],
+        type=check_exclusion,
+        help="Do not scan EXCLUDE, a hostname, *.domain, ip address, range or "
+        "network (can be repeated)",
+    )
+
+    parser.add_argument(
+        "--exclude-file",
+        help="Do not scan the hosts listed in FILE, one per line",
+        metavar="FILE",
+    )
+
+    parser.add_argument(
+        "--max-targets",
+        default=targets.DEFAULT_MAX_TARGETS,
+        type=check_non_negative,
+        help="Refuse to scan if the targets expand to more hosts than this, "
+        "0 for no limit (default: %(default)s)",
+        metavar="N",
+    )
+
+    parser.add_argument(
+        "-n",
+        "--dry-run",
+        action="store_true",
+        help="Print the number of hosts of every target and the estimated scan "
+        "duration without connecting to any host",
+    )
+
+    plan_source = parser.add_mutually_exclusive_group()
+    plan_source.add_argument(
+        "--scan-profile",
+        help="Read the targets and options of the scan from the YAML or TOML "
+        "file FILE, options given on the command line take precedence",
+        metavar="FILE",
+    )
+    plan_source.add_argument(
+        "--plan",
+        help="Scan the targets of the plan FILE written by --write-plan with "
+        "the options of its profile",
+        metavar="FILE",
+    )
+
+    parser.add_argument(
+        "--write-plan",
+        help="Check the --scan-profile, write its targets without exclusions "
+        "and duplicates to the binary plan FILE and exit",
+        metavar="FILE",
+    )
+
+    parser.add_argument(
+        "--checkpoint",
+        help="Record the completed hosts in FILE, so that the scan can be resumed",
+        metavar="FILE",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the scan recorded in the --checkpoint file, skipping the "
+        "hosts it has already completed",
+    )
+
     parser.add_argument(
         "-x",
         "--proxy",
@@ -192,6 +390,232 @@ def create_parser():
         metavar="[protocol://]host[:port]",
     )
 
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Verify certificate chains and report the result",
+    )
+
+    parser.add_argument(
+        "--ca-file",
+        help="Verify certificate chains against the CA certificates in FILE "
+        "(PEM) instead of the default trust store, implies --verify",
+        metavar="FILE",
+    )
+
+    parser.add_argument(
+        "--tls-config",
+        help="Read client certificates, ciphers, minimum protocol version and "
+        "server name of target groups from the YAML file FILE",
+        metavar="FILE",
+    )
+
+    parser.add_argument(
+        "--probe-protocols",
+        action="store_true",
+        help="Probe the supported TLS protocol versions with one handshake per "
+        "version",
+    )
+
+    run_mode = parser.add_mutually_exclusive_group()
+    run_mode.add_argument(
+        "--serve",
+        type=check_listen_address,
+        help="Serve Prometheus metrics on /metrics instead of printing results",
+        metavar="[address:]port",
+    )
+    run_mode.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep rechecking hosts based on their time to expiry, "
+        "print results as JSON lines",
+    )
+    run_mode.add_argument(
+        "--coordinator",
+        type=check_node_address,
+        help="Hand out the hosts to workers connecting to ADDRESS instead of "
+        "scanning them, print their results",
+        metavar="ADDRESS",
+    )
+    run_mode.add_argument(
+        "--worker",
+        type=check_node_address,
+        help="Scan hosts handed out by the coordinator at ADDRESS",
+        metavar="ADDRESS",
+    )
+
+    parser.add_argument(
+        "--lease-size",
+        default=distributed.LEASE_SIZE,
+        type=check_positive,
+        help="Number of hosts handed out to a worker at once (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--lease-timeout",
+        default=distributed.LEASE_TIMEOUT,
+        type=check_positive,
+        help="Seconds without results after which the hosts of a worker are "
+        "handed out again (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--interval",
+        default=300,
+        type=check_positive,
+        help="Seconds between two refreshes of the same host in serve mode",
+    )
+
+    parser.add_argument(
+        "--min-interval",
+        default=300,
+        type=check_positive,
+        help="Minimum seconds between two checks of the same host in daemon mode",
+    )
+
+    parser.add_argument(
+        "--max-interval",
+        default=86400,
+        type=check_positive,
+        help="Maximum seconds between two checks of the same host in daemon mode",
+    )
+
+    parser.add_argument(
+        "--fields",
+        default=list(extractors.DEFAULT_FIELDS),
+        type=check_fields,
+        help="Comma separated certificate fields and checks (%s) to show, "
+        '"all" for all, "default" for the default fields (default: %s)'
+        % (", ".join(extractors.CHECKS), ",".join(extractors.DEFAULT_FIELDS)),
+    )
+
+    parser.add_argument(
+        "--warn-days",
+        type=check_non_negative,
+        help="Only show certificates expiring within DAYS days and hosts that "
+        "could not be checked, exit with 1 (warning) if there are any",
+        metavar="DAYS",
+    )
+
+    parser.add_argument(
+        "--crit-days",
+        type=check_non_negative,
+        help="Like --warn-days, but exit with 2 (critical) for certificates "
+        "expiring within DAYS days",
+        metavar="DAYS",
+    )
+
+    parser.add_argument(
+        "--retries",
+        default=0,
+        type=check_non_negative,
+        help="Number of times a host is retried after a transient error",
+    )
+
+    parser.add_argument(
+        "--retry-backoff",
+        default=1.0,
+        type=check_non_negative_float,
+        help="Seconds to wait before the first retry, doubled for every further "
+        "retry",
+        metavar="SECONDS",
+    )
+
+    parser.add_argument(
+        "--retry-jitter",
+        default=0.5,
+        type=check_fraction,
+        help="Vary the backoff randomly by up to this fraction [0-1]",
+        metavar="FRACTION",
+    )
+
+    parser.add_argument(
+        "--retry-on",
+        default=list(retry.RETRYABLE_ERRORS),
+        type=check_error_classes,
+        help="Comma separated error classes to retry (default: %s)"
+        % ",".join(retry.RETRYABLE_ERRORS),
+        metavar="CLASSES",
+    )
+
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print a summary of the time spent in every phase to stderr",
+    )
+
+    parser.add_argument(
+        "--timings-json",
+        help="Write the summary of the time spent in every phase to FILE as JSON",
+        metavar="FILE",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the scan and print the statistics to stderr",
+    )
+
+    parser.add_argument(
+        "--max-rows",
+        type=check_positive,
+        help="Show at most this number of rows in table format",
+    )
+
+    parser.add_argument(
+        "--page-size",
+        type=check_positive,
+        help="Print the table in pages of this number of rows while scanning",
+    )
+
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print table rows while scanning, using fixed column widths",
+    )
+
+    parser.add_argument(
+        "--sample-rows",
+        default=100,
+        type=check_non_negative,
+        help="Number of rows used to compute column widths with --stream, "
+        "0 uses preset widths",
+    )
+
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Print JSON without indentation and YAML with one line per host",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Write results to FILE instead of stdout",
+        metavar="FILE",
+    )
+
+    parser.add_argument(
+        "--compress",
+        choices=output.COMPRESSIONS,
+        help="Compress the output file (default: based on the file extension "
+        ".gz or .zst)",
+    )
+
+    parser.add_argument(
+        "--split-records",
+        type=check_positive,
+        help="Split the output file into chunks of at most this number of hosts",
+        metavar="N",
+    )
+
+    parser.add_argument(
+        "--split-size",
+        type=check_size,
+        help="Split the output file into chunks of about this uncompressed size",
+        metavar="SIZE[K|M|G]",
+    )
+
     output_format = parser.add_mutually_exclusive_group()
     output_format.add_argument(
         "-T",
@@ -238,6 +662,22 @@ def create_parser():
         dest="outform",
         help="Print results in raw format",
     )
+    output_format.add_argument(
+        "--parquet",
+        action="store_const",
+        const=OutputFormat.PARQUET,
+        default=OutputFormat.TABLE,
+        dest="outform",
+        help="Write results in Apache Parquet format (requires pyarrow)",
+    )
+    output_format.add_argument(
+        "--arrow",
+        action="store_const",
+        const=OutputFormat.ARROW,
+        default=OutputFormat.TABLE,
+        dest="outform",
+        help="Write results in Arrow IPC file format (requires pyarrow)",
+    )
 
     return parser
 
@@ -254,7 +694,7 @@ def get_proxy_from_env():
     for key in env_keys:
         if key in env:
             locallogger.debug(
-                "Environment variable {} found with value: {}".format(key, env[key])
+                "Environment variable %s found with value: %s", key, env[key]
             )
             return env[key]
 
@@ -269,20 +709,292 @@ def setup_logging(verbosity):
     logging.basicConfig(level=loglevel, format="%(levelname)s\t%(message)s")
 
 
+def retry_policy_from_args(args):
+    if not args.retries:
+        return None
+    return retry.RetryPolicy(
+        args.retries, args.retry_backoff, args.retry_jitter, args.retry_on
+    )
+
+
 def main():
     """Console script for ssl_certinfo."""
-    args = create_parser().parse_args()
+    parser = create_parser()
+    argv = sys.argv[1:]
+    args = parser.parse_args(argv)
     if args.displayVersion:
         print(VERSION)
         return 0
 
+    profile = None
+    plan_file = None
+    if args.plan:
+        if args.host or args.exclude or args.exclude_file or args.write_plan:
+            parser.error(
+                "--plan can not be used with hosts, exclusions or --write-plan"
+            )
+        try:
+            plan_file = planfile.PlanFile(args.plan)
+            profile = plan_file.profile
+        except (OSError, planfile.PlanError, profiles.ProfileError) as err:
+            parser.error("invalid plan {}: {}".format(args.plan, err))
+    elif args.scan_profile:
+        try:
+            profile = profiles.load_profile(args.scan_profile)
+        except (OSError, profiles.ProfileError) as err:
+            parser.error("invalid scan profile {}: {}".format(args.scan_profile, err))
+    elif args.write_plan:
+        parser.error("--write-plan requires --scan-profile")
+    if profile is not None:
+        # Parse again with the options of the profile as defaults
+        parser.set_defaults(**profile.defaults)
+        args = parser.parse_args(argv)
+
+    if args.outform in ssl_certinfo.COLUMNAR_FORMATS and not columnar.available():
+        parser.error("pyarrow is required for Parquet and Arrow output")
+
+    output_options = None
+    if args.output:
+        output_options = output.OutputOptions(
+            args.output, args.compress, args.split_records, args.split_size
+        )
+        if output_options.compression == "zstd" and not output.zstandard:
+            parser.error("zstandard is required for zstd compression")
+        if output_options.split and args.outform not in SPLIT_FORMATS:
+            parser.error("only JSON, YAML and CSV output can be split")
+    elif args.compress or args.split_records or args.split_size:
+        parser.error("--compress and --split-* require --output")
+
+    context = None
+    if args.verify or args.ca_file:
+        try:
+            context = ssl_certinfo.create_context(True, args.ca_file)
+        except SSL.Error as err:
+            parser.error("could not load CA file {}: {}".format(args.ca_file, err))
+
+    tls_config = None
+    groups = profile is not None and profile.groups
+    if args.tls_config or groups:
+        if args.serve or args.daemon or args.coordinator:
+            parser.error(
+                "--tls-config and target groups can not be used with --serve, "
+                "--daemon or --coordinator, give them to the workers instead"
+            )
+        if args.tls_config and groups:
+            parser.error("--tls-config can not be used with a profile with groups")
+        verify = bool(args.verify or args.ca_file)
+        try:
+            if groups:
+                tls_config = profile.tls_config(verify, args.ca_file)
+            else:
+                tls_config = tlsconfig.load_config(
+                    args.tls_config, verify, args.ca_file
+                )
+        except (OSError, tlsconfig.ConfigError) as err:
+            parser.error(
+                "invalid TLS config {}: {}".format(
+                    args.tls_config or "of the profile", err
+                )
+            )
+
+    exclude = list(args.exclude)
+    if args.exclude_file:
+        try:
+            exclude += read_exclude_file(args.exclude_file)
+        except (OSError, ValueError) as err:
+            parser.error("invalid exclude file: {}".format(err))
+
+    if plan_file is not None:
+        plan = plan_file
+    else:
+        plan = targets.plan_targets(args.host, exclude=exclude)
+    if args.write_plan:
+        try:
+            plan.check_limit(args.max_targets)
+            planfile.write_plan(
+                args.write_plan,
+                plan,
+                {"profile": profile.resolved(exclude), "base_dir": profile.base_dir},
+            )
+        except targets.TargetLimitError as err:
+            parser.error("{} (see --max-targets)".format(err))
+        except OSError as err:
+            parser.error("could not write plan {}: {}".format(args.write_plan, err))
+        print(plan.format(args.workers, args.timeout))
+        return 0
+    if args.dry_run:
+        print(plan.format(args.workers, args.timeout))
+        try:
+            plan.check_limit(args.max_targets)
+        except targets.TargetLimitError as err:
+            print("{} (see --max-targets)".format(err))
+        return 0
+    try:
+        plan.check_limit(args.max_targets)
+    except targets.TargetLimitError as err:
+        parser.error("{} (see --max-targets)".format(err))
+
+    thresholds = None
+    if args.warn_days is not None or args.crit_days is not None:
+        if args.serve or args.daemon or args.worker:
+            parser.error(
+                "--warn-days and --crit-days can not be used with --serve, "
+                "--daemon or --worker"
+            )
+        if None not in (args.warn_days, args.crit_days) and (
+            args.warn_days < args.crit_days
+        ):
+            parser.error("--warn-days must not be less than --crit-days")
+        if "expire_in_days" not in args.fields:
+            parser.error("--warn-days and --crit-days require the expire_in_days field")
+        thresholds = alerts.ExpiryThresholds(args.warn_days, args.crit_days)
+
+    if args.serve or args.daemon:
+        if args.retries:
+            parser.error(
+                "--retries can not be used with --serve or --daemon, failed hosts "
+                "are rechecked on schedule"
+            )
+        if "expire_in_days" not in args.fields:
+            parser.error("--serve and --daemon require the expire_in_days field")
+    if args.serve and (
+        args.probe_protocols or args.fields != list(extractors.DEFAULT_FIELDS)
+    ):
+        parser.error(
+            "--fields and --probe-protocols can not be used with --serve, the "
+            "metrics only include the expiry"
+        )
+
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+
     setup_logging(args.verbosity)
 
-    logging.info("Arguments: " + str(args))
+    logging.info("Arguments: %s", args)
 
-    ssl_certinfo.process_hosts(
-        expand_hosts(args.host), args.port, args.timeout, args.outform, args.proxy
+    if args.raise_fd_limit:
+        limits.raise_nofile_limit()
+    args.workers = limits.fit_workers(
+        args.workers, limits.sockets_per_host(args.probe_protocols)
     )
+
+    journal = None
+    if args.checkpoint:
+        scan = {
+            "hosts": args.host,
+            "exclude": exclude,
+            "port": args.port,
+            "fields": args.fields,
+        }
+        try:
+            journal = checkpoint.Checkpoint(args.checkpoint, scan, args.resume)
+        except (OSError, checkpoint.CheckpointError) as err:
+            parser.error("can not resume: {}".format(err))
+
+    if args.serve:
+        exporter.serve(
+            list(plan),
+            args.port,
+            args.timeout,
+            args.proxy,
+            listen=args.serve,
+            interval=args.interval,
+            context=context,
+            workers=args.workers,
+        )
+        return 0
+
+    if args.worker:
+        prober = ProtocolProber(args.workers) if args.probe_protocols else None
+        try:
+            distributed.run_worker(
+                args.worker,
+                args.proxy,
+                args.workers,
+                retry_policy_from_args(args),
+                context,
+                prober,
+                tls_config,
+            )
+        except OSError as err:
+            logging.error("Could not connect to the coordinator: %r", err)
+            return 1
+        finally:
+            if prober is not None:
+                prober.close()
+        return 0
+
+    if args.daemon:
+        prober = ProtocolProber(args.workers) if args.probe_protocols else None
+        try:
+            scheduler.run_daemon(
+                list(plan),
+                args.port,
+                args.timeout,
+                args.proxy,
+                policy=scheduler.ExpiryInterval(args.min_interval, args.max_interval),
+                context=context,
+                workers=args.workers,
+                fields=args.fields,
+                prober=prober,
+            )
+        finally:
+            if prober is not None:
+                prober.close()
+        return 0
+
+    timings = None
+    if args.timings or args.timings_json:
+        timings = instrumentation.Timings()
+
+    coordinator = None
+    if args.coordinator:
+        try:
+            coordinator = distributed.Coordinator(
+                args.coordinator,
+                args.port,
+                args.timeout,
+                args.lease_size,
+                args.lease_timeout,
+                args.fields,
+            )
+        except OSError as err:
+            parser.error("could not listen on {}: {}".format(args.coordinator, err))
+
+    with instrumentation.Profiler(args.profile) as profiler:
+        ssl_certinfo.process_hosts(
+            plan,
+            args.port,
+            args.timeout,
+            args.outform,
+            args.proxy,
+            timings,
+            retry_policy_from_args(args),
+            args.workers,
+            table.TableLayout(
+                args.max_rows, args.page_size, args.stream, args.sample_rows
+            ),
+            args.compact,
+            output_options,
+            context,
+            args.probe_protocols,
+            journal,
+            coordinator,
+            thresholds,
+            args.fields,
+            tls_config,
+        )
+
+    if args.profile:
+        print(profiler.format_stats(), file=sys.stderr)
+    if args.timings:
+        print(timings.format_summary(), file=sys.stderr)
+    if args.timings_json:
+        with open(args.timings_json, "w") as f:
+            f.write(timings.to_json())
+    if thresholds is not None:
+        print(thresholds.format_summary(), file=sys.stderr)
+        return thresholds.exit_code
     return 0
 
 
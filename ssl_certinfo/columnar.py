@@ -0,0 +1,108 @@
+"""Write results in the columnar Apache Parquet and Arrow IPC formats."""
+from datetime import datetime
+
+from ssl_certinfo import ssl_certinfo
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pq = None
+
+BATCH_SIZE = 10000
+TIMESTAMP_COLUMNS = ("valid_from", "valid_to", "ocsp_next_update", "ocsp_revoked_at")
+
+
+def available():
+    return pa is not None
+
+
+def column_type(name):
+    """Return the Arrow type of a record field, fields are strings by default."""
+    types = {
+        "SAN": pa.list_(pa.string()),
+        "expire_in_days": pa.int64(),
+        "key_size": pa.int32(),
+        "peerport": pa.int32(),
+        "hostname_match": pa.bool_(),
+        "verify_depth": pa.int32(),
+        "elapsed": pa.float64(),
+        "attempts": pa.int32(),
+    }
+    if name in TIMESTAMP_COLUMNS:
+        return pa.timestamp("s")
+    return types.get(name, pa.string())
+
+
+def result_schema():
+    """Return the schema of all record fields, see ssl_certinfo.RECORD_COLUMNS."""
+    return pa.schema(
+        [(name, column_type(name)) for name in ssl_certinfo.RECORD_COLUMNS]
+    )
+
+
+def to_row(record):
+    """Convert a result record to the types of result_schema."""
+    row = dict(record)
+    for key in TIMESTAMP_COLUMNS:
+        if row.get(key) is not None:
+            row[key] = datetime.fromisoformat(row[key])
+    return row
+
+
+class ColumnarWriter:
+    """Write result records in batches of batch_size rows to a binary stream.
+
+    Only one batch is held in memory at any time.
+    """
+
+    def __init__(self, stream, parquet=True, batch_size=BATCH_SIZE, timings=None):
+        if pa is None:
+            raise RuntimeError(
+                "pyarrow is required for Parquet and Arrow output, "
+                "install ssl_certinfo[arrow]"
+            )
+        self.schema = result_schema()
+        self.batch_size = batch_size
+        self.timings = timings
+        self.batch = []
+        if parquet:
+            self.writer = pq.ParquetWriter(stream, self.schema)
+        else:
+            self.writer = pa.ipc.new_file(stream, self.schema)
+
+    def write(self, record):
+        self.batch.append(to_row(record))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        batch = pa.RecordBatch.from_pylist(self.batch, schema=self.schema)
+        if self.timings is None:
+            self.writer.write_batch(batch)
+        else:
+            with self.timings.time("format"):
+                self.writer.write_batch(batch)
+        self.batch = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_records(records, stream, parquet=True, batch_size=BATCH_SIZE, timings=None):
+    """Write an iterable of result records to stream, returns the row count."""
+    count = 0
+    with ColumnarWriter(stream, parquet, batch_size, timings) as writer:
+        for record in records:
+            writer.write(record)
+            count += 1
+    return count
@@ -0,0 +1,126 @@
+"""Dual-stack connection establishment racing IPv6 and IPv4 (RFC 8305)."""
+import errno
+import os
+import selectors
+import socket
+import time
+
+# Time to wait for an attempt before starting the next one in parallel
+CONNECTION_ATTEMPT_DELAY = 0.25
+FAMILY_NAMES = {socket.AF_INET: "ipv4", socket.AF_INET6: "ipv6"}
+# Out of file descriptors, in the process or in the whole system
+DESCRIPTOR_ERRORS = (errno.EMFILE, errno.ENFILE)
+# Time to wait for descriptors to be freed if no attempt of our own is running
+DESCRIPTOR_WAIT = 0.05
+# Attempts running in parallel, further addresses wait until one has failed
+MAX_ATTEMPTS = 2
+# Selector that needs no file descriptor of its own, unlike epoll and kqueue,
+# so that waiting for descriptors to be freed still works when none is left
+SELECTOR = getattr(selectors, "PollSelector", selectors.SelectSelector)
+
+
+def resolve(hostname, port):
+    """Return the (family, sockaddr) pairs of hostname in connection order.
+
+    The families are interleaved, starting with the family of the first
+    address returned by getaddrinfo (RFC 8305, section 4).
+    """
+    addresses = [
+        (family, sockaddr)
+        for family, _, _, _, sockaddr in socket.getaddrinfo(
+            hostname, port, socket.AF_UNSPEC, socket.SOCK_STREAM
+        )
+        if family in FAMILY_NAMES
+    ]
+    if not addresses:
+        return []
+    first = [a for a in addresses if a[0] == addresses[0][0]]
+    other = [a for a in addresses if a[0] != addresses[0][0]]
+    ordered = []
+    for i in range(max(len(first), len(other))):
+        ordered.extend(group[i] for group in (first, other) if i < len(group))
+    return ordered
+
+
+def listen_family(host):
+    """Return the address family of a server listening on host."""
+    # IPv6 addresses are the only hosts containing colons
+    return socket.AF_INET6 if ":" in host else socket.AF_INET
+
+
+def connection_error(code):
+    # OSError picks the subclass matching the errno, e.g. ConnectionRefusedError
+    return OSError(code, os.strerror(code))
+
+
+def connect(addresses, timeout, delay=CONNECTION_ATTEMPT_DELAY):
+    """Connect to the first reachable of addresses, returns (socket, family).
+
+    A new attempt is started every delay seconds, or as soon as the previous
+    one failed, while earlier attempts keep running, at most MAX_ATTEMPTS at
+    once. The first established connection wins, all others are closed. The
+    returned socket is blocking with the given timeout.
+
+    If no file descriptor is available, no further attempt is started until
+    a running attempt ends or a descriptor is freed, within the timeout.
+    """
+    deadline = time.monotonic() + timeout
+    pending = list(addresses)
+    attempts = {}
+    selector = SELECTOR()
+    error = None
+    next_start = 0
+    starved = None
+    try:
+        while pending or attempts:
+            now = time.monotonic()
+            if now >= deadline:
+                if starved is not None and not attempts:
+                    raise starved
+                raise TimeoutError("timed out")
+
+            can_start = pending and len(attempts) < MAX_ATTEMPTS
+            if can_start and now >= next_start:
+                family, sockaddr = pending[0]
+                try:
+                    sock = socket.socket(family, socket.SOCK_STREAM)
+                except OSError as err:
+                    if err.errno not in DESCRIPTOR_ERRORS:
+                        raise
+                    starved = err
+                    next_start = now + (delay if attempts else DESCRIPTOR_WAIT)
+                    continue
+                starved = None
+                pending.pop(0)
+                sock.setblocking(False)
+                code = sock.connect_ex(sockaddr)
+                if code not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                    sock.close()
+                    error = connection_error(code)
+                    continue
+                attempts[sock] = family
+                selector.register(sock, selectors.EVENT_WRITE)
+                next_start = now + delay
+                continue
+
+            wait = deadline - now
+            if can_start:
+                wait = min(wait, next_start - now)
+            for key, _ in selector.select(max(wait, 0)):
+                sock = key.fileobj
+                selector.unregister(sock)
+                family = attempts.pop(sock)
+                code = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if code == 0:
+                    sock.settimeout(timeout)
+                    return sock, FAMILY_NAMES[family]
+                sock.close()
+                error = connection_error(code)
+                # Start the next attempt right away after a failure
+                next_start = 0
+
+        raise error or OSError("No address to connect to")
+    finally:
+        for sock in attempts:
+            sock.close()
+        selector.close()
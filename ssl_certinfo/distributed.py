@@ -0,0 +1,299 @@
+"""Distribute a scan over worker processes, locally or on other machines.
+
+A coordinator splits the targets into leases of hosts and hands them out to
+workers, which scan them with the usual fetch path and stream the result
+records back. Coordinator and workers exchange JSON lines over TCP or a Unix
+socket:
+
+    worker       {"op": "lease"}
+    coordinator  {"lease": 1, "hosts": [...], "port": 443, "timeout": 5,
+                  "fields": ["CN", ...]}
+                 {"wait": 0.5} while all remaining hosts are leased
+                 {"done": true} when the scan is complete
+    worker       {"op": "result", "lease": 1, "record": {...}} for every host
+
+Every result renews the lease. Leases of workers that disconnect or do not
+report for lease_timeout seconds are handed out again, results reported
+later for such a lease are dropped, so that every host is reported once.
+"""
+import collections
+import itertools
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+
+from ssl_certinfo import extractors, scanner, serializers
+from ssl_certinfo.connect import listen_family
+
+LEASE_SIZE = 64
+LEASE_TIMEOUT = 60
+WAIT_INTERVAL = 0.5
+UNIX_PREFIX = "unix:"
+
+
+def format_address(address):
+    if isinstance(address, str):
+        return UNIX_PREFIX + address
+    host, port = address[:2]
+    return "[{}]:{}".format(host, port) if ":" in host else "{}:{}".format(host, port)
+
+
+class Lease:
+    """Hosts handed out to one worker, with the hosts it has not reported yet."""
+
+    def __init__(self, lease_id, hosts, deadline):
+        self.id = lease_id
+        self.hosts = hosts
+        self.remaining = set(hosts)
+        self.deadline = deadline
+
+
+class TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, handler):
+        self.address_family = listen_family(address[0])
+        super().__init__(address, handler)
+
+
+class UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+class WorkerHandler(socketserver.StreamRequestHandler):
+    """Serve the lease requests and results of one worker connection."""
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        leases = set()
+        try:
+            for line in self.rfile:
+                message = json.loads(line)
+                if message["op"] == "lease":
+                    reply = coordinator.acquire(leases)
+                    self.wfile.write(serializers.json_dumps_compact(reply).encode())
+                    self.wfile.write(b"\n")
+                elif message["op"] == "result":
+                    coordinator.report(message["lease"], message["record"])
+        except (OSError, ValueError, KeyError) as err:
+            logging.warning("Connection to worker failed: %r", err)
+        finally:
+            coordinator.release(leases)
+
+
+class Coordinator:
+    """Hand out the hosts of a scan to workers and collect their records."""
+
+    def __init__(
+        self,
+        address,
+        port=443,
+        timeout=5,
+        lease_size=LEASE_SIZE,
+        lease_timeout=LEASE_TIMEOUT,
+        fields=extractors.DEFAULT_FIELDS,
+        clock=time.monotonic,
+    ):
+        self.port = port
+        self.timeout = timeout
+        self.lease_size = lease_size
+        self.lease_timeout = lease_timeout
+        self.fields = list(fields)
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.records = queue.Queue()
+        self.leases = {}
+        self.requeued = collections.deque()
+        self.hosts = iter(())
+        self.exhausted = False
+        self.lease_ids = itertools.count(1)
+        server_class = UnixServer if isinstance(address, str) else TCPServer
+        self.server = server_class(address, WorkerHandler)
+        self.server.coordinator = self
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def _next_hosts(self):
+        if self.requeued:
+            return self.requeued.popleft()
+        if self.exhausted:
+            return []
+        hosts = list(itertools.islice(self.hosts, self.lease_size))
+        self.exhausted = len(hosts) < self.lease_size
+        return hosts
+
+    def _requeue(self, lease):
+        del self.leases[lease.id]
+        if lease.remaining:
+            self.requeued.append([h for h in lease.hosts if h in lease.remaining])
+
+    def reclaim(self):
+        """Hand out the hosts of expired leases again."""
+        now = self.clock()
+        with self.lock:
+            for lease in [le for le in self.leases.values() if le.deadline <= now]:
+                logging.warning("Lease %d timed out, reassigning it", lease.id)
+                self._requeue(lease)
+
+    def acquire(self, leases):
+        """Return the reply to a lease request, adding a new lease id to leases."""
+        self.reclaim()
+        with self.lock:
+            hosts = self._next_hosts()
+            if not hosts:
+                if self.leases or self.requeued:
+                    return {"wait": WAIT_INTERVAL}
+                return {"done": True}
+            lease = Lease(
+                next(self.lease_ids), hosts, self.clock() + self.lease_timeout
+            )
+            self.leases[lease.id] = lease
+            leases.add(lease.id)
+        logging.info("Lease %d: %d hosts", lease.id, len(hosts))
+        return {
+            "lease": lease.id,
+            "hosts": hosts,
+            "port": self.port,
+            "timeout": self.timeout,
+            "fields": self.fields,
+        }
+
+    def report(self, lease_id, record):
+        """Accept a result record, False if the lease has been reassigned."""
+        with self.lock:
+            lease = self.leases.get(lease_id)
+            if lease is None or record["peername"] not in lease.remaining:
+                logging.info("Dropping late result for lease %s", lease_id)
+                return False
+            lease.remaining.discard(record["peername"])
+            lease.deadline = self.clock() + self.lease_timeout
+            if not lease.remaining:
+                del self.leases[lease_id]
+            self.records.put(record)
+        return True
+
+    def release(self, leases):
+        """Hand out the unfinished leases of a disconnected worker again."""
+        with self.lock:
+            for lease_id in leases:
+                if lease_id in self.leases:
+                    logging.warning("Worker of lease %d disconnected", lease_id)
+                    self._requeue(self.leases[lease_id])
+
+    def finished(self):
+        with self.lock:
+            return self.exhausted and not self.leases and not self.requeued
+
+    def scan(self, hosts, on_result=None, on_error=None):
+        """Serve workers until all hosts are scanned, yielding their records.
+
+        hosts is consumed lazily, lease by lease. on_result and on_error are
+        called like in scanner.scan.
+        """
+        self.hosts = iter(hosts)
+        with self.lock:
+            # Read the first lease up front to know whether there is any host
+            first = self._next_hosts()
+            if first:
+                self.requeued.append(first)
+        thread = threading.Thread(
+            name="ssl_certinfo_coordinator",
+            target=self.server.serve_forever,
+            daemon=True,
+        )
+        thread.start()
+        logging.info("Waiting for workers on %s", format_address(self.address))
+        try:
+            while True:
+                try:
+                    record = self.records.get(timeout=WAIT_INTERVAL)
+                except queue.Empty:
+                    if self.finished() and self.records.empty():
+                        return
+                    self.reclaim()
+                    continue
+                callback = on_error if "error" in record else on_result
+                if callback is not None:
+                    callback(record)
+                yield record
+        finally:
+            self.close()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def connect(address, timeout=None):
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(address)
+        return sock
+    # IPv6 server addresses also hold the flow info and scope id
+    return socket.create_connection(address[:2], timeout)
+
+
+def run_worker(
+    address,
+    proxy=None,
+    workers=1,
+    retry_policy=None,
+    context=None,
+    prober=None,
+    tls_config=None,
+):
+    """Scan the leases of the coordinator at address until the scan is done.
+
+    address is a (host, port) tuple or the path of a Unix socket. Port,
+    timeout and certificate fields are given by the coordinator, all other
+    options are those of the worker. Returns the number of hosts scanned.
+    """
+    count = 0
+    with connect(address) as sock, sock.makefile("rb") as replies:
+
+        def send(message):
+            line = serializers.json_dumps_compact(message) + "\n"
+            sock.sendall(line.encode())
+
+        while True:
+            send({"op": "lease"})
+            line = replies.readline()
+            if not line:
+                logging.info("Coordinator closed the connection")
+                break
+            reply = json.loads(line)
+            if reply.get("done"):
+                break
+            if "wait" in reply:
+                time.sleep(reply["wait"])
+                continue
+            for record in scanner.scan(
+                reply["hosts"],
+                reply["port"],
+                reply["timeout"],
+                proxy,
+                workers=workers,
+                retry_policy=retry_policy,
+                context=context,
+                prober=prober,
+                fields=reply["fields"],
+                tls_config=tls_config,
+            ):
+                send({"op": "result", "lease": reply["lease"], "record": record})
+                count += 1
+    logging.info("Scanned %d hosts", count)
+    return count
@@ -0,0 +1,237 @@
+"""Prometheus exporter for SSL CertInfo."""
+import functools
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ssl_certinfo import limits, scheduler, ssl_certinfo
+from ssl_certinfo.connect import listen_family
+from ssl_certinfo.instrumentation import Histogram
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Certificate fields the metrics are built from
+FIELDS = ["expire_in_days"]
+
+
+def escape_label_value(value):
+    """Escape a label value for the Prometheus text exposition format."""
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def format_labels(host, port, **extra):
+    labels = [("host", host), ("port", port)] + list(extra.items())
+    return ",".join('{}="{}"'.format(k, escape_label_value(v)) for k, v in labels)
+
+
+class MetricsSnapshot:
+    """In-memory state of the latest scan results, rendered on every scrape."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.expire_in_days = {}
+        self.latency = {}
+        self.errors = {}
+        self.success = {}
+
+    def _histogram(self, key):
+        if key not in self.latency:
+            self.latency[key] = Histogram(LATENCY_BUCKETS)
+        return self.latency[key]
+
+    def record_handshake(self, host, port, duration):
+        with self.lock:
+            self._histogram((host, port)).observe(duration)
+
+    def record_result(self, host, port, certinfo):
+        key = (host, port)
+        with self.lock:
+            self.expire_in_days[key] = certinfo["expire_in_days"]
+            self.errors.setdefault(key, 0)
+            self.success[key] = 1
+
+    def record_error(self, host, port):
+        key = (host, port)
+        with self.lock:
+            self.errors[key] = self.errors.get(key, 0) + 1
+            self.success[key] = 0
+
+    def publish(self, record):
+        """Record a result record of ssl_certinfo.fetch_host."""
+        host, port = record["peername"], record["peerport"]
+        if "error" in record:
+            self.record_error(host, port)
+        else:
+            self.record_result(host, port, record)
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            lines.append(
+                "# HELP ssl_cert_expire_in_days "
+                "Number of days until the certificate expires."
+            )
+            lines.append("# TYPE ssl_cert_expire_in_days gauge")
+            for (host, port), days in sorted(self.expire_in_days.items()):
+                lines.append(
+                    "ssl_cert_expire_in_days{{{}}} {}".format(
+                        format_labels(host, port), days
+                    )
+                )
+
+            lines.append(
+                "# HELP ssl_cert_handshake_duration_seconds "
+                "Time taken to complete the TLS handshake."
+            )
+            lines.append("# TYPE ssl_cert_handshake_duration_seconds histogram")
+            for (host, port), hist in sorted(self.latency.items()):
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(
+                        "ssl_cert_handshake_duration_seconds_bucket{{{}}} {}".format(
+                            format_labels(host, port, le=bound), count
+                        )
+                    )
+                lines.append(
+                    "ssl_cert_handshake_duration_seconds_bucket{{{}}} {}".format(
+                        format_labels(host, port, le="+Inf"), hist.count
+                    )
+                )
+                lines.append(
+                    "ssl_cert_handshake_duration_seconds_sum{{{}}} {}".format(
+                        format_labels(host, port), hist.sum
+                    )
+                )
+                lines.append(
+                    "ssl_cert_handshake_duration_seconds_count{{{}}} {}".format(
+                        format_labels(host, port), hist.count
+                    )
+                )
+
+            lines.append(
+                "# HELP ssl_cert_scan_errors_total "
+                "Number of failed attempts to fetch the certificate."
+            )
+            lines.append("# TYPE ssl_cert_scan_errors_total counter")
+            for (host, port), count in sorted(self.errors.items()):
+                lines.append(
+                    "ssl_cert_scan_errors_total{{{}}} {}".format(
+                        format_labels(host, port), count
+                    )
+                )
+
+            lines.append(
+                "# HELP ssl_cert_last_scan_success "
+                "Whether the last attempt to fetch the certificate succeeded."
+            )
+            lines.append("# TYPE ssl_cert_last_scan_success gauge")
+            for (host, port), value in sorted(self.success.items()):
+                lines.append(
+                    "ssl_cert_last_scan_success{{{}}} {}".format(
+                        format_labels(host, port), value
+                    )
+                )
+
+        return "\n".join(lines) + "\n"
+
+
+def make_handler(snapshot):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = snapshot.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.debug("%s - " + format, self.address_string(), *args)
+
+    return MetricsHandler
+
+
+class PhaseDurations(dict):
+    """Duration of every phase of one fetch_host call, passed as its timings."""
+
+    def record(self, phase, seconds):
+        self[phase] = seconds
+
+
+def check_host(
+    snapshot, host, port, timeout=5, proxy=None, context=None, fields=FIELDS
+):
+    """Fetch the certificate of host:port, recording the handshake duration.
+
+    Hosts failing before the handshake are not recorded in the histogram.
+    """
+    durations = PhaseDurations()
+    record = ssl_certinfo.fetch_host(
+        host, port, timeout, proxy, durations, context, fields=fields
+    )
+    if "handshake" in durations:
+        snapshot.record_handshake(host, port, durations["handshake"])
+    return record
+
+
+class MetricsServer(ThreadingHTTPServer):
+    def __init__(self, address, handler):
+        self.address_family = listen_family(address[0])
+        super().__init__(address, handler)
+
+
+def create_server(snapshot, listen):
+    return MetricsServer(listen, make_handler(snapshot))
+
+
+def serve(
+    hosts,
+    port,
+    timeout=5,
+    proxy=None,
+    listen=("127.0.0.1", 9400),
+    interval=300,
+    context=None,
+    workers=1,
+):
+    """Serve metrics for hosts on /metrics, refreshing them in the background.
+
+    context is the SSL context shared by all refreshes, see run_daemon. Up to
+    workers hosts are refreshed at once.
+    """
+    if context is None:
+        context = ssl_certinfo.create_context()
+    snapshot = MetricsSnapshot()
+    stop_event = threading.Event()
+    refresh = scheduler.Scheduler(
+        [(host, port) for host in hosts],
+        functools.partial(
+            check_host, snapshot, timeout=timeout, proxy=proxy, context=context
+        ),
+        snapshot.publish,
+        scheduler.FixedInterval(interval),
+        spread=interval,
+        workers=limits.fit_workers(workers),
+    )
+    refresher = threading.Thread(
+        name="ssl_certinfo_refresh", target=refresh.run, args=(stop_event,), daemon=True
+    )
+    refresher.start()
+
+    server = create_server(snapshot, listen)
+    host, port = listen
+    logging.info(
+        "Serving metrics on http://%s:%s/metrics",
+        "[{}]".format(host) if ":" in host else host,
+        port,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        server.server_close()
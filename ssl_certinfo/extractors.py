@@ -0,0 +1,140 @@
+"""Registry of the certificate fields that can be extracted into a record."""
+from datetime import datetime
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import dsa, ec, ed448, ed25519, rsa
+from cryptography.x509.oid import NameOID
+
+# Extractors by field name, in the order of the output columns
+FIELDS = {}
+# Fields checked on the connection by ssl_certinfo.fetch_host instead of being
+# extracted from the certificate, in the order of their output columns
+CHECKS = ("hostname_match", "ocsp_status")
+DEFAULT_FIELDS = ("CN", "SAN", "valid_from", "valid_to", "expire_in_days") + CHECKS
+ALL = "all"
+DEFAULT = "default"
+
+KEY_TYPES = (
+    (rsa.RSAPublicKey, "RSA"),
+    (ec.EllipticCurvePublicKey, "EC"),
+    (ed25519.Ed25519PublicKey, "Ed25519"),
+    (ed448.Ed448PublicKey, "Ed448"),
+    (dsa.DSAPublicKey, "DSA"),
+)
+KEY_SIZES = {"Ed25519": 256, "Ed448": 456}
+
+
+def field(name):
+    """Register the decorated function as extractor of the field name.
+
+    The function is called with the certificate and returns the value of
+    the field in the result record.
+    """
+
+    def register(extractor):
+        FIELDS[name] = extractor
+        return extractor
+
+    return register
+
+
+@field("CN")
+def common_name(cert):
+    names = cert.subject.get_attributes_for_oid(NameOID.COMMON_NAME)
+    return names[0].value if names else None
+
+
+@field("SAN")
+def subject_alt_names(cert):
+    try:
+        ext = cert.extensions.get_extension_for_class(x509.SubjectAlternativeName)
+    except x509.ExtensionNotFound:
+        return []
+    return ext.value.get_values_for_type(x509.DNSName) + [
+        str(address) for address in ext.value.get_values_for_type(x509.IPAddress)
+    ]
+
+
+@field("valid_from")
+def valid_from(cert):
+    return cert.not_valid_before.isoformat()
+
+
+@field("valid_to")
+def valid_to(cert):
+    return cert.not_valid_after.isoformat()
+
+
+@field("expire_in_days")
+def expire_in_days(cert):
+    return (cert.not_valid_after - datetime.now()).days
+
+
+@field("fingerprint_sha256")
+def fingerprint_sha256(cert):
+    return cert.fingerprint(hashes.SHA256()).hex()
+
+
+@field("serial")
+def serial(cert):
+    return format(cert.serial_number, "x")
+
+
+@field("issuer")
+def issuer(cert):
+    return cert.issuer.rfc4514_string()
+
+
+def key_type_name(key):
+    for key_class, name in KEY_TYPES:
+        if isinstance(key, key_class):
+            return name
+    return type(key).__name__
+
+
+@field("key_type")
+def key_type(cert):
+    return key_type_name(cert.public_key())
+
+
+@field("key_size")
+def key_size(cert):
+    key = cert.public_key()
+    return getattr(key, "key_size", None) or KEY_SIZES.get(key_type_name(key))
+
+
+@field("signature_algorithm")
+def signature_algorithm(cert):
+    oid = cert.signature_algorithm_oid
+    return getattr(oid, "_name", None) or oid.dotted_string
+
+
+def select(names):
+    """Return the field names in column order, expanding "all" and "default".
+
+    The certificate fields come first, followed by the CHECKS. Raises
+    ValueError for unknown field names.
+    """
+    selected = set()
+    for name in names:
+        if name == ALL:
+            selected.update(FIELDS)
+            selected.update(CHECKS)
+        elif name == DEFAULT:
+            selected.update(DEFAULT_FIELDS)
+        elif name in FIELDS or name in CHECKS:
+            selected.add(name)
+        else:
+            raise ValueError(name)
+    return [name for name in list(FIELDS) + list(CHECKS) if name in selected]
+
+
+def certificate_fields(fields):
+    """Return the fields extracted from the certificate, without the CHECKS."""
+    return [name for name in fields if name in FIELDS]
+
+
+def extract(cert, fields=DEFAULT_FIELDS):
+    """Return the record fields of cert, running only the selected extractors."""
+    return {name: FIELDS[name](cert) for name in certificate_fields(fields)}
@@ -0,0 +1,106 @@
+"""Check whether a certificate is valid for a hostname (RFC 6125)."""
+import ipaddress
+import threading
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.x509.oid import NameOID
+
+CACHE_SIZE = 4096
+
+
+def canonical_name(name):
+    return name.lower().rstrip(".")
+
+
+class HostnameMatcher:
+    """Names of a certificate, compiled for fast lookups.
+
+    DNS names match case-insensitively. A wildcard is only allowed as the
+    complete left-most label of a name with at least two further labels, it
+    matches exactly one label ("*.example.com" matches "www.example.com" but
+    neither "example.com" nor "a.b.example.com"). IP addresses only match IP
+    address entries. The common name is only used if the certificate has no
+    DNS names (RFC 6125, section 6.4.4).
+    """
+
+    def __init__(self, dns_names=(), ip_addresses=(), common_name=None):
+        self.names = {}
+        self.wildcards = {}
+        self.addresses = {ipaddress.ip_address(a): str(a) for a in ip_addresses}
+        if not dns_names and common_name:
+            dns_names = [common_name]
+        for entry in dns_names:
+            name = canonical_name(entry)
+            first, _, rest = name.partition(".")
+            if first == "*":
+                if rest.count(".") >= 1 and "*" not in rest:
+                    self.wildcards.setdefault(rest, entry)
+            elif "*" not in name:
+                self.names.setdefault(name, entry)
+
+    @classmethod
+    def from_certificate(cls, cert):
+        try:
+            san = cert.extensions.get_extension_for_class(x509.SubjectAlternativeName)
+            dns_names = san.value.get_values_for_type(x509.DNSName)
+            ip_addresses = san.value.get_values_for_type(x509.IPAddress)
+        except x509.ExtensionNotFound:
+            dns_names, ip_addresses = [], []
+        common_names = cert.subject.get_attributes_for_oid(NameOID.COMMON_NAME)
+        common_name = common_names[0].value if common_names else None
+        return cls(dns_names, ip_addresses, common_name)
+
+    def match(self, hostname):
+        """Return the entry of the certificate matching hostname, None if none."""
+        try:
+            return self.addresses.get(ipaddress.ip_address(hostname.strip("[]")))
+        except ValueError:
+            pass
+        name = canonical_name(hostname)
+        if name in self.names:
+            return self.names[name]
+        first, _, rest = name.partition(".")
+        if first:
+            return self.wildcards.get(rest)
+        return None
+
+
+class MatcherCache:
+    """HostnameMatchers by certificate fingerprint.
+
+    Certificates shared by many hosts, e.g. wildcard certificates, are
+    compiled only once. The oldest entries are evicted beyond maxsize.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def get(self, cert):
+        key = cert.fingerprint(hashes.SHA256())
+        with self.lock:
+            matcher = self.entries.get(key)
+        if matcher is None:
+            matcher = HostnameMatcher.from_certificate(cert)
+            with self.lock:
+                if len(self.entries) >= self.maxsize:
+                    del self.entries[next(iter(self.entries))]
+                self.entries[key] = matcher
+        return matcher
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+CACHE = MatcherCache()
+
+
+def hostname_match(cert, hostname, cache=CACHE):
+    """Return the hostname match fields of a result record."""
+    entry = cache.get(cert).match(hostname)
+    if entry is None:
+        return {"hostname_match": False}
+    return {"hostname_match": True, "matched_name": entry}
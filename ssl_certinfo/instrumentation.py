@@ -0,0 +1,208 @@
+"""Per-phase timers and profiling hooks for SSL CertInfo."""
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+
+PHASE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SUMMARY_HEADER = "{:<10} {:>8} {:>10} {:>10} {:>10} {:>8} {:>8} {:>8}"
+SUMMARY_ROW = "{:<10} {:>8} {:>9.3f}s {:>9.3f}s {:>9.3f}s {:>7}s {:>7}s {:>7}s"
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets."""
+
+    def __init__(self, buckets=PHASE_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Return the upper bound of the bucket containing the q-quantile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= rank:
+                return bound
+        return float("inf")
+
+
+class Timings:
+    """Collect the duration of every phase of every scanned host."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phases = {}
+
+    def record(self, phase, seconds):
+        with self.lock:
+            if phase not in self.phases:
+                self.phases[phase] = Histogram()
+            self.phases[phase].observe(seconds)
+
+    def time(self, phase):
+        """Context manager recording the duration of its block as phase."""
+        return PhaseTimer(self, phase)
+
+    def summary(self):
+        with self.lock:
+            return {
+                phase: {
+                    "count": hist.count,
+                    "total": hist.sum,
+                    "mean": hist.sum / hist.count,
+                    "max": hist.max,
+                    "p50": hist.quantile(0.5),
+                    "p90": hist.quantile(0.9),
+                    "p99": hist.quantile(0.99),
+                    "buckets": dict(zip(map(str, hist.buckets), hist.counts)),
+                }
+                for phase, hist in self.phases.items()
+            }
+
+    def format_summary(self):
+        """Return the summary as a human readable table."""
+        header = SUMMARY_HEADER.format(
+            "phase", "count", "total", "mean", "max", "p50<=", "p90<=", "p99<="
+        )
+        lines = [header]
+        for phase, stats in self.summary().items():
+            lines.append(
+                SUMMARY_ROW.format(
+                    phase,
+                    stats["count"],
+                    stats["total"],
+                    stats["mean"],
+                    stats["max"],
+                    stats["p50"],
+                    stats["p90"],
+                    stats["p99"],
+                )
+            )
+        return "\n".join(lines)
+
+    def to_json(self):
+        return json.dumps(self.summary(), indent=4)
+
+
+class PhaseTimer:
+    def __init__(self, timings, phase):
+        self.timings = timings
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.record(self.phase, time.perf_counter() - self.start)
+
+
+class PhaseTracer:
+    """Tracer for get_certificate remembering the current phase.
+
+    Durations are only measured if timings is given, so tracing costs a single
+    attribute assignment per phase when timings are disabled.
+    """
+
+    def __init__(self, timings=None):
+        self.timings = timings
+        self.phase = None
+        self.start = None
+
+    def __call__(self, phase):
+        if self.timings is not None:
+            now = time.perf_counter()
+            if self.phase is not None:
+                self.timings.record(self.phase.value, now - self.start)
+            self.start = now
+        self.phase = phase
+
+    def finish(self):
+        """Record the duration of the current phase."""
+        if self.timings is not None and self.phase is not None:
+            self.timings.record(self.phase.value, time.perf_counter() - self.start)
+            self.start = None
+
+
+# Profiler whose block is running, worker threads report to it, see profiled
+ACTIVE_PROFILER = None
+
+
+class Profiler:
+    """Context manager running cProfile around its block.
+
+    cProfile only profiles the thread that enabled it, so calls made in
+    worker threads through profiled are recorded in one profile per thread.
+    format_stats merges all of them.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.profile = cProfile.Profile() if enabled else None
+        self.thread = None
+        self.thread_profiles = []
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        global ACTIVE_PROFILER
+        if self.enabled:
+            self.thread = threading.current_thread()
+            ACTIVE_PROFILER = self
+            self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        global ACTIVE_PROFILER
+        if self.enabled:
+            self.profile.disable()
+            ACTIVE_PROFILER = None
+
+    def call(self, function, *args):
+        """Call function(*args), profiled in the current thread."""
+        if threading.current_thread() is self.thread:
+            return function(*args)
+        profile = getattr(self.local, "profile", None)
+        if profile is None:
+            profile = self.local.profile = cProfile.Profile()
+            with self.lock:
+                self.thread_profiles.append(profile)
+        profile.enable()
+        try:
+            return function(*args)
+        finally:
+            profile.disable()
+
+    def format_stats(self, limit=25):
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        with self.lock:
+            for profile in self.thread_profiles:
+                stats.add(profile)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+
+def profiled(function, *args):
+    """Call function(*args), profiled if a Profiler block is running.
+
+    Used to run the work of thread pools, which cProfile does not see.
+    """
+    profiler = ACTIVE_PROFILER
+    if profiler is None:
+        return function(*args)
+    return profiler.call(function, *args)
@@ -0,0 +1,78 @@
+"""Fit the concurrency of a scan to the file descriptor limit of the process."""
+import logging
+
+from ssl_certinfo import connect
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+# Descriptors kept free for output files, logging, pipes and the interpreter
+RESERVED_DESCRIPTORS = 32
+# Sockets of one host: the parallel happy eyeballs attempts of connect
+SOCKETS_PER_HOST = connect.MAX_ATTEMPTS
+
+
+def nofile_limit():
+    """Return the (soft, hard) RLIMIT_NOFILE, None if it is not available."""
+    if resource is None:  # pragma: no cover
+        return None
+    return resource.getrlimit(resource.RLIMIT_NOFILE)
+
+
+def raise_nofile_limit(target=None):
+    """Raise the soft RLIMIT_NOFILE to target, at most to the hard limit.
+
+    Without target the soft limit is raised to the hard limit. Returns the
+    resulting soft limit, None if it is not available.
+    """
+    limits = nofile_limit()
+    if limits is None:  # pragma: no cover
+        return None
+    soft, hard = limits
+    wanted = hard if target is None else target
+    if hard != resource.RLIM_INFINITY:
+        wanted = min(wanted, hard)
+    if wanted == resource.RLIM_INFINITY or wanted > soft:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+            soft = wanted
+        except (ValueError, OSError) as err:
+            logging.warning("Could not raise the file descriptor limit: %s", err)
+    logging.info("File descriptor limit: %s (hard limit %s)", soft, hard)
+    return soft
+
+
+def socket_budget():
+    """Return the number of sockets that may be open at once, None if unbounded."""
+    limits = nofile_limit()
+    if limits is None or limits[0] == resource.RLIM_INFINITY:
+        return None
+    return max(limits[0] - RESERVED_DESCRIPTORS, SOCKETS_PER_HOST)
+
+
+def sockets_per_host(probe_protocols=False):
+    # Probing runs up to one more handshake per host in the pool of the prober
+    return SOCKETS_PER_HOST * 2 if probe_protocols else SOCKETS_PER_HOST
+
+
+def fit_workers(workers, sockets=SOCKETS_PER_HOST, budget=None):
+    """Return workers reduced so that all hosts in flight fit into the budget.
+
+    budget defaults to the socket_budget of the process.
+    """
+    if budget is None:
+        budget = socket_budget()
+    if budget is None:
+        return workers
+    fitting = max(budget // sockets, 1)
+    if workers > fitting:
+        logging.warning(
+            "Scanning %d hosts at once instead of %d to stay within the file "
+            "descriptor limit, see --raise-fd-limit",
+            fitting,
+            workers,
+        )
+        return fitting
+    return workers
@@ -0,0 +1,200 @@
+"""Parse and verify OCSP responses stapled to the TLS handshake.
+
+A response is only trusted if it is signed by the issuer of the certificate,
+taken from the chain sent by the server, or by a responder certificate the
+issuer delegated OCSP signing to. Otherwise its status is "unverified" if the
+issuer is not in the chain, "mismatch" if it is for another certificate and
+"bad_signature" if its signature is invalid.
+"""
+import logging
+import threading
+from datetime import datetime, timezone
+
+from cryptography import exceptions, x509
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+from cryptography.x509 import ocsp
+from cryptography.x509.oid import ExtendedKeyUsageOID
+
+# Status of certificates whose server did not staple an OCSP response
+NO_STAPLE = "none"
+CACHE_SIZE = 100000
+# Statuses depending on the chain sent with the response, never cached as the
+# response may verify with the issuer sent by another server
+UNVERIFIED_STATUSES = ("unverified", "mismatch", "bad_signature")
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class OcspCache:
+    """Parsed OCSP responses by certificate issuer and serial number.
+
+    Entries are kept until the next update time of their response has passed,
+    so certificates shared by many hosts are parsed only once per scan.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE, clock=utcnow):
+        self.maxsize = maxsize
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            info, expires = entry
+            if expires is not None and expires <= self.clock():
+                del self.entries[key]
+                return None
+            return info
+
+    def put(self, key, info, expires=None):
+        with self.lock:
+            if len(self.entries) >= self.maxsize:
+                # Evict the oldest entry, dicts keep their insertion order
+                del self.entries[next(iter(self.entries))]
+            self.entries[key] = (info, expires)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+CACHE = OcspCache()
+
+
+def find_issuer(cert, chain):
+    """Return the certificate of chain that issued cert, None if it is missing."""
+    for candidate in chain:
+        if candidate.subject != cert.issuer:
+            continue
+        try:
+            cert.verify_directly_issued_by(candidate)
+        except (ValueError, TypeError, exceptions.InvalidSignature):
+            continue
+        return candidate
+    return None
+
+
+def verify_signature(public_key, signature, data, algorithm):
+    """Raise InvalidSignature if signature of data is not made by public_key."""
+    if isinstance(public_key, rsa.RSAPublicKey):
+        public_key.verify(signature, data, padding.PKCS1v15(), algorithm)
+    elif isinstance(public_key, ec.EllipticCurvePublicKey):
+        public_key.verify(signature, data, ec.ECDSA(algorithm))
+    else:
+        # Ed25519 and Ed448 keys take no hash algorithm
+        public_key.verify(signature, data)
+
+
+def is_responder(response, cert):
+    """Return True if cert is the responder named in the response."""
+    if response.responder_name is not None:
+        return cert.subject == response.responder_name
+    key_id = x509.SubjectKeyIdentifier.from_public_key(cert.public_key())
+    return key_id.digest == response.responder_key_hash
+
+
+def responder_certificate(response, issuer):
+    """Return the certificate that signed response for issuer, None if unknown.
+
+    This is the issuer itself or a certificate included in the response that
+    the issuer authorised for OCSP signing.
+    """
+    if is_responder(response, issuer):
+        return issuer
+    for cert in response.certificates:
+        if not is_responder(response, cert) or find_issuer(cert, [issuer]) is None:
+            continue
+        try:
+            usage = cert.extensions.get_extension_for_class(x509.ExtendedKeyUsage)
+        except x509.ExtensionNotFound:
+            continue
+        if ExtendedKeyUsageOID.OCSP_SIGNING in usage.value:
+            return cert
+    return None
+
+
+def verify_response(response, cert, issuer):
+    """Return the ocsp_status of a response not signed for cert, else None."""
+    # The request of cert has the issuer hashes the response must match
+    request = (
+        ocsp.OCSPRequestBuilder()
+        .add_certificate(cert, issuer, response.hash_algorithm)
+        .build()
+    )
+    if (
+        response.issuer_name_hash != request.issuer_name_hash
+        or response.issuer_key_hash != request.issuer_key_hash
+    ):
+        return "mismatch"
+    responder = responder_certificate(response, issuer)
+    if responder is None:
+        return "bad_signature"
+    try:
+        verify_signature(
+            responder.public_key(),
+            response.signature,
+            response.tbs_response_bytes,
+            response.signature_hash_algorithm,
+        )
+    except exceptions.InvalidSignature:
+        return "bad_signature"
+    return None
+
+
+def parse_response(cert, data, issuer=None):
+    """Return the OCSP fields of a result record and the response's next update.
+
+    cert is the cryptography certificate the DER encoded response data was
+    stapled to, issuer the certificate that issued cert, None if the server
+    did not send it.
+    """
+    response = ocsp.load_der_ocsp_response(data)
+    if response.response_status != ocsp.OCSPResponseStatus.SUCCESSFUL:
+        return {"ocsp_status": response.response_status.name.lower()}, None
+    if response.serial_number != cert.serial_number:
+        return {"ocsp_status": "mismatch"}, None
+    if issuer is None:
+        return {"ocsp_status": "unverified"}, None
+    status = verify_response(response, cert, issuer)
+    if status is not None:
+        return {"ocsp_status": status}, None
+
+    info = {"ocsp_status": response.certificate_status.name.lower()}
+    next_update = response.next_update_utc
+    if next_update is not None:
+        next_update = next_update.replace(tzinfo=None)
+        info["ocsp_next_update"] = next_update.isoformat()
+    if response.revocation_time_utc is not None:
+        revoked_at = response.revocation_time_utc.replace(tzinfo=None)
+        info["ocsp_revoked_at"] = revoked_at.isoformat()
+    return info, next_update
+
+
+def certificate_status(cert, data, cache=CACHE, chain=()):
+    """Return the OCSP fields of a result record for cert.
+
+    data is the stapled response as received in the handshake, empty or None
+    if the server did not staple a response. chain holds the certificates
+    sent by the server, the response is verified with the issuer of cert
+    among them. Only responses which are not in the cache are verified.
+    """
+    if not data:
+        return {"ocsp_status": NO_STAPLE}
+
+    # Servers may staple different responses for the same certificate
+    key = (cert.issuer.rfc4514_string(), cert.serial_number, data)
+    info = cache.get(key) if cache is not None else None
+    if info is None:
+        try:
+            info, next_update = parse_response(cert, data, find_issuer(cert, chain))
+        except ValueError as err:
+            logging.info("Could not parse stapled OCSP response: %r", err)
+            return {"ocsp_status": "invalid"}
+        if cache is not None and info["ocsp_status"] not in UNVERIFIED_STATUSES:
+            cache.put(key, info, next_update)
+    return dict(info)
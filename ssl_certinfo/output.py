@@ -0,0 +1,202 @@
+"""Write results to files, optionally compressed and split into chunks."""
+import gzip
+import os
+import queue
+import threading
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+BUFFER_SIZE = 256 * 1024
+QUEUE_SIZE = 64
+COMPRESSIONS = ("gzip", "zstd")
+# Queue marker telling the writer thread to continue in the next chunk file
+ROTATE = object()
+SUFFIXES = {".gz": "gzip", ".gzip": "gzip", ".zst": "zstd", ".zstd": "zstd"}
+
+
+def compression_from_path(path):
+    return SUFFIXES.get(os.path.splitext(path)[1].lower())
+
+
+def chunk_path(path, index):
+    """Insert the chunk index before the file extensions of path.
+
+    results.csv.gz becomes results.0001.csv.gz for index 1.
+    """
+    directory, name = os.path.split(path)
+    stem, dot, suffixes = name.partition(".")
+    return os.path.join(directory, "{}.{:04d}{}{}".format(stem, index, dot, suffixes))
+
+
+def open_compressed(path, compression=None):
+    """Open path for binary writing, compressing with gzip or zstd."""
+    if compression == "gzip":
+        return gzip.open(path, "wb")
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError(
+                "zstandard is required for zstd compression, "
+                "install ssl_certinfo[zstd]"
+            )
+        return zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+    return open(path, "wb")
+
+
+class OutputOptions:
+    """Where and how results are written.
+
+    If split_records or split_size is given, results are written into chunks
+    of at most split_records hosts or split_size bytes before compression.
+    Every chunk is a complete document of the chosen output format.
+    """
+
+    def __init__(self, path, compression=None, split_records=None, split_size=None):
+        self.path = path
+        self.compression = compression or compression_from_path(path)
+        self.split_records = split_records
+        self.split_size = split_size
+
+    @property
+    def split(self):
+        return bool(self.split_records or self.split_size)
+
+    def open(self):
+        return OutputWriter(self.path, self.compression, self.split)
+
+
+class OutputWriter:
+    """File-like object handing buffered writes to a dedicated writer thread.
+
+    Encoding, compression and file I/O happen in the writer thread, so they
+    overlap with scanning and formatting. With split, every call of rotate()
+    closes the current file and continues in the next chunk file.
+    """
+
+    def __init__(self, path, compression=None, split=False, buffer_size=BUFFER_SIZE):
+        self.path = path
+        self.compression = compression
+        self.split = split
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.buffered = 0
+        self.position = 0
+        self.closed = False
+        self.paths = []
+        self.error = None
+        self.queue = queue.Queue(QUEUE_SIZE)
+        self.thread = threading.Thread(
+            name="ssl_certinfo_writer", target=self.run, daemon=True
+        )
+        self.thread.start()
+
+    def next_path(self):
+        if self.split:
+            return chunk_path(self.path, len(self.paths) + 1)
+        return self.path
+
+    def run(self):
+        f = None
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None or item is ROTATE:
+                    if f is not None:
+                        f.close()
+                        f = None
+                    if item is None:
+                        return
+                    continue
+                if f is None:
+                    path = self.next_path()
+                    f = open_compressed(path, self.compression)
+                    self.paths.append(path)
+                f.write(item)
+        except Exception as err:
+            self.error = err
+            # Keep draining the queue so that writers never block forever
+            while self.queue.get() is not None:
+                pass
+        finally:
+            if f is not None:
+                f.close()
+
+    def check(self):
+        if self.error is not None:
+            raise self.error
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        self.buffer.append(data)
+        self.buffered += len(data)
+        self.position += len(data)
+        if self.buffered >= self.buffer_size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        self.check()
+        if self.buffer:
+            self.queue.put(b"".join(self.buffer))
+            self.buffer = []
+            self.buffered = 0
+
+    def tell(self):
+        return self.position
+
+    def rotate(self):
+        """Start writing to the next chunk file."""
+        self.flush()
+        self.queue.put(ROTATE)
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.queue.put(None)
+        self.thread.join()
+        self.closed = True
+        self.check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ChunkedRecordWriter:
+    """Write records through a record formatter, rotating chunks at limits."""
+
+    def __init__(self, writer, formatter, split_records=None, split_size=None):
+        self.writer = writer
+        self.formatter = formatter
+        self.split_records = split_records
+        self.split_size = split_size
+        self.records = 0
+        self.size = 0
+
+    def write_raw(self, text):
+        self.writer.write(text)
+        self.size += len(text)
+
+    def write(self, peer, record):
+        if self.records and (
+            (self.split_records and self.records >= self.split_records)
+            or (self.split_size and self.size >= self.split_size)
+        ):
+            self.write_raw(self.formatter.footer())
+            self.writer.rotate()
+            self.records = 0
+            self.size = 0
+        if not self.records:
+            self.write_raw(self.formatter.header())
+        self.write_raw(self.formatter.record(peer, record, self.records == 0))
+        self.records += 1
+
+    def close(self):
+        if self.records:
+            self.write_raw(self.formatter.footer())
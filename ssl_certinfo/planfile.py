@@ -0,0 +1,166 @@
+"""Precompiled target plans, stored in a compact binary file read with mmap.
+
+A plan file holds the scan profile and the hosts of a TargetPlan after
+exclusions and duplicates were removed. The layout is:
+
+* header: magic, format version, size of the settings and number of entries,
+* settings: the profile as JSON, padded to 8 bytes,
+* entries: one fixed size entry per hostname or address interval, in scan
+  order, with the first and last address as 128 bit integers or the offset
+  and length of a hostname,
+* names: the hostnames of the entries, UTF-8 encoded.
+
+Address intervals are not expanded in the file, so that networks take one
+entry. Hosts are expanded lazily while iterating over the mapped file. The
+number of hosts is computed from the entries when the file is loaded, as it
+exceeds 128 bits for ::/0.
+"""
+import json
+import mmap
+import struct
+
+from ssl_certinfo import profiles, targets
+
+MAGIC = b"SSLCPLAN"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<8sIIQ")
+# kind (HOST or the ip version), first and last as high and low 64 bits
+ENTRY = struct.Struct("<B7xQQQQ")
+HOST = 0
+LOW_BITS = 2**64 - 1
+
+
+class PlanError(ValueError):
+    """The file is not a valid plan file."""
+
+
+def padded(size):
+    return -(-size // 8) * 8
+
+
+def pack_entries(plan):
+    """Return the packed entries and hostnames of the TargetPlan plan."""
+    entries = bytearray()
+    names = bytearray()
+    for target in plan.targets:
+        for part in target.parts:
+            if target.version is None:
+                name = part.encode()
+                entries += ENTRY.pack(HOST, 0, len(names), 0, len(name))
+                names += name
+            else:
+                first, last = part
+                entries += ENTRY.pack(
+                    target.version,
+                    first >> 64,
+                    first & LOW_BITS,
+                    last >> 64,
+                    last & LOW_BITS,
+                )
+    return entries, names
+
+
+def write_plan(path, plan, settings):
+    """Write the TargetPlan plan and the JSON serialisable settings to path."""
+    entries, names = pack_entries(plan)
+    data = json.dumps(settings).encode()
+    # Packed before opening path, so that no partial plan file is left behind
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(data), len(entries) // ENTRY.size)
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(data.ljust(padded(HEADER.size + len(data)) - HEADER.size, b" "))
+        f.write(entries)
+        f.write(names)
+
+
+class PlanFile:
+    """Plan file mapped into memory, iterated like a TargetPlan.
+
+    Raises PlanError if the file is not a plan file of this version and
+    OSError if it can not be read.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            try:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise PlanError("empty file")
+        if len(self.map) < HEADER.size:
+            self.close()
+            raise PlanError("not a plan file")
+        magic, version, size, self.entries = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise PlanError("not a plan file of version {}".format(FORMAT_VERSION))
+        start, end = HEADER.size, HEADER.size + size
+        try:
+            self.settings = json.loads(self.map[start:end])
+        except ValueError:
+            self.close()
+            raise PlanError("invalid settings")
+        self.entries_offset = padded(HEADER.size + size)
+        self.names_offset = self.entries_offset + self.entries * ENTRY.size
+        if self.names_offset > len(self.map):
+            self.close()
+            raise PlanError("truncated plan file")
+        self.total = sum(
+            1 if kind == HOST else last - first + 1
+            for kind, first, last in self.intervals()
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.map.close()
+
+    @property
+    def profile(self):
+        """The profiles.Profile stored with the plan."""
+        return profiles.Profile(self.settings["profile"], self.settings["base_dir"])
+
+    def intervals(self):
+        """Yield the (kind, first, last) entries, offset and length for names."""
+        for offset in range(self.entries_offset, self.names_offset, ENTRY.size):
+            kind, first_high, first, last_high, last = ENTRY.unpack_from(
+                self.map, offset
+            )
+            yield kind, first_high << 64 | first, last_high << 64 | last
+
+    def name(self, offset, length):
+        start = self.names_offset + offset
+        end = start + length
+        return self.map[start:end].decode()
+
+    def __iter__(self):
+        """Yield the hosts of the plan, expanding address intervals lazily."""
+        for kind, first, last in self.intervals():
+            if kind == HOST:
+                yield self.name(first, last)
+                continue
+            address = targets.ADDRESS_CLASSES[kind]
+            for value in range(first, last + 1):
+                yield str(address(value))
+
+    def check_limit(self, max_targets):
+        """Raise TargetLimitError if there are more than max_targets hosts."""
+        targets.check_limit(self.total, max_targets)
+
+    def format(self, workers=1, timeout=5):
+        """Return the entries as table with the estimated maximum scan duration."""
+        rows = []
+        for kind, first, last in self.intervals():
+            if kind == HOST:
+                rows.append((self.name(first, last), "host", "1"))
+                continue
+            address = targets.ADDRESS_CLASSES[kind]
+            if first == last:
+                rows.append((str(address(first)), "host", "1"))
+            else:
+                spec = "{} - {}".format(address(first), address(last))
+                rows.append((spec, "range", str(last - first + 1)))
+        return targets.format_plan(rows, self.total, workers, timeout)
@@ -0,0 +1,77 @@
+"""Probe the TLS protocol versions supported by an endpoint."""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from OpenSSL import SSL
+
+from ssl_certinfo import instrumentation, ssl_certinfo
+
+PROTOCOL_VERSIONS = (
+    ("TLSv1", SSL.TLS1_VERSION),
+    ("TLSv1.1", SSL.TLS1_1_VERSION),
+    ("TLSv1.2", SSL.TLS1_2_VERSION),
+    ("TLSv1.3", SSL.TLS1_3_VERSION),
+)
+
+
+def create_version_context(version):
+    """Create an SSL context that only negotiates the protocol version."""
+    context = SSL.Context(SSL.TLS_CLIENT_METHOD)
+    context.set_min_proto_version(version)
+    context.set_max_proto_version(version)
+    # Allow the legacy ciphers of old protocol versions
+    context.set_cipher_list(b"ALL:@SECLEVEL=0")
+    return context
+
+
+class ProtocolProber:
+    """Check which protocol versions an endpoint supports.
+
+    Every version is tried with its own handshake. The handshakes of all
+    endpoints share a pool of workers threads, so probing is bounded by the
+    concurrency of the scan.
+    """
+
+    def __init__(self, workers=1, versions=PROTOCOL_VERSIONS):
+        self.contexts = [
+            (name, create_version_context(version)) for name, version in versions
+        ]
+        self.executor = ThreadPoolExecutor(
+            workers, thread_name_prefix="ssl_certinfo_probe"
+        )
+
+    def supports(self, host, port, timeout, proxy, context):
+        try:
+            ssl_certinfo.get_certificate(host, port, timeout, proxy, context=context)
+        except (OSError, SSL.Error) as err:
+            logging.debug("Handshake with %s:%s failed: %r", host, port, err)
+            return False
+        return True
+
+    def probe(self, host, port, timeout=5, proxy=None):
+        """Return the names of the protocol versions supported by host:port."""
+        futures = [
+            (
+                name,
+                self.executor.submit(
+                    instrumentation.profiled,
+                    self.supports,
+                    host,
+                    port,
+                    timeout,
+                    proxy,
+                    c,
+                ),
+            )
+            for name, c in self.contexts
+        ]
+        return [name for name, future in futures if future.result()]
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
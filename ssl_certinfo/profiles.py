@@ -0,0 +1,206 @@
+"""Scan profiles: the targets and options of a scan in a YAML or TOML file.
+
+Keys are the long command line options with underscores instead of dashes,
+targets are the hosts to scan and groups are target groups as in the
+--tls-config file, their targets are scanned as well, except for "*.domain".
+Relative file names, in exclude_file, ca_file, checkpoint, output and the
+groups, are relative to the directory of the profile. Example::
+
+    targets: [example.com, 192.0.2.0/28]
+    exclude: [192.0.2.1]
+    port: 443
+    workers: 32
+    timeout: 5
+    fields: [CN, SAN, expire_in_days]
+    format: json
+    output: results.json.gz
+    warn_days: 30
+    crit_days: 7
+    groups:
+      - name: internal
+        targets: [10.0.0.0/24]
+        client_cert: client.pem
+"""
+import os
+
+import yaml
+
+from ssl_certinfo import output, targets, tlsconfig
+from ssl_certinfo.ssl_certinfo import OutputFormat
+
+try:
+    import tomllib
+except ImportError:  # pragma: no cover
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# Options given as value, validated by the parser like on the command line
+VALUE_OPTIONS = (
+    "port",
+    "timeout",
+    "workers",
+    "exclude_file",
+    "max_targets",
+    "proxy",
+    "ca_file",
+    "warn_days",
+    "crit_days",
+    "retries",
+    "retry_backoff",
+    "retry_jitter",
+    "checkpoint",
+    "output",
+    "compress",
+    "split_records",
+    "split_size",
+)
+FLAG_OPTIONS = (
+    "verify",
+    "probe_protocols",
+    "raise_fd_limit",
+    "compact",
+)
+# Value options with a fixed set of values, set_defaults skips the choices check
+CHOICE_OPTIONS = {"compress": output.COMPRESSIONS}
+# Value options naming files, relative to the directory of the profile
+PATH_OPTIONS = ("exclude_file", "ca_file", "checkpoint", "output")
+# Options given as list or as comma separated string
+LIST_OPTIONS = ("fields", "retry_on")
+KEYS = (
+    VALUE_OPTIONS
+    + FLAG_OPTIONS
+    + LIST_OPTIONS
+    + (
+        "targets",
+        "exclude",
+        "format",
+        "groups",
+    )
+)
+FORMATS = {outform.name.lower(): outform for outform in OutputFormat}
+
+
+class ProfileError(ValueError):
+    """The scan profile is invalid."""
+
+
+def is_string_list(value):
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
+def check_specs(data, key):
+    specs = data.get(key, [])
+    if not is_string_list(specs):
+        raise ProfileError("{} is not a list of hosts".format(key))
+    for spec in specs:
+        if targets.parse_target(spec) is None:
+            raise ProfileError("not a valid host in {}: {}".format(key, spec))
+    return specs
+
+
+class Profile:
+    """A parsed scan profile.
+
+    defaults holds the options of the profile by argument name, ready for
+    ArgumentParser.set_defaults, so that options given on the command line
+    override the profile. base_dir is the directory of the profile file.
+    Raises ProfileError if the profile is invalid.
+    """
+
+    def __init__(self, data, base_dir="."):
+        if not isinstance(data, dict):
+            raise ProfileError("expected a mapping of options")
+        unknown = sorted(set(data) - set(KEYS))
+        if unknown:
+            raise ProfileError("unknown keys: {}".format(", ".join(unknown)))
+        self.data = data
+        self.base_dir = base_dir
+        self.groups = data.get("groups") or []
+        if not isinstance(self.groups, list) or not all(
+            isinstance(group, dict) for group in self.groups
+        ):
+            raise ProfileError("groups is not a list of mappings")
+        self.defaults = self.parse_options()
+
+    def parse_options(self):
+        data = self.data
+        hosts = list(check_specs(data, "targets"))
+        for group in self.groups:
+            # Group targets are checked by tlsconfig, "*.domain" only selects hosts
+            specs = group.get("targets")
+            if is_string_list(specs):
+                hosts += [spec for spec in specs if not spec.startswith("*.")]
+        defaults = {"host": hosts, "exclude": list(check_specs(data, "exclude"))}
+        for key in VALUE_OPTIONS:
+            if key not in data:
+                continue
+            value = data[key]
+            if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+                raise ProfileError("{} is not a number or string".format(key))
+            if key in CHOICE_OPTIONS and value not in CHOICE_OPTIONS[key]:
+                raise ProfileError(
+                    "{} is not one of {}".format(key, ", ".join(CHOICE_OPTIONS[key]))
+                )
+            # Strings are converted by the type of the argument, see set_defaults
+            defaults[key] = str(value)
+            if key in PATH_OPTIONS:
+                defaults[key] = os.path.join(self.base_dir, defaults[key])
+        for key in FLAG_OPTIONS:
+            if key in data:
+                if not isinstance(data[key], bool):
+                    raise ProfileError("{} is not true or false".format(key))
+                defaults[key] = data[key]
+        for key in LIST_OPTIONS:
+            if key in data:
+                value = data[key]
+                if is_string_list(value):
+                    value = ",".join(value)
+                if not isinstance(value, str):
+                    raise ProfileError("{} is not a list".format(key))
+                defaults[key] = value
+        if "format" in data:
+            if data["format"] not in FORMATS:
+                raise ProfileError("format is not one of {}".format(", ".join(FORMATS)))
+            defaults["outform"] = FORMATS[data["format"]]
+        return defaults
+
+    def tls_config(self, verify=False, ca_file=None):
+        """Return the TLSConfig of the groups, see tlsconfig.parse_config."""
+        return tlsconfig.parse_config(
+            {"groups": self.groups}, self.base_dir, verify, ca_file
+        )
+
+    def resolved(self, exclude):
+        """Return the profile data with exclude as only exclusions.
+
+        Used to store a profile with its exclude file already read, file
+        names in groups stay relative to base_dir.
+        """
+        data = dict(self.data, exclude=list(exclude))
+        data.pop("exclude_file", None)
+        return data
+
+
+def load_profile(path):
+    """Read the Profile from path, TOML if its extension is .toml, else YAML.
+
+    Raises OSError if the file can not be read.
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    if path.endswith(".toml"):
+        if tomllib is None:  # pragma: no cover
+            raise ProfileError("tomli is required for TOML profiles")
+        with open(path, "rb") as f:
+            try:
+                data = tomllib.load(f)
+            except tomllib.TOMLDecodeError as err:
+                raise ProfileError(str(err))
+    else:
+        with open(path) as f:
+            try:
+                data = yaml.safe_load(f)
+            except yaml.YAMLError as err:
+                raise ProfileError(str(err))
+    return Profile(data, base_dir)
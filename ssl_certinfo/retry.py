@@ -0,0 +1,86 @@
+"""Retry failed hosts with jittered backoff without blocking the scan."""
+import collections
+import heapq
+import itertools
+import random
+import time
+
+RETRYABLE_ERRORS = ("timeout", "reset", "resources")
+
+
+class RetryPolicy:
+    """Decide whether and when a failed attempt is retried.
+
+    Attempts failing with an error class in retry_on are retried up to retries
+    times. The n-th retry is delayed by backoff * 2 ** (n - 1) seconds, varied
+    randomly by up to +/- jitter of that delay.
+    """
+
+    def __init__(
+        self, retries=0, backoff=1.0, jitter=0.5, retry_on=RETRYABLE_ERRORS, rand=None
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.jitter = jitter
+        self.retry_on = frozenset(retry_on)
+        self.rand = rand or random.random
+
+    def should_retry(self, record, attempt):
+        return attempt <= self.retries and record.get("error") in self.retry_on
+
+    def delay(self, attempt):
+        """Return the delay in seconds before retry number attempt."""
+        delay = self.backoff * 2 ** (attempt - 1)
+        return max(0.0, delay * (1 + self.jitter * (2 * self.rand() - 1)))
+
+
+class WorkQueue:
+    """FIFO of hosts to scan.
+
+    Retries are kept aside until their backoff has expired and are then added
+    at the tail of the queue, so waiting for a retry never blocks other hosts.
+    """
+
+    def __init__(self, hosts, clock=time.monotonic):
+        self.source = iter(hosts)
+        self.clock = clock
+        self.ready = collections.deque()
+        self.delayed = []
+        self.sequence = itertools.count()
+        self.exhausted = False
+
+    def retry(self, host, attempt, delay):
+        """Queue attempt number attempt of host after delay seconds."""
+        due = self.clock() + delay
+        heapq.heappush(self.delayed, (due, next(self.sequence), host, attempt))
+
+    def _release_due(self):
+        now = self.clock()
+        while self.delayed and self.delayed[0][0] <= now:
+            _, _, host, attempt = heapq.heappop(self.delayed)
+            self.ready.append((host, attempt))
+
+    def _fill(self):
+        if not self.ready and not self.exhausted:
+            try:
+                self.ready.append((next(self.source), 1))
+            except StopIteration:
+                self.exhausted = True
+
+    def get(self):
+        """Return the next (host, attempt) ready to scan or None."""
+        self._release_due()
+        self._fill()
+        if self.ready:
+            return self.ready.popleft()
+        return None
+
+    def wait_time(self):
+        """Return the seconds until the next delayed retry becomes ready."""
+        if not self.delayed:
+            return 0
+        return max(0.0, self.delayed[0][0] - self.clock())
+
+    def empty(self):
+        self._fill()
+        return self.exhausted and not self.ready and not self.delayed
@@ -0,0 +1,151 @@
+"""Library API to scan hosts and iterate over the results."""
+import asyncio
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ssl_certinfo import extractors, instrumentation, limits, ssl_certinfo
+from ssl_certinfo.retry import WorkQueue
+
+
+def scan(
+    targets,
+    port=443,
+    timeout=5,
+    proxy=None,
+    workers=1,
+    retry_policy=None,
+    timings=None,
+    max_results=None,
+    cancel=None,
+    on_result=None,
+    on_error=None,
+    context=None,
+    prober=None,
+    fields=extractors.DEFAULT_FIELDS,
+    tls_config=None,
+):
+    """Scan targets and yield one result record per host as soon as it completes.
+
+    targets is an iterable of hostnames or ip addresses, it is consumed lazily.
+    Up to workers hosts are scanned concurrently. The scan stops after
+    max_results records or when the threading.Event cancel is set. on_result
+    and on_error are called with every successful and failed record before it
+    is yielded. context is an SSL context of ssl_certinfo.create_context shared
+    by all connections, one without verification is created once if it is not
+    given. If prober is a probe.ProtocolProber, the protocol
+    versions supported by every host are probed as well. fields are the
+    certificate fields extracted into the records, see extractors. If
+    tls_config is a tlsconfig.TLSConfig, hosts of its target groups are
+    scanned with the context and server name of their group instead, their
+    records get the name of the group as "target_group". workers is reduced
+    if the sockets of all hosts in flight would exceed the file descriptor
+    limit, further hosts are only started when earlier ones have finished.
+    """
+    workers = limits.fit_workers(workers, limits.sockets_per_host(prober is not None))
+    if context is None:
+        context = ssl_certinfo.create_context()
+    queue = WorkQueue(targets)
+    cancel = cancel or threading.Event()
+    executor = ThreadPoolExecutor(workers, thread_name_prefix="ssl_certinfo_scan")
+    pending = {}
+    count = 0
+
+    try:
+        while not cancel.is_set():
+            while len(pending) < workers:
+                item = queue.get()
+                if item is None:
+                    break
+                host, attempt = item
+                logging.info(
+                    "Trying to fetch certificate for %s (attempt %d)", host, attempt
+                )
+                group = tls_config.lookup(host) if tls_config else None
+                future = executor.submit(
+                    instrumentation.profiled,
+                    ssl_certinfo.fetch_host,
+                    host,
+                    port,
+                    timeout,
+                    proxy,
+                    timings,
+                    context if group is None else group.context,
+                    prober,
+                    fields,
+                    None if group is None else group.server_name,
+                )
+                pending[future] = (host, attempt, group)
+
+            if not pending:
+                if queue.empty():
+                    break
+                cancel.wait(queue.wait_time())
+                continue
+
+            done, _ = wait(
+                pending, timeout=queue.wait_time() or None, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                host, attempt, group = pending.pop(future)
+                record = future.result()
+                if group is not None:
+                    record["target_group"] = group.name
+                if retry_policy is not None:
+                    record["attempts"] = attempt
+                    if retry_policy.should_retry(record, attempt):
+                        queue.retry(host, attempt + 1, retry_policy.delay(attempt))
+                        continue
+
+                callback = on_error if "error" in record else on_result
+                if callback is not None:
+                    callback(record)
+                yield record
+
+                count += 1
+                if max_results is not None and count >= max_results:
+                    return
+    finally:
+        # Hosts still in flight finish in the background, bounded by timeout
+        executor.shutdown(wait=False)
+
+
+async def scan_async(targets, **options):
+    """Asynchronous variant of scan, yielding result records as they complete.
+
+    Takes the same options as scan. Closing the generator or cancelling the
+    consuming task stops the scan.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    cancel = options.pop("cancel", None) or threading.Event()
+    done = object()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop already closed, nobody is waiting for results anymore
+            cancel.set()
+
+    def run():
+        try:
+            for record in scan(targets, cancel=cancel, **options):
+                put(record)
+        except Exception as err:
+            put(err)
+        finally:
+            put(done)
+
+    thread = threading.Thread(target=run, name="ssl_certinfo_scan_async", daemon=True)
+    thread.start()
+    try:
+        while True:
+            record = await queue.get()
+            if record is done:
+                return
+            if isinstance(record, Exception):
+                raise record
+            yield record
+    finally:
+        cancel.set()
@@ -0,0 +1,197 @@
+"""Recheck hosts at intervals derived from their certificate's time to expiry."""
+import functools
+import heapq
+import itertools
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ssl_certinfo import limits, ssl_certinfo
+
+
+def stagger_offsets(count, interval):
+    """Spread count targets evenly over one refresh interval."""
+    if count == 0:
+        return []
+    spacing = interval / count
+    return [i * spacing for i in range(count)]
+
+
+class FixedInterval:
+    """Recheck every target after the same number of seconds."""
+
+    def __init__(self, interval):
+        self.interval = interval
+
+    def __call__(self, state):
+        return self.interval
+
+
+class ExpiryInterval:
+    """Recheck targets more often the closer their certificate is to expiry.
+
+    A successfully checked target is rechecked after seconds_per_day seconds for
+    every day its certificate remains valid, bounded by min_interval and
+    max_interval. Consecutive failures back off exponentially from min_interval.
+    """
+
+    def __init__(self, min_interval=300, max_interval=86400, seconds_per_day=600):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.seconds_per_day = seconds_per_day
+
+    def __call__(self, state):
+        interval = self.max_interval
+        if state["expire_in_days"] is not None:
+            interval = state["expire_in_days"] * self.seconds_per_day
+        if state["failures"]:
+            backoff = self.min_interval * 2 ** (state["failures"] - 1)
+            interval = min(interval, backoff)
+        return max(self.min_interval, min(interval, self.max_interval))
+
+
+class StreamSink:
+    """Write every result record as one line of JSON."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def __call__(self, record):
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+
+class Scheduler:
+    """Priority queue of targets ordered by the time of their next check.
+
+    Every check result is passed to sink, the next check is scheduled after
+    the number of seconds returned by policy for the target's state. Up to
+    workers targets are checked at once.
+    """
+
+    def __init__(
+        self, targets, check, sink, policy, spread=0, clock=time.monotonic, workers=1
+    ):
+        self.check = check
+        self.workers = workers
+        self.sink = sink
+        self.policy = policy
+        self.clock = clock
+        self.queue = []
+        self.state = {}
+        self.sequence = itertools.count()
+
+        now = clock()
+        for target, offset in zip(targets, stagger_offsets(len(targets), spread)):
+            self.state[target] = {"expire_in_days": None, "failures": 0}
+            self.schedule(target, now + offset)
+
+    def schedule(self, target, due):
+        heapq.heappush(self.queue, (due, next(self.sequence), target))
+
+    def next_due(self):
+        return self.queue[0][0] if self.queue else None
+
+    def update_state(self, target, record):
+        state = self.state[target]
+        if "error" in record:
+            state["failures"] += 1
+        else:
+            state["failures"] = 0
+            state["expire_in_days"] = record["expire_in_days"]
+        return state
+
+    def complete(self, target, record):
+        self.sink(record)
+        interval = self.policy(self.update_state(target, record))
+        logging.debug("Next check of %s:%s in %ss", *target, interval)
+        self.schedule(target, self.clock() + interval)
+
+    def run_pending(self):
+        """Check all targets which are due one after another and reschedule them."""
+        while self.queue and self.queue[0][0] <= self.clock():
+            due, _, target = heapq.heappop(self.queue)
+            self.complete(target, self.check(*target))
+
+    def run(self, stop_event):
+        """Run checks as they become due until stop_event is set.
+
+        The checks run in a pool of workers threads, results are passed to
+        sink from the calling thread.
+        """
+        executor = ThreadPoolExecutor(
+            self.workers, thread_name_prefix="ssl_certinfo_check"
+        )
+        running = {}
+        try:
+            while not stop_event.is_set():
+                while (
+                    len(running) < self.workers
+                    and self.queue
+                    and self.queue[0][0] <= self.clock()
+                ):
+                    due, _, target = heapq.heappop(self.queue)
+                    running[executor.submit(self.check, *target)] = target
+                if not running and not self.queue:
+                    stop_event.wait()
+                    return
+
+                delay = None
+                if self.queue and len(running) < self.workers:
+                    delay = max(self.next_due() - self.clock(), 0)
+                if not running:
+                    if stop_event.wait(delay):
+                        return
+                    continue
+                done, _ = wait(running, timeout=delay, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.complete(running.pop(future), future.result())
+        finally:
+            executor.shutdown(wait=False)
+
+
+def run_daemon(
+    hosts,
+    port,
+    timeout=5,
+    proxy=None,
+    policy=None,
+    sink=None,
+    stop_event=None,
+    context=None,
+    workers=1,
+    fields=ssl_certinfo.extractors.DEFAULT_FIELDS,
+    prober=None,
+):
+    """Keep rechecking hosts according to policy and pass all results to sink.
+
+    context is the SSL context of ssl_certinfo.create_context shared by all
+    checks, one without verification is created once if it is not given.
+    Up to workers hosts are checked at once, fields and prober are passed on
+    to ssl_certinfo.fetch_host.
+    """
+    if context is None:
+        context = ssl_certinfo.create_context()
+    scheduler = Scheduler(
+        [(host, port) for host in hosts],
+        functools.partial(
+            ssl_certinfo.fetch_host,
+            timeout=timeout,
+            proxy=proxy,
+            context=context,
+            prober=prober,
+            fields=fields,
+        ),
+        sink or StreamSink(),
+        policy or ExpiryInterval(),
+        workers=limits.fit_workers(
+            workers, limits.sockets_per_host(prober is not None)
+        ),
+    )
+    try:
+        scheduler.run(stop_event or threading.Event())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,140 @@
+"""Serialise results to JSON, YAML and CSV, using accelerated backends if available."""
+import csv
+import io
+import json
+
+import yaml
+
+from ssl_certinfo import table
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+# Wide enough to keep every record on one line, small enough for libyaml's int
+COMPACT_YAML_WIDTH = 2**31 - 1
+
+
+class CompactYamlDumper(YAML_DUMPER):
+    """Dumper writing all collections below the top level in flow style.
+
+    Unlike default_flow_style=None, this keeps records containing lists, such
+    as SAN, on one line.
+    """
+
+    depth = 0
+
+    def represent_data(self, data):
+        self.depth += 1
+        try:
+            node = super().represent_data(data)
+        finally:
+            self.depth -= 1
+        if self.depth and isinstance(node, yaml.CollectionNode):
+            node.flow_style = True
+        return node
+
+
+def json_dumps_compact(value):
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, separators=(",", ":"))
+
+
+def write_json(results, stream, compact=False):
+    """Write results as one JSON object to stream.
+
+    Compact output is written record by record using orjson if it is installed.
+    """
+    if not compact:
+        json.dump(results, stream, indent=4)
+        return
+
+    stream.write("{")
+    separator = ""
+    for peer, certinfo in results.items():
+        stream.write(separator)
+        stream.write(json_dumps_compact(peer))
+        stream.write(":")
+        stream.write(json_dumps_compact(certinfo))
+        separator = ","
+    stream.write("}")
+
+
+def write_yaml(results, stream, compact=False):
+    """Write results as YAML to stream using the libyaml emitter if available.
+
+    Compact output writes every record on a single line.
+    """
+    yaml.dump(
+        results,
+        stream,
+        Dumper=CompactYamlDumper if compact else YAML_DUMPER,
+        default_flow_style=False,
+        width=COMPACT_YAML_WIDTH if compact else 80,
+    )
+
+
+class JsonRecordFormatter:
+    """Format records one at a time as members of a JSON object."""
+
+    def __init__(self, compact=False):
+        self.compact = compact
+
+    def header(self):
+        return "{" if self.compact else "{\n"
+
+    def record(self, peer, certinfo, first):
+        if self.compact:
+            text = "{}:{}".format(
+                json_dumps_compact(peer), json_dumps_compact(certinfo)
+            )
+            return text if first else "," + text
+        # Same layout as json.dump(results, indent=4) without the outer braces
+        text = json.dumps({peer: certinfo}, indent=4)[2:-2]
+        return text if first else ",\n" + text
+
+    def footer(self):
+        return "}\n" if self.compact else "\n}\n"
+
+
+class YamlRecordFormatter:
+    """Format records one at a time as entries of a YAML mapping."""
+
+    def __init__(self, compact=False):
+        self.compact = compact
+
+    def header(self):
+        return ""
+
+    def record(self, peer, certinfo, first):
+        stream = io.StringIO()
+        write_yaml({peer: certinfo}, stream, self.compact)
+        return stream.getvalue()
+
+    def footer(self):
+        return ""
+
+
+class CsvRecordFormatter:
+    """Format records one at a time as CSV rows with a fixed set of columns."""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def line(self, values):
+        stream = io.StringIO()
+        csv.writer(stream, lineterminator="\n").writerow(values)
+        return stream.getvalue()
+
+    def header(self):
+        return self.line(["peer"] + list(self.columns))
+
+    def record(self, peer, certinfo, first):
+        values = [table.format_cell(certinfo.get(column)) for column in self.columns]
+        return self.line([peer] + values)
+
+    def footer(self):
+        return ""
@@ -1,20 +1,35 @@
 """Main module."""
 import enum
-import json
+import errno
+import io
+import itertools
 import logging
+import re
+import sys
 import time
-from datetime import datetime
-from socket import socket
+from socket import gaierror, timeout
 
 import pandas as pd
-import yaml
 from cryptography import x509
-from cryptography.x509.oid import NameOID
 from OpenSSL import SSL
 from OpenSSL.SSL import WantReadError, WantWriteError
-from tabulate import tabulate
 from tqdm import tqdm
 
+from ssl_certinfo import (
+    columnar,
+    connect,
+    extractors,
+    hostmatch,
+    ocsp,
+    scanner,
+    serializers,
+    table,
+    validation,
+)
+from ssl_certinfo.instrumentation import PhaseTracer
+from ssl_certinfo.output import ChunkedRecordWriter
+from ssl_certinfo.probe import PROTOCOL_VERSIONS, ProtocolProber
+
 
 class OutputFormat(enum.Enum):
     TABLE = 1
@@ -22,25 +37,19 @@ class OutputFormat(enum.Enum):
     YAML = 3
     CSV = 4
     RAW = 5
+    PARQUET = 6
+    ARROW = 7
 
 
-def get_cert_info(cert):
-    """Get all information about SSL certificate ."""
-    certinfo = {}
-
-    certinfo["CN"] = cert.subject.get_attributes_for_oid(NameOID.COMMON_NAME)[0].value
-
-    ext = cert.extensions.get_extension_for_class(x509.SubjectAlternativeName)
-    san_list = ext.value.get_values_for_type(x509.DNSName)
-    certinfo["SAN"] = ";".join(san_list)
-
-    certinfo["valid_from"] = cert.not_valid_before.isoformat()
-    certinfo["valid_to"] = cert.not_valid_after.isoformat()
+COLUMNAR_FORMATS = (OutputFormat.PARQUET, OutputFormat.ARROW)
+STREAMED_FORMATS = (OutputFormat.JSON, OutputFormat.YAML)
+# Formats written record by record while the scan is running
+RECORD_FORMATS = STREAMED_FORMATS + (OutputFormat.CSV,)
 
-    delta = cert.not_valid_after - datetime.now()
-    certinfo["expire_in_days"] = delta.days
 
-    return certinfo
+def get_cert_info(cert, fields=extractors.DEFAULT_FIELDS):
+    """Get the selected fields of an SSL certificate, see extractors.FIELDS."""
+    return extractors.extract(cert, fields)
 
 
 def ssl_handshake_helper(sock_ssl):
@@ -55,117 +64,686 @@ def ssl_handshake_helper(sock_ssl):
                 raise TimeoutError
 
 
-def get_certificate(hostname, port, timeout=5, proxy=None):
+class Phase(enum.Enum):
+    RESOLVE = "resolve"
+    CONNECT = "connect"
+    PROXY = "proxy"
+    HANDSHAKE = "handshake"
+    PARSE = "parse"
+    PROBE = "probe"
+
+
+class ProxyError(OSError):
+    """Proxy did not establish a tunnel to the target host."""
+
+
+def store_ocsp_response(conn, data, _):
+    """OCSP client callback saving the stapled response in the details dict."""
+    conn.get_app_data()["ocsp"] = data
+    return True
+
+
+# Short names of the X509 verification errors, by OpenSSL error number
+VERIFY_ERRORS = {
+    2: "unknown_issuer",
+    4: "bad_signature",
+    7: "bad_signature",
+    9: "not_yet_valid",
+    10: "expired",
+    18: "self_signed",
+    19: "self_signed_chain",
+    20: "unknown_issuer",
+    21: "incomplete_chain",
+    23: "revoked",
+    24: "invalid_ca",
+    26: "invalid_purpose",
+    62: "hostname_mismatch",
+}
+
+
+def record_verify_result(conn, cert, errnum, depth, ok):
+    """Verify callback recording errors in the details dict of the connection.
+
+    Always continues the handshake, so that untrusted certificates are still
+    fetched and reported.
+    """
+    details = conn.get_app_data()
+    if details is not None:
+        errors = details.setdefault("verify_errors", [])
+        if not ok:
+            errors.append((errnum, depth))
+    return True
+
+
+def create_context(
+    verify=False,
+    ca_file=None,
+    client_cert=None,
+    client_key=None,
+    ciphers=None,
+    min_version=None,
+):
+    """Create an SSL context that can be shared by all connections of a run.
+
+    If verify is true, certificate chains are verified against ca_file or the
+    default trust store. The trust store is loaded only once, here.
+    client_cert is a PEM file with the client certificate chain presented to
+    servers requesting one, client_key the file of its private key, by default
+    the key is read from client_cert. ciphers is an OpenSSL cipher list and
+    min_version the name of the lowest protocol version offered, e.g.
+    "TLSv1.2". Raises SSL.Error if a file can not be loaded or an option is
+    not supported, ValueError for an unknown protocol version.
+    """
+    context = SSL.Context(SSL.SSLv23_METHOD)
+    context.set_ocsp_client_callback(store_ocsp_response)
+    if verify:
+        if ca_file:
+            context.load_verify_locations(ca_file)
+        else:
+            context.set_default_verify_paths()
+        context.set_verify(SSL.VERIFY_PEER, record_verify_result)
+    if client_cert:
+        context.use_certificate_chain_file(client_cert)
+        context.use_privatekey_file(client_key or client_cert)
+        context.check_privatekey()
+    if ciphers:
+        context.set_cipher_list(ciphers.encode())
+    if min_version:
+        versions = dict(PROTOCOL_VERSIONS)
+        if min_version not in versions:
+            raise ValueError("Unknown protocol version: {}".format(min_version))
+        context.set_min_proto_version(versions[min_version])
+    return context
+
+
+def verify_result(errors):
+    """Return the verification fields of a result record."""
+    if not errors:
+        return {"verify": "ok"}
+    errnum, depth = errors[0]
+    return {
+        "verify": VERIFY_ERRORS.get(errnum, "x509_error_{}".format(errnum)),
+        "verify_depth": depth,
+    }
+
+
+# Application protocols offered in the handshake to report the negotiated one
+ALPN_PROTOCOLS = [b"h2", b"http/1.1"]
+
+
+def connection_info(conn):
+    """Return the negotiated protocol, cipher, key exchange group and ALPN."""
+    info = {
+        "protocol": conn.get_protocol_version_name(),
+        "cipher": conn.get_cipher_name(),
+    }
+    # get_group_name is only available in pyOpenSSL 24.3 and later
+    group = conn.get_group_name() if hasattr(conn, "get_group_name") else None
+    if group:
+        info["group"] = group
+    alpn = conn.get_alpn_proto_negotiated()
+    if alpn:
+        info["alpn"] = alpn.decode(errors="replace")
+    return info
+
+
+def get_certificate(
+    hostname,
+    port,
+    timeout=5,
+    proxy=None,
+    tracer=None,
+    details=None,
+    context=None,
+    server_name=None,
+    request_ocsp=True,
+):
+    """Fetch the certificate of hostname:port.
+
+    If given, tracer is called with the Phase entered at every step. If details
+    is a dict, verification errors of a verifying context are stored in
+    details["verify_errors"] and the negotiated connection parameters in
+    details["tls"]. With request_ocsp, a stapled OCSP response is requested in
+    the handshake and stored in details["ocsp"], the certificates sent by the
+    server in details["chain"] if a response was stapled. context is an SSL
+    context of create_context, a new one without verification is created if
+    it is not given. server_name is sent as SNI instead of hostname.
+    """
     loglocal = logging.getLogger("ssl_certinfo.get_certificate")
     loglocal.debug("Start get_certificate")
-    sock = socket()
-    loglocal.debug("Setting socket timeout to {}".format(timeout))
-    sock.settimeout(timeout)
+    trace = tracer or (lambda phase: None)
+
+    trace(Phase.RESOLVE)
     if proxy:
-        PROXY_ADDR = proxy[1:]
+        addresses = connect.resolve(*proxy[1:])
+    else:
+        addresses = connect.resolve(hostname, port)
+
+    trace(Phase.CONNECT)
+    loglocal.debug("Connecting to %s with timeout %s", addresses, timeout)
+    sock, family = connect.connect(addresses, timeout)
+    try:
+        loglocal.debug("Connected to %s via %s", sock.getpeername(), family)
+        if details is not None:
+            details["family"] = family
+        if proxy:
+            CONNECT = "CONNECT {}:{} HTTP/1.0\r\nConnection: close\r\n\r\n".format(
+                "[{}]".format(hostname) if ":" in hostname else hostname,
+                port,
+            )
+
+            trace(Phase.PROXY)
+            loglocal.debug("Sending %r", CONNECT)
+            sock.send(CONNECT.encode())
+            response = sock.recv(4096)
+            loglocal.debug("Proxy responds %r", response)
+            if not re.match(rb"HTTP/1\.[01] 200", response):
+                raise ProxyError(
+                    "Proxy refused to connect to {}:{}: {}".format(
+                        hostname,
+                        port,
+                        response.split(b"\r\n")[0].decode(errors="replace"),
+                    )
+                )
+
+        trace(Phase.HANDSHAKE)
+        if context is None:
+            loglocal.debug("Create SSL context")
+            context = create_context()
+
+        loglocal.debug("Starting SSL handshake")
+        sock_ssl = SSL.Connection(context, sock)
+        sock_ssl.set_connect_state()
+        if server_name:
+            sock_ssl.set_tlsext_host_name(server_name.encode())
+        elif not validation.is_valid_ip_address(hostname):
+            # RFC 6066 does not allow ip addresses as server name
+            sock_ssl.set_tlsext_host_name(hostname.encode())
+        sock_ssl.set_alpn_protos(ALPN_PROTOCOLS)
+        if details is not None:
+            sock_ssl.set_app_data(details)
+            if request_ocsp:
+                sock_ssl.request_ocsp()
+        ssl_handshake_helper(sock_ssl)
+        loglocal.debug("SSL handshake completed")
+
+        cert = sock_ssl.get_peer_certificate()
+        if details is not None:
+            # The chain is only needed to verify a stapled response
+            if details.get("ocsp"):
+                details["chain"] = [
+                    c.to_cryptography() for c in sock_ssl.get_peer_cert_chain() or []
+                ]
+            details["tls"] = connection_info(sock_ssl)
+        loglocal.debug("Certificate received")
+    finally:
+        # The SSL connection has no file descriptor of its own, closing the
+        # socket releases both, also if connecting or the handshake failed
+        sock.close()
+        loglocal.debug("Sockets closed")
+
+    loglocal.debug("get_certificate completed")
+    return cert.to_cryptography()
+
 
-        CONNECT = "CONNECT {}:{} HTTP/1.0\r\nConnection: close\r\n\r\n".format(
-            hostname,
+ERROR_CLASSES = (
+    "dns",
+    "refused",
+    "timeout",
+    "reset",
+    "unreachable",
+    "proxy",
+    "tls",
+    "resources",
+    "os",
+    "parse",
+)
+
+
+def classify_error(err):
+    """Return a short error class for an exception raised while fetching."""
+    if isinstance(err, ProxyError):
+        return "proxy"
+    if isinstance(err, gaierror):
+        return "dns"
+    if isinstance(err, (timeout, TimeoutError)):
+        return "timeout"
+    if isinstance(err, ConnectionRefusedError):
+        return "refused"
+    if isinstance(err, (ConnectionResetError, ConnectionAbortedError)):
+        return "reset"
+    if isinstance(err, SSL.Error):
+        return "tls"
+    if isinstance(err, OSError) and err.errno in (
+        errno.ENETUNREACH,
+        errno.EHOSTUNREACH,
+    ):
+        return "unreachable"
+    if isinstance(err, OSError) and err.errno in connect.DESCRIPTOR_ERRORS:
+        return "resources"
+    if isinstance(err, OSError):
+        return "os"
+    return "parse"
+
+
+def fetch_host(
+    host,
+    port,
+    timeout=5,
+    proxy=None,
+    timings=None,
+    context=None,
+    prober=None,
+    fields=extractors.DEFAULT_FIELDS,
+    server_name=None,
+):
+    """Fetch and parse the certificate of host:port into a result record.
+
+    Failures are returned as records with the error class, the phase in which
+    the error occurred and the elapsed time instead of raising an exception.
+    If timings is given, the duration of every phase is recorded there. If
+    context verifies certificates, the verification result is added. If prober
+    is a probe.ProtocolProber, the supported protocol versions are added.
+    fields are the names of the certificate fields to extract and of the
+    extractors.CHECKS to run. If server_name
+    is given, it is sent as SNI and matched against the certificate instead
+    of host.
+    """
+    tracer = PhaseTracer(timings)
+    record = {}
+    details = {}
+    start = time.monotonic()
+    try:
+        check_ocsp = "ocsp_status" in fields
+        cert = get_certificate(
+            host,
             port,
+            timeout,
+            proxy,
+            tracer,
+            details,
+            context,
+            server_name,
+            request_ocsp=check_ocsp,
         )
+        tracer(Phase.PARSE)
+        record.update(get_cert_info(cert, fields))
+        if "hostname_match" in fields:
+            record.update(hostmatch.hostname_match(cert, server_name or host))
+        if check_ocsp:
+            record.update(
+                ocsp.certificate_status(
+                    cert, details.get("ocsp"), chain=details.get("chain", ())
+                )
+            )
+        record["family"] = details["family"]
+        record.update(details["tls"])
+        if "verify_errors" in details:
+            record.update(verify_result(details["verify_errors"]))
+        if prober is not None:
+            tracer(Phase.PROBE)
+            record["protocols"] = ";".join(prober.probe(host, port, timeout, proxy))
+    except (OSError, SSL.Error, ValueError, IndexError, x509.ExtensionNotFound) as err:
+        logging.info("Could not fetch certificate for %s: %r", host, err)
+        record["error"] = classify_error(err)
+        record["phase"] = tracer.phase.value
+        record["error_message"] = str(err) or repr(err)
+    finally:
+        tracer.finish()
+    record["peername"] = host
+    record["peerport"] = port
+    record["elapsed"] = round(time.monotonic() - start, 3)
+    return record
+
+
+PEER_COLUMNS = ["peername", "peerport"]
+COLUMNS = extractors.certificate_fields(extractors.DEFAULT_FIELDS) + PEER_COLUMNS
+MATCH_COLUMNS = ["hostname_match", "matched_name"]
+GROUP_COLUMN = "target_group"
+TLS_COLUMNS = ["family", "protocol", "cipher", "group", "alpn"]
+OCSP_COLUMNS = ["ocsp_status", "ocsp_next_update"]
+VERIFY_COLUMNS = ["verify", "verify_depth"]
+ERROR_COLUMNS = ["error", "phase", "elapsed"]
+# Every field a result record can have, in column order
+RECORD_COLUMNS = (
+    list(extractors.FIELDS)
+    + PEER_COLUMNS
+    + [GROUP_COLUMN]
+    + MATCH_COLUMNS
+    + TLS_COLUMNS
+    + ["protocols"]
+    + OCSP_COLUMNS
+    + ["ocsp_revoked_at"]
+    + VERIFY_COLUMNS
+    + ERROR_COLUMNS
+    + ["error_message", "attempts", "alert"]
+)
+
+
+def field_columns(result_dict):
+    """Return the certificate fields found in the records, the defaults if none."""
+    columns = [
+        name
+        for name in extractors.FIELDS
+        if any(name in certinfo for certinfo in result_dict.values())
+    ]
+    return columns or extractors.certificate_fields(extractors.DEFAULT_FIELDS)
+
+
+def result_columns(result_dict):
+    column_names = field_columns(result_dict) + PEER_COLUMNS
+    if any(GROUP_COLUMN in certinfo for certinfo in result_dict.values()):
+        column_names.append(GROUP_COLUMN)
+    if any("hostname_match" in certinfo for certinfo in result_dict.values()):
+        column_names += MATCH_COLUMNS
+    if any("protocol" in certinfo for certinfo in result_dict.values()):
+        column_names += TLS_COLUMNS
+    if any("protocols" in certinfo for certinfo in result_dict.values()):
+        column_names.append("protocols")
+    if any("ocsp_status" in certinfo for certinfo in result_dict.values()):
+        column_names += OCSP_COLUMNS
+    if any("verify" in certinfo for certinfo in result_dict.values()):
+        column_names += VERIFY_COLUMNS
+    if any("error" in certinfo for certinfo in result_dict.values()):
+        column_names += ERROR_COLUMNS
+    if any("attempts" in certinfo for certinfo in result_dict.values()):
+        column_names.append("attempts")
+    if any("alert" in certinfo for certinfo in result_dict.values()):
+        column_names.append("alert")
+    return column_names
 
-        loglocal.debug("Connecting to proxy {}".format(PROXY_ADDR))
-        sock.connect(PROXY_ADDR)
-        loglocal.debug("Connected to proxy")
 
-        loglocal.debug("Sending '{}'".format(CONNECT.encode()))
-        sock.send(CONNECT.encode())
-        response = sock.recv(4096)
-        loglocal.debug("Proxy responds '{}'".format(response))
-    else:
-        TARGET_ADDR = (hostname, port)
-        loglocal.debug("Connecting to target {}".format(TARGET_ADDR))
-        sock.connect(TARGET_ADDR)
-        loglocal.debug("Connected to target")
+def result_to_dataframe(result_dict):
+    # Lists such as SAN are joined into one cell
+    flat = {
+        peer: {key: table.join_list(value) for key, value in certinfo.items()}
+        for peer, certinfo in result_dict.items()
+    }
+    df = pd.DataFrame(flat).T.rename_axis("peer", axis=1)
+    df = df.reindex(columns=result_columns(result_dict))
 
-    loglocal.debug("Create SSL context")
-    context = SSL.Context(SSL.SSLv23_METHOD)
+    return df
 
-    context.check_hostname = False
-    context.verify_mode = SSL.VERIFY_NONE
 
-    loglocal.debug("Starting SSL handshake")
-    sock_ssl = SSL.Connection(context, sock)
-    sock_ssl.set_connect_state()
-    sock_ssl.set_tlsext_host_name(hostname.encode())
-    ssl_handshake_helper(sock_ssl)
-    loglocal.debug("SSL handshake completed")
+def process_hosts(
+    hosts,
+    default_port,
+    timeout=5,
+    outform=OutputFormat.TABLE,
+    proxy=None,
+    timings=None,
+    retry_policy=None,
+    workers=1,
+    layout=None,
+    compact=False,
+    output=None,
+    context=None,
+    probe_protocols=False,
+    checkpoint=None,
+    coordinator=None,
+    thresholds=None,
+    fields=extractors.DEFAULT_FIELDS,
+    tls_config=None,
+):
+    results = {}
+    summary = summarize_results(results)
+
+    # Plans may have more hosts than fit into len(), see TargetPlan.total
+    progbar = tqdm(total=hosts.total if hasattr(hosts, "total") else len(hosts))
+
+    def progress(record):
+        progbar.set_description("Checked {}".format(record["peername"]))
+        progbar.update()
+        update_summary(summary, record)
+
+    prober = ProtocolProber(workers) if probe_protocols else None
+    if checkpoint is not None:
+        checkpoint.open()
+        hosts = checkpoint.remaining(hosts)
+    if coordinator is not None:
+        records = coordinator.scan(hosts, on_result=progress, on_error=progress)
+    else:
+        records = scanner.scan(
+            hosts,
+            default_port,
+            timeout,
+            proxy,
+            workers=workers,
+            retry_policy=retry_policy,
+            timings=timings,
+            on_result=progress,
+            on_error=progress,
+            context=context,
+            prober=prober,
+            fields=fields,
+            tls_config=tls_config,
+        )
+    if checkpoint is not None:
+        records = itertools.chain(
+            replay(checkpoint.completed_records(), progress),
+            checkpoint.track(records),
+        )
+    if thresholds is not None:
+        # Only alerts are kept, all other records are dropped as they arrive
+        records = thresholds.filter(records)
+    # Groups, verification, probing and retries of workers depend on their own
+    # options, so their columns are kept whenever a coordinator is used
+    remote = coordinator is not None
+    columns = extractors.certificate_fields(fields) + PEER_COLUMNS
+    if tls_config or remote:
+        columns.append(GROUP_COLUMN)
+    if "hostname_match" in fields:
+        columns += MATCH_COLUMNS
+    columns += TLS_COLUMNS
+    if prober is not None or remote:
+        columns.append("protocols")
+    if "ocsp_status" in fields:
+        columns += OCSP_COLUMNS
+    if remote or (context is not None and context.get_verify_mode() != SSL.VERIFY_NONE):
+        columns += VERIFY_COLUMNS
+    columns += ERROR_COLUMNS
+    if retry_policy is not None or remote:
+        columns.append("attempts")
+    if thresholds is not None:
+        columns.append("alert")
+
+    writer = output.open() if output is not None else None
+    try:
+        if outform in COLUMNAR_FORMATS:
+            # Stream the records in batches instead of collecting all results
+            sys.stdout.flush()
+            columnar.write_records(
+                records,
+                writer or sys.stdout.buffer,
+                parquet=outform == OutputFormat.PARQUET,
+                timings=timings,
+            )
+            if writer is None:
+                sys.stdout.buffer.flush()
+            progbar.close()
+        elif (
+            outform == OutputFormat.TABLE
+            and layout
+            and (layout.stream or layout.page_size)
+        ):
+            to_row = timed(timings, "format", table.record_to_row)
+            rows = (to_row(r["peername"], r, columns) for r in records)
+            write = tqdm.write if writer is None else write_line(writer)
+            print_table_stream(
+                rows, ["peer"] + columns, layout, timed(timings, "format", write)
+            )
+            progbar.close()
+        elif outform in RECORD_FORMATS:
+            stream = writer or sys.stdout
+            chunks = ChunkedRecordWriter(
+                stream,
+                record_formatter(outform, columns, compact),
+                output.split_records if output is not None else None,
+                output.split_size if output is not None else None,
+            )
+            write = timed(timings, "format", chunks.write)
+            for record in records:
+                write(record["peername"], record)
+            timed(timings, "format", chunks.close)()
+            if not chunks.records:
+                # Same output as print_results without results
+                stream.write("\n")
+            progbar.close()
+        else:
+            for record in records:
+                results[record["peername"]] = record
+            progbar.close()
+
+            if timings is None:
+                print_results(results, outform, layout, compact, writer)
+            else:
+                with timings.time("format"):
+                    print_results(results, outform, layout, compact, writer)
+    finally:
+        if writer is not None:
+            writer.close()
+        if prober is not None:
+            prober.close()
+        if checkpoint is not None:
+            checkpoint.close()
+    log_summary(summary)
+
+
+def replay(records, callback):
+    """Yield records of an earlier run, calling callback with every record."""
+    for record in records:
+        callback(record)
+        yield record
+
+
+def print_results(results, outform, layout=None, compact=False, stream=None):
+    stream = stream or sys.stdout
+    if results and outform in STREAMED_FORMATS:
+        write_results(results, outform, stream, compact)
+    else:
+        stream.write(format_results(results, outform, layout, compact))
+    stream.write("\n")
 
-    cert = sock_ssl.get_peer_certificate()
-    loglocal.debug("Certificate received. Closing socckets")
 
-    sock_ssl.close()
-    sock.close()
-    loglocal.debug("Sockets closed")
+def timed(timings, phase, function):
+    """Return function recording the duration of every call as phase in timings."""
+    if timings is None:
+        return function
 
-    loglocal.debug("get_certificate completed")
-    return cert.to_cryptography()
+    def call(*args):
+        with timings.time(phase):
+            return function(*args)
 
+    return call
 
-def result_to_dataframe(result_dict):
-    column_names = [
-        "CN",
-        "SAN",
-        "valid_from",
-        "valid_to",
-        "expire_in_days",
-        "peername",
-        "peerport",
-    ]
-    df = pd.DataFrame(result_dict).T.rename_axis("peer", axis=1)
-    df = df.reindex(columns=column_names)
 
-    return df
+def write_line(stream):
+    def write(line):
+        stream.write(line + "\n")
 
+    return write
 
-def process_hosts(
-    hosts, default_port, timeout=5, outform=OutputFormat.TABLE, proxy=None
-):
-    results = {}
 
-    progbar = tqdm(hosts)
+def record_formatter(outform, columns, compact=False):
+    """Return a formatter writing records of outform one at a time."""
+    if outform == OutputFormat.JSON:
+        return serializers.JsonRecordFormatter(compact)
+    if outform == OutputFormat.YAML:
+        return serializers.YamlRecordFormatter(compact)
+    if outform == OutputFormat.CSV:
+        return serializers.CsvRecordFormatter(columns)
+    raise ValueError("Output format {} can not be split".format(outform.name))
 
-    for host in progbar:
-        progbar.set_description(f"Checking {host}...")
-        try:
-            logging.info("Trying to fetch certificate for " + host)
-            cert = get_certificate(host, default_port, timeout, proxy)
-        except (OSError, SSL.Error):
-            logging.info("Could not fetch certificate for " + host)
-        else:
-            certinfo = get_cert_info(cert)
-            certinfo["peername"] = host
-            certinfo["peerport"] = default_port
 
-            results[host] = certinfo
-    print(format_results(results, outform))
+def print_table_stream(rows, headers, layout, write):
+    """Print table rows while the scan is running."""
+    if layout.page_size:
+        if layout.max_rows is not None:
+            rows = itertools.islice(rows, layout.max_rows)
+        for page in table.render_pages(rows, headers, layout.page_size):
+            write(page)
+    else:
+        stream = table.TableStream(headers, write, layout.sample_rows, layout.max_rows)
+        for row in rows:
+            stream.add(row)
+        stream.close()
+
+
+def update_summary(summary, certinfo):
+    summary["total"] += 1
+    if "error" in certinfo:
+        summary["failed"] += 1
+        key = "{}/{}".format(certinfo["phase"], certinfo["error"])
+        summary["errors"][key] = summary["errors"].get(key, 0) + 1
+    else:
+        summary["ok"] += 1
+
+
+def summarize_results(results):
+    """Count successful and failed hosts, failures by phase and error class."""
+    summary = {"total": 0, "ok": 0, "failed": 0, "errors": {}}
+    for certinfo in results.values():
+        update_summary(summary, certinfo)
+    return summary
+
+
+def log_summary(summary):
+    message = "Scanned {} hosts: {} ok, {} failed".format(
+        summary["total"], summary["ok"], summary["failed"]
+    )
+    if summary["errors"]:
+        message += " ({})".format(
+            ", ".join(
+                "{}: {}".format(key, count)
+                for key, count in sorted(summary["errors"].items())
+            )
+        )
+        logging.warning(message)
+    else:
+        logging.info(message)
+
 
+def write_results(results, outform, stream, compact=False):
+    """Serialise results directly to stream instead of building a string."""
+    if outform == OutputFormat.JSON:
+        serializers.write_json(results, stream, compact)
+    elif outform == OutputFormat.YAML:
+        serializers.write_yaml(results, stream, compact)
 
-def format_results(results, outform):
+
+def format_results(results, outform, layout=None, compact=False):
     if results == {}:
         return ""
 
     elif outform == OutputFormat.TABLE:
-        df = result_to_dataframe(results)
-        df.index.name = "peer"
-        return tabulate(df, headers="keys", tablefmt="pretty")
-
-    elif outform == OutputFormat.JSON:
-        return json.dumps(results, indent=4)
+        columns = result_columns(results)
+        rows = (
+            table.record_to_row(peer, certinfo, columns)
+            for peer, certinfo in results.items()
+        )
+        return table.render_table(
+            rows, ["peer"] + columns, layout.max_rows if layout else None
+        )
 
-    elif outform == OutputFormat.YAML:
-        return yaml.dump(results)
+    elif outform in STREAMED_FORMATS:
+        stream = io.StringIO()
+        write_results(results, outform, stream, compact)
+        return stream.getvalue()
 
     elif outform == OutputFormat.CSV:
-        df = result_to_dataframe(results)
-        df.index.name = "peer"
-        return df.to_csv()
+        formatter = serializers.CsvRecordFormatter(result_columns(results))
+        lines = [formatter.header()]
+        for peer, certinfo in results.items():
+            lines.append(formatter.record(peer, certinfo, False))
+        return "".join(lines)
 
     elif outform == OutputFormat.RAW:
         df = result_to_dataframe(results)
         return df.to_string()
+
+    elif outform in COLUMNAR_FORMATS:
+        stream = io.BytesIO()
+        columnar.write_records(
+            results.values(), stream, parquet=outform == OutputFormat.PARQUET
+        )
+        return stream.getvalue()
@@ -0,0 +1,179 @@
+"""Render results as text tables without loading them into a DataFrame."""
+import itertools
+
+LIST_SEPARATOR = ";"
+PRESET_WIDTHS = {
+    "peer": 24,
+    "CN": 24,
+    "SAN": 40,
+    "valid_from": 19,
+    "valid_to": 19,
+    "expire_in_days": 14,
+    "fingerprint_sha256": 64,
+    "serial": 32,
+    "issuer": 40,
+    "key_type": 8,
+    "key_size": 8,
+    "signature_algorithm": 23,
+    "peername": 24,
+    "peerport": 8,
+    "target_group": 12,
+    "hostname_match": 14,
+    "matched_name": 24,
+    "protocol": 8,
+    "cipher": 30,
+    "group": 9,
+    "alpn": 8,
+    "protocols": 31,
+    "ocsp_status": 11,
+    "ocsp_next_update": 19,
+    "verify": 14,
+    "verify_depth": 12,
+    "error": 11,
+    "phase": 9,
+    "elapsed": 7,
+    "attempts": 8,
+    "alert": 8,
+}
+
+
+class TableLayout:
+    """Options controlling how a table is rendered.
+
+    max_rows limits the number of rows shown. page_size renders the rows as
+    separate tables of page_size rows, each printed as soon as it is complete.
+    stream prints every row as soon as it arrives, using column widths sampled
+    from the first sample_rows rows or preset widths if sample_rows is 0.
+    """
+
+    def __init__(self, max_rows=None, page_size=None, stream=False, sample_rows=100):
+        self.max_rows = max_rows
+        self.page_size = page_size
+        self.stream = stream
+        self.sample_rows = sample_rows
+
+
+def join_list(value):
+    """Join the items of a list value, such as SAN, for tabular output."""
+    if isinstance(value, list):
+        return LIST_SEPARATOR.join(str(item) for item in value)
+    return value
+
+
+def format_cell(value):
+    value = join_list(value)
+    if value is None or value != value:  # NaN is not equal to itself
+        return ""
+    return str(value)
+
+
+def record_to_row(peer, record, columns):
+    return (str(peer),) + tuple(format_cell(record.get(col)) for col in columns)
+
+
+def separator(widths):
+    return "+" + "+".join("-" * (width + 2) for width in widths) + "+"
+
+
+def format_row(row, widths):
+    cells = []
+    for value, width in zip(row, widths):
+        if len(value) > width:
+            value = value[: width - 1] + "~"
+        left = (width - len(value)) // 2
+        cells.append(" " * left + value.ljust(width - left))
+    return "| " + " | ".join(cells) + " |"
+
+
+def render_table(rows, headers, max_rows=None):
+    """Render rows (tuples of str) as table, computing widths in a single pass."""
+    widths = [len(header) for header in headers]
+    kept = []
+    skipped = 0
+    for row in rows:
+        if max_rows is not None and len(kept) >= max_rows:
+            skipped += 1
+            continue
+        kept.append(row)
+        widths = [max(width, len(value)) for width, value in zip(widths, row)]
+
+    if not kept:
+        return ""
+
+    line = separator(widths)
+    lines = [line, format_row(headers, widths), line]
+    lines.extend(format_row(row, widths) for row in kept)
+    lines.append(line)
+    if skipped:
+        lines.append("... {} more rows not shown".format(skipped))
+    return "\n".join(lines)
+
+
+def render_pages(rows, headers, page_size):
+    """Yield one rendered table for every page_size rows."""
+    rows = iter(rows)
+    while True:
+        page = list(itertools.islice(rows, page_size))
+        if not page:
+            return
+        yield render_table(page, headers)
+
+
+class TableStream:
+    """Print rows with fixed column widths as soon as they arrive.
+
+    If sample_rows is positive, the first sample_rows rows are buffered to
+    compute the column widths, otherwise the preset widths are used. Values
+    longer than their column are truncated.
+    """
+
+    def __init__(self, headers, write, sample_rows=100, max_rows=None):
+        self.headers = headers
+        self.write = write
+        self.sample_rows = sample_rows
+        self.max_rows = max_rows
+        self.sample = []
+        self.widths = None
+        self.count = 0
+        self.skipped = 0
+        if sample_rows <= 0:
+            self.start(
+                [max(len(h), PRESET_WIDTHS.get(h, len(h))) for h in self.headers]
+            )
+
+    def start(self, widths):
+        self.widths = widths
+        self.line = separator(widths)
+        self.write(self.line)
+        self.write(format_row(self.headers, widths))
+        self.write(self.line)
+
+    def add(self, row):
+        if self.max_rows is not None and self.count >= self.max_rows:
+            self.skipped += 1
+            return
+        self.count += 1
+        if self.widths is None:
+            self.sample.append(row)
+            if len(self.sample) >= self.sample_rows:
+                self.flush_sample()
+        else:
+            self.write(format_row(row, self.widths))
+
+    def flush_sample(self):
+        widths = [len(header) for header in self.headers]
+        for row in self.sample:
+            widths = [max(width, len(value)) for width, value in zip(widths, row)]
+        self.start(widths)
+        for row in self.sample:
+            self.write(format_row(row, self.widths))
+        self.sample = []
+
+    def close(self):
+        if self.widths is None:
+            if not self.sample:
+                return
+            self.flush_sample()
+        self.write(self.line)
+        if self.skipped:
+            self.write("... {} more rows not shown".format(self.skipped))
@@ -0,0 +1,282 @@
+"""Plan the targets of a scan: parse, count and lazily expand them."""
+import bisect
+import ipaddress
+import itertools
+import re
+
+from ssl_certinfo import table, validation
+
+DEFAULT_MAX_TARGETS = 2**24
+RANGE_SEPARATOR = re.compile(r" *- *")
+ADDRESS_CLASSES = {4: ipaddress.IPv4Address, 6: ipaddress.IPv6Address}
+
+
+class TargetLimitError(ValueError):
+    """The targets expand to more hosts than allowed."""
+
+
+def merge_intervals(intervals):
+    """Merge overlapping and adjacent (first, last) intervals, sorted by first."""
+    merged = []
+    for first, last in sorted(intervals):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1][1] = last
+        else:
+            merged.append([first, last])
+    return [(first, last) for first, last in merged]
+
+
+class IntervalSet:
+    """Set of integers stored as sorted, disjoint (first, last) intervals.
+
+    Memory is proportional to the number of intervals, lookups take O(log n).
+    """
+
+    def __init__(self, intervals=()):
+        merged = merge_intervals(intervals)
+        self.starts = [first for first, _ in merged]
+        self.ends = [last for _, last in merged]
+
+    def __bool__(self):
+        return bool(self.starts)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __contains__(self, value):
+        i = bisect.bisect_right(self.starts, value) - 1
+        return i >= 0 and self.ends[i] >= value
+
+    def add(self, first, last):
+        # Intervals overlapping or adjacent to first..last are i to j - 1
+        i = bisect.bisect_left(self.ends, first - 1)
+        j = bisect.bisect_right(self.starts, last + 1)
+        if i < j:
+            first = min(first, self.starts[i])
+            last = max(last, self.ends[j - 1])
+        self.starts[i:j] = [first]
+        self.ends[i:j] = [last]
+
+    def subtract(self, first, last):
+        """Yield the (first, last) parts of the interval not in the set."""
+        starts, ends = self.starts, self.ends
+        i = bisect.bisect_left(ends, first)
+        current = first
+        while current <= last:
+            if i >= len(starts) or starts[i] > last:
+                yield current, last
+                return
+            if starts[i] > current:
+                yield current, starts[i] - 1
+            current = max(current, ends[i] + 1)
+            i += 1
+
+
+def canonical_hostname(hostname):
+    return hostname.lower().rstrip(".")
+
+
+class Exclusions:
+    """Hosts excluded from a scan.
+
+    Excluded ip addresses, ranges and networks are compiled into an
+    IntervalSet per ip version, so that addresses are looked up in O(log n)
+    and excluded blocks are skipped without enumerating them. Hostnames are
+    matched exactly, "*.example.com" matches all subdomains of example.com.
+    """
+
+    def __init__(self, specs=()):
+        self.hosts = set()
+        self.suffixes = set()
+        intervals = {4: [], 6: []}
+        for spec in specs:
+            if spec.startswith("*."):
+                self.suffixes.add(canonical_hostname(spec[2:]))
+                continue
+            target = parse_target(spec)
+            if target is None:
+                raise ValueError("Not a valid exclusion: {}".format(spec))
+            if target.version is None:
+                self.hosts.add(target.host)
+            else:
+                intervals[target.version].append((target.first, target.last))
+        self.addresses = {v: IntervalSet(values) for v, values in intervals.items()}
+
+    def __bool__(self):
+        return bool(self.hosts or self.suffixes or any(self.addresses.values()))
+
+    def excludes_host(self, hostname):
+        name = canonical_hostname(hostname)
+        if name in self.hosts:
+            return True
+        labels = name.split(".")
+        return any(".".join(labels[i:]) in self.suffixes for i in range(1, len(labels)))
+
+    def excludes_address(self, version, value):
+        return value in self.addresses[version]
+
+    def matches(self, host):
+        """Return whether host, a hostname or ip address of a plan, is excluded."""
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return self.excludes_host(host)
+        return self.excludes_address(address.version, int(address))
+
+    def subtract(self, version, first, last):
+        """Yield the (first, last) parts of the interval that are not excluded."""
+        return self.addresses[version].subtract(first, last)
+
+
+class Target:
+    """A hostname or an inclusive range of ip addresses given as integers.
+
+    Single ip addresses are ranges of one address. parts holds the hostname or
+    the address intervals that remain to be scanned, after exclusions and
+    duplicates have been removed by TargetPlan.
+    """
+
+    def __init__(self, spec, kind, host=None, version=None, first=None, last=None):
+        self.spec = spec
+        self.kind = kind
+        self.host = host
+        self.version = version
+        self.first = first
+        self.last = last
+        self.parts = [host] if version is None else [(first, last)]
+
+    def count(self):
+        """Return the number of hosts of the target left to scan."""
+        if self.version is None:
+            return len(self.parts)
+        return sum(last - first + 1 for first, last in self.parts)
+
+    def __iter__(self):
+        """Yield the hosts of the target left to scan, lazily."""
+        if self.version is None:
+            yield from self.parts
+            return
+        address = ADDRESS_CLASSES[self.version]
+        for first, last in self.parts:
+            for value in range(first, last + 1):
+                yield str(address(value))
+
+
+def parse_target(spec):
+    """Parse a hostname, ip address, range or network, None if it is invalid.
+
+    Hostnames are lower cased without trailing dot, ip addresses are put into
+    their canonical form when they are expanded.
+    """
+    if validation.is_valid_hostname(spec):
+        return Target(spec, "host", host=canonical_hostname(spec))
+    if validation.is_valid_ip_address(spec):
+        address = ipaddress.ip_address(spec)
+        return Target(spec, "host", None, address.version, int(address), int(address))
+    if validation.is_valid_ip_range(spec):
+        start, end = (ipaddress.ip_address(v) for v in RANGE_SEPARATOR.split(spec))
+        return Target(spec, "range", None, start.version, int(start), int(end))
+    try:
+        net = ipaddress.ip_network(spec, False)
+    except ValueError:
+        return None
+    return Target(
+        spec,
+        "network",
+        None,
+        net.version,
+        int(net.network_address),
+        int(net.broadcast_address),
+    )
+
+
+class TargetPlan:
+    """Targets of a scan, counted up front and expanded lazily on iteration.
+
+    Hosts matching exclusions and hosts already covered by an earlier target
+    are removed from every target, so that no host is scanned twice. Targets
+    keep the order in which they were given.
+    """
+
+    def __init__(self, targets, exclusions=None):
+        self.targets = targets
+        seen_hosts = set()
+        seen = {4: IntervalSet(), 6: IntervalSet()}
+        for target in targets:
+            if target.version is None:
+                keep = target.host not in seen_hosts and not (
+                    exclusions and exclusions.excludes_host(target.host)
+                )
+                seen_hosts.add(target.host)
+                target.parts = [target.host] if keep else []
+                continue
+
+            parts = seen[target.version].subtract(target.first, target.last)
+            if exclusions:
+                parts = [
+                    part
+                    for first, last in parts
+                    for part in exclusions.subtract(target.version, first, last)
+                ]
+            target.parts = list(parts)
+            seen[target.version].add(target.first, target.last)
+
+    @property
+    def total(self):
+        return sum(target.count() for target in self.targets)
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self.targets)
+
+    def check_limit(self, max_targets):
+        """Raise TargetLimitError if there are more than max_targets hosts."""
+        check_limit(self.total, max_targets)
+
+    def format(self, workers=1, timeout=5):
+        """Return the plan as table with the estimated maximum scan duration."""
+        rows = [(t.spec, t.kind, str(t.count())) for t in self.targets]
+        return format_plan(rows, self.total, workers, timeout)
+
+
+def check_limit(total, max_targets):
+    if max_targets and total > max_targets:
+        raise TargetLimitError(
+            "Targets expand to {} hosts, more than the maximum of {}".format(
+                total, max_targets
+            )
+        )
+
+
+def format_plan(rows, total, workers=1, timeout=5):
+    """Return the (target, type, hosts) rows of a plan as table with the total."""
+    # Worst case estimate, every host runs into the timeout
+    seconds = -(-total // workers) * timeout
+    lines = [
+        table.render_table(rows, ["target", "type", "hosts"]),
+        "Total: {} hosts, at most {} with {} workers and {} s timeout".format(
+            total, format_duration(seconds), workers, timeout
+        ),
+    ]
+    return "\n".join(line for line in lines if line)
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    text = "{:02d}:{:02d}:{:02d}".format(hours, minutes, seconds)
+    return "{}d {}".format(days, text) if days else text
+
+
+def plan_targets(specs, max_targets=None, exclude=()):
+    """Return the TargetPlan of specs, computing the counts without expanding.
+
+    Hosts matching the specs in exclude and duplicates are left out. Raises
+    TargetLimitError if the targets add up to more than max_targets. Invalid
+    specs are ignored.
+    """
+    targets = [t for t in (parse_target(spec) for spec in specs) if t is not None]
+    plan = TargetPlan(targets, Exclusions(exclude))
+    plan.check_limit(max_targets)
+    return plan
@@ -0,0 +1,152 @@
+"""TLS options per target group, read from a YAML config file.
+
+Example::
+
+    groups:
+      - name: internal
+        targets: [10.0.0.0/8, "*.corp.example.com"]
+        client_cert: client.pem
+        client_key: client.key
+        ciphers: ECDHE+AESGCM
+        min_version: TLSv1.2
+        server_name: gateway.corp.example.com
+"""
+import os
+
+import yaml
+from OpenSSL import SSL
+
+from ssl_certinfo import ssl_certinfo, targets
+
+GROUP_KEYS = (
+    "name",
+    "targets",
+    "client_cert",
+    "client_key",
+    "ciphers",
+    "min_version",
+    "server_name",
+)
+FILE_KEYS = ("client_cert", "client_key")
+
+
+class ConfigError(ValueError):
+    """The TLS config file is invalid."""
+
+
+class TargetGroup:
+    """Hosts scanned with the same SSL context and server name.
+
+    targets are specs in the syntax of --exclude: hostnames, "*.domain", ip
+    addresses, ranges and networks.
+    """
+
+    def __init__(self, name, specs, context, server_name=None):
+        self.name = name
+        self.targets = targets.Exclusions(specs)
+        self.context = context
+        self.server_name = server_name
+
+    def matches(self, host):
+        return self.targets.matches(host)
+
+
+class TLSConfig:
+    """Target groups, looked up by host. The first matching group wins."""
+
+    def __init__(self, groups=()):
+        self.groups = list(groups)
+
+    def __bool__(self):
+        return bool(self.groups)
+
+    def lookup(self, host):
+        """Return the TargetGroup of host, None if it is in no group."""
+        for group in self.groups:
+            if group.matches(host):
+                return group
+        return None
+
+
+def check_group(entry, index):
+    if not isinstance(entry, dict):
+        raise ConfigError("group {} is not a mapping".format(index + 1))
+    unknown = sorted(set(entry) - set(GROUP_KEYS))
+    if unknown:
+        raise ConfigError(
+            "unknown keys in group {}: {}".format(index + 1, ", ".join(unknown))
+        )
+    name = entry.get("name")
+    if not isinstance(name, str) or not name:
+        raise ConfigError("group {} has no name".format(index + 1))
+    specs = entry.get("targets")
+    if (
+        not isinstance(specs, list)
+        or not specs
+        or not all(isinstance(spec, str) for spec in specs)
+    ):
+        raise ConfigError("group {} needs a list of targets".format(name))
+    for key in GROUP_KEYS[2:]:
+        if not isinstance(entry.get(key, ""), str):
+            raise ConfigError("{} of group {} is not a string".format(key, name))
+    return name
+
+
+def create_group(entry, base_dir, verify=False, ca_file=None):
+    """Return the TargetGroup of a config entry, building its SSL context."""
+    name = entry["name"]
+    files = {
+        key: os.path.join(base_dir, entry[key]) for key in FILE_KEYS if key in entry
+    }
+    try:
+        context = ssl_certinfo.create_context(
+            verify,
+            ca_file,
+            files.get("client_cert"),
+            files.get("client_key"),
+            entry.get("ciphers"),
+            entry.get("min_version"),
+        )
+        return TargetGroup(name, entry["targets"], context, entry.get("server_name"))
+    except SSL.Error as err:
+        raise ConfigError("invalid TLS options of group {}: {}".format(name, err))
+    except ValueError as err:
+        raise ConfigError("group {}: {}".format(name, err))
+
+
+def parse_config(data, base_dir=".", verify=False, ca_file=None):
+    """Return the TLSConfig of the parsed config data.
+
+    The SSL context of every group is created once, here, with the
+    verification settings of the scan. Relative file names are relative to
+    base_dir. Raises ConfigError if the config is invalid.
+    """
+    if not isinstance(data, dict) or set(data) - {"groups"}:
+        raise ConfigError("expected a mapping with the key groups")
+    entries = data.get("groups")
+    if entries is None:
+        entries = []
+    if not isinstance(entries, list):
+        raise ConfigError("groups is not a list")
+    names = set()
+    for index, entry in enumerate(entries):
+        name = check_group(entry, index)
+        if name in names:
+            raise ConfigError("duplicate group {}".format(name))
+        names.add(name)
+    return TLSConfig(
+        create_group(entry, base_dir, verify, ca_file) for entry in entries
+    )
+
+
+def load_config(path, verify=False, ca_file=None):
+    """Read the TLSConfig from the YAML file path, see parse_config.
+
+    Raises OSError if the file can not be read.
+    """
+    with open(path) as f:
+        try:
+            data = yaml.safe_load(f)
+        except yaml.YAMLError as err:
+            raise ConfigError(str(err))
+    return parse_config(data, os.path.dirname(path), verify, ca_file)
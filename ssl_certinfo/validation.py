@@ -19,7 +19,7 @@ def is_valid_ip_network(value):
     except ValueError:
         return False
     else:
-        if net.prefixlen < 32:
+        if net.prefixlen < net.max_prefixlen:
             return True
         else:
             return False
@@ -35,7 +35,7 @@ def is_valid_ip_range(value):
     except ValueError:
         return False
     else:
-        if start_addr < end_addr:
+        if start_addr.version == end_addr.version and start_addr < end_addr:
             return True
         else:
             return False
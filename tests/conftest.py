@@ -0,0 +1,217 @@
+"""Shared fixtures: a local TLS server with its own CA and OCSP stub.
+
+The server lets tests fetch real certificates and stapled OCSP responses
+without network access.
+"""
+import socket
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509 import ocsp
+from cryptography.x509.oid import NameOID
+from OpenSSL import SSL, crypto
+
+
+def make_name(common_name):
+    return x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+
+
+def make_certificate(
+    subject, issuer, key, issuer_key, days=30, san=None, ca=False, usage=None
+):
+    now = datetime.utcnow()
+    builder = (
+        x509.CertificateBuilder()
+        .subject_name(make_name(subject))
+        .issuer_name(make_name(issuer))
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=days))
+        .add_extension(x509.BasicConstraints(ca=ca, path_length=None), critical=True)
+    )
+    if san is not None:
+        builder = builder.add_extension(
+            x509.SubjectAlternativeName([x509.DNSName(name) for name in san]),
+            critical=False,
+        )
+    if usage is not None:
+        builder = builder.add_extension(x509.ExtendedKeyUsage(usage), critical=False)
+    return builder.sign(issuer_key, hashes.SHA256())
+
+
+class CertificateAuthority:
+    """Test CA issuing server certificates and OCSP responses."""
+
+    def __init__(self, name="ssl_certinfo test CA"):
+        self.name = name
+        self.key = ec.generate_private_key(ec.SECP256R1())
+        self.cert = make_certificate(name, name, self.key, self.key, 3650, ca=True)
+
+    def issue(self, common_name, san=None, days=30, usage=None):
+        key = ec.generate_private_key(ec.SECP256R1())
+        cert = make_certificate(
+            common_name,
+            self.name,
+            key,
+            self.key,
+            days,
+            san=san if san is not None else [common_name],
+            usage=usage,
+        )
+        return cert, key
+
+    def pem(self):
+        return self.cert.public_bytes(serialization.Encoding.PEM)
+
+    def write_pem(self, path, cert, key):
+        """Write the certificate and its private key to the PEM file path."""
+        path.write_bytes(
+            cert.public_bytes(serialization.Encoding.PEM)
+            + key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+        return path
+
+    def ocsp_response(
+        self, cert, status=ocsp.OCSPCertStatus.GOOD, next_update=1, responder=None
+    ):
+        """Return a DER encoded OCSP response for cert, next_update in days.
+
+        The response is signed by the CA or by the (cert, key) of responder,
+        which is included in the response.
+        """
+        responder_cert, responder_key = responder or (self.cert, self.key)
+        now = datetime.utcnow()
+        revoked = status == ocsp.OCSPCertStatus.REVOKED
+        builder = (
+            ocsp.OCSPResponseBuilder()
+            .add_response(
+                cert=cert,
+                issuer=self.cert,
+                algorithm=hashes.SHA1(),
+                cert_status=status,
+                this_update=now - timedelta(hours=1),
+                next_update=now + timedelta(days=next_update),
+                revocation_time=now - timedelta(days=2) if revoked else None,
+                revocation_reason=None,
+            )
+            .responder_id(ocsp.OCSPResponderEncoding.HASH, responder_cert)
+        )
+        if responder is not None:
+            builder = builder.certificates([responder_cert])
+        response = builder.sign(responder_key, hashes.SHA256())
+        return response.public_bytes(serialization.Encoding.DER)
+
+
+class TLSServer:
+    """TLS server on localhost serving cert and stapling ocsp if it is set.
+
+    versions limits the protocol versions to a (minimum, maximum) tuple, alpn
+    is the application protocol selected if the client offers it. The server
+    names sent by clients are collected in server_names. If client_ca is
+    given, clients must present a certificate issued by this CA certificate.
+    chain holds further certificates sent after cert.
+    """
+
+    def __init__(
+        self,
+        cert,
+        key,
+        ocsp=b"",
+        versions=None,
+        alpn=None,
+        host="127.0.0.1",
+        client_ca=None,
+        chain=(),
+    ):
+        self.cert = cert
+        self.key = key
+        self.chain = chain
+        self.ocsp = ocsp
+        self.versions = versions
+        self.alpn = alpn
+        self.client_ca = client_ca
+        self.handshakes = 0
+        self.server_names = []
+        self.sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+        self.sock.bind((host, 0))
+        self.sock.listen(16)
+        self.port = self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def context(self):
+        context = SSL.Context(SSL.TLS_SERVER_METHOD)
+        context.use_certificate(crypto.X509.from_cryptography(self.cert))
+        context.use_privatekey(crypto.PKey.from_cryptography_key(self.key))
+        for cert in self.chain:
+            context.add_extra_chain_cert(crypto.X509.from_cryptography(cert))
+        context.set_ocsp_server_callback(lambda conn, data: self.ocsp)
+        # Called during the handshake, also if the client sends no server name
+        context.set_tlsext_servername_callback(
+            lambda conn: self.server_names.append(conn.get_servername())
+        )
+        if self.versions:
+            context.set_min_proto_version(self.versions[0])
+            context.set_max_proto_version(self.versions[1])
+        if self.alpn:
+            context.set_alpn_select_callback(
+                lambda conn, protos: self.alpn if self.alpn in protos else b""
+            )
+        if self.client_ca:
+            context.get_cert_store().add_cert(
+                crypto.X509.from_cryptography(self.client_ca)
+            )
+            context.set_verify(
+                SSL.VERIFY_PEER | SSL.VERIFY_FAIL_IF_NO_PEER_CERT,
+                lambda conn, cert, errnum, depth, ok: ok,
+            )
+        return context
+
+    def run(self):
+        context = self.context()
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(
+                target=self.handle, args=(context, conn), daemon=True
+            ).start()
+
+    def handle(self, context, conn):
+        tls = SSL.Connection(context, conn)
+        tls.set_accept_state()
+        try:
+            tls.do_handshake()
+            self.handshakes += 1
+            tls.shutdown()
+        except (SSL.Error, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def close(self):
+        self.sock.close()
+
+
+@pytest.fixture(scope="session")
+def certificate_authority():
+    return CertificateAuthority()
+
+
+@pytest.fixture
+def tls_server(certificate_authority):
+    """Local TLS server for localhost, stapling a good OCSP response."""
+    cert, key = certificate_authority.issue("localhost")
+    server = TLSServer(cert, key, certificate_authority.ocsp_response(cert))
+    yield server
+    server.close()
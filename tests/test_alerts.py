@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.alerts` module.
+
+Use tox or py.test to run the test suite.
+"""
+import pytest
+
+from ssl_certinfo import alerts
+
+
+def record(host, days=None, error=None):
+    record = {"peername": host, "peerport": 443}
+    if error:
+        record["error"] = error
+    else:
+        record["expire_in_days"] = days
+    return record
+
+
+@pytest.mark.parametrize(
+    "warn,crit,days,expected",
+    [
+        (30, 7, 90, alerts.OK),
+        (30, 7, 30, alerts.WARNING),
+        (30, 7, 8, alerts.WARNING),
+        (30, 7, 7, alerts.CRITICAL),
+        (30, 7, -3, alerts.CRITICAL),
+        (30, None, -3, alerts.WARNING),
+        (None, 7, 20, alerts.OK),
+        (None, 7, 2, alerts.CRITICAL),
+    ],
+)
+def test_status(warn, crit, days, expected):
+    thresholds = alerts.ExpiryThresholds(warn, crit)
+    assert thresholds.status(record("a", days)) == expected
+
+
+def test_status_error():
+    thresholds = alerts.ExpiryThresholds(30, 7)
+    assert thresholds.status(record("a", error="timeout")) == alerts.UNKNOWN
+
+
+@pytest.mark.parametrize(
+    "records,exit_code",
+    [
+        ([], alerts.OK),
+        ([record("a", 90)], alerts.OK),
+        ([record("a", 90), record("b", error="dns")], alerts.UNKNOWN),
+        ([record("a", 20), record("b", error="dns")], alerts.WARNING),
+        ([record("a", 3), record("b", 20), record("c", error="dns")], alerts.CRITICAL),
+    ],
+)
+def test_exit_code(records, exit_code):
+    thresholds = alerts.ExpiryThresholds(30, 7)
+    list(thresholds.filter(records))
+    assert thresholds.exit_code == exit_code
+
+
+def test_filter():
+    thresholds = alerts.ExpiryThresholds(30, 7)
+    records = [
+        record("a", 90),
+        record("b", 20),
+        record("c", 3),
+        record("d", error="dns"),
+    ]
+    alerted = list(thresholds.filter(iter(records)))
+
+    assert [r["peername"] for r in alerted] == ["b", "c", "d"]
+    assert [r["alert"] for r in alerted] == ["warning", "critical", "unknown"]
+    assert thresholds.format_summary() == (
+        "CRITICAL - 1 critical, 1 warning, 1 unknown, 1 ok"
+    )
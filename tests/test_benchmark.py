@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+
+"""Benchmark of the output formats of `ssl_certinfo`.
+
+Run with ``make benchmark`` or set SSL_CERTINFO_BENCHMARK=1 when running
+py.test.
+"""
+import io
+import os
+import timeit
+from datetime import datetime, timedelta
+
+import pytest
+
+from ssl_certinfo import ssl_certinfo
+from ssl_certinfo.ssl_certinfo import OutputFormat
+
+pytestmark = pytest.mark.skipif(
+    "SSL_CERTINFO_BENCHMARK" not in os.environ,
+    reason="Set SSL_CERTINFO_BENCHMARK=1 to run benchmarks",
+)
+
+RECORDS = 20000
+
+
+@pytest.fixture(scope="module")
+def results():
+    start = datetime(2020, 1, 1)
+    results = {}
+    for i in range(RECORDS):
+        host = "host{}.example.org".format(i)
+        results[host] = {
+            "CN": host,
+            "SAN": "{0};www.{0}".format(host),
+            "valid_from": (start + timedelta(hours=i)).isoformat(),
+            "valid_to": (start + timedelta(days=365, hours=i)).isoformat(),
+            "expire_in_days": i % 365,
+            "peername": host,
+            "peerport": 443,
+        }
+    return results
+
+
+@pytest.mark.parametrize(
+    "outform,compact",
+    [
+        (OutputFormat.TABLE, False),
+        (OutputFormat.JSON, False),
+        (OutputFormat.JSON, True),
+        (OutputFormat.YAML, False),
+        (OutputFormat.YAML, True),
+        (OutputFormat.CSV, False),
+    ],
+)
+def test_benchmark_format(results, outform, compact):
+    def run():
+        if outform in ssl_certinfo.STREAMED_FORMATS:
+            ssl_certinfo.write_results(results, outform, io.StringIO(), compact)
+        else:
+            ssl_certinfo.format_results(results, outform)
+
+    seconds = min(timeit.repeat(run, number=1, repeat=3))
+    print(
+        "\n{:<6} compact={!s:<5} {:>8.1f} ms for {} records".format(
+            outform.name, compact, seconds * 1000, RECORDS
+        )
+    )
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.checkpoint` module.
+
+Use tox or py.test to run the test suite.
+"""
+import json
+
+import pytest
+
+from ssl_certinfo import checkpoint, ssl_certinfo
+from ssl_certinfo.ssl_certinfo import OutputFormat
+
+SCAN = {"hosts": ["10.0.0.0/30"], "exclude": [], "port": 443}
+HOSTS = ["10.0.0.0", "10.0.0.1", "10.0.0.2", "10.0.0.3"]
+
+
+def record(host):
+    return {"peername": host, "peerport": 443, "expire_in_days": 3}
+
+
+def run(path, hosts, resume=False, stop=None):
+    """Scan hosts with a checkpoint, stopping after stop records."""
+    with checkpoint.Checkpoint(path, SCAN, resume) as journal:
+        remaining = list(journal.remaining(hosts))
+        completed = list(journal.completed_records())
+        for _ in journal.track(record(h) for h in remaining[:stop]):
+            pass
+    return remaining, completed
+
+
+def test_checkpoint_resume(tmp_path):
+    path = str(tmp_path / "scan.ckpt")
+    remaining, completed = run(path, HOSTS, stop=2)
+    assert (remaining, completed) == (HOSTS, [])
+
+    remaining, completed = run(path, HOSTS, resume=True)
+    assert remaining == HOSTS[2:]
+    assert completed == [record(h) for h in HOSTS[:2]]
+
+    remaining, completed = run(path, HOSTS, resume=True)
+    assert remaining == []
+    assert completed == [record(h) for h in HOSTS]
+
+
+def test_checkpoint_without_resume_starts_over(tmp_path):
+    path = str(tmp_path / "scan.ckpt")
+    run(path, HOSTS)
+    remaining, completed = run(path, HOSTS)
+    assert (remaining, completed) == (HOSTS, [])
+
+
+def test_checkpoint_resume_missing_file(tmp_path):
+    remaining, completed = run(str(tmp_path / "scan.ckpt"), HOSTS, resume=True)
+    assert (remaining, completed) == (HOSTS, [])
+
+
+def test_checkpoint_truncated_line(tmp_path):
+    path = tmp_path / "scan.ckpt"
+    run(str(path), HOSTS, stop=2)
+    line = json.dumps({"index": 2, "record": record(HOSTS[2])})
+    with open(path, "a") as f:
+        f.write(line[:20])
+
+    remaining, completed = run(str(path), HOSTS, resume=True)
+    assert remaining == HOSTS[2:]
+    assert len(completed) == 2
+    # The incomplete line has been replaced by the records of the resumed run
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["index"] for line in lines[1:]] == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize(
+    "content,message",
+    [
+        ("garbage\n", "not a checkpoint file"),
+        (json.dumps({"scan": dict(SCAN, port=8443)}) + "\n", "different scan"),
+    ],
+)
+def test_checkpoint_invalid(tmp_path, content, message):
+    path = tmp_path / "scan.ckpt"
+    path.write_text(content)
+    with pytest.raises(checkpoint.CheckpointError, match=message):
+        checkpoint.Checkpoint(str(path), SCAN, resume=True)
+
+
+def test_process_hosts_resume(monkeypatch, capsys, tmp_path):
+    scanned = []
+
+    def fetch_host(host, port, *args):
+        scanned.append(host)
+        if len(scanned) > 2:
+            raise KeyboardInterrupt
+        return record(host)
+
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", fetch_host)
+    path = str(tmp_path / "scan.ckpt")
+    journal = checkpoint.Checkpoint(path, SCAN)
+    with pytest.raises(KeyboardInterrupt):
+        ssl_certinfo.process_hosts(HOSTS, 443, checkpoint=journal)
+
+    scanned.clear()
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", lambda h, p, *args: record(h))
+    journal = checkpoint.Checkpoint(path, SCAN, resume=True)
+    ssl_certinfo.process_hosts(
+        HOSTS, 443, outform=OutputFormat.JSON, checkpoint=journal
+    )
+
+    out, err = capsys.readouterr()
+    assert list(json.loads(out)) == HOSTS
+    assert scanned == []
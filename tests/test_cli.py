@@ -5,6 +5,7 @@
 Use tox or py.test to run the test suite.
 """
 
+import json
 import os
 import subprocess
 import sys
@@ -12,7 +13,7 @@ from argparse import ArgumentTypeError
 
 import pytest
 
-from ssl_certinfo import __author__, __email__, __version__, cli
+from ssl_certinfo import __author__, __email__, __version__, cli, extractors
 from ssl_certinfo.ssl_certinfo import OutputFormat
 
 
@@ -466,3 +467,556 @@ def test_cli_main_two_targets():
     assert out.decode().find("github") >= 0
     assert out.decode().find("wikipedia") >= 0
     assert (err == b"") or (err.decode().find("100%") >= 0)
+
+
+@pytest.mark.parametrize(
+    "args,expected,comment",
+    [
+        ("github.com".split(), None, "default, no serve mode"),
+        ("github.com --serve 9400".split(), ("127.0.0.1", 9400), "port only"),
+        (
+            "github.com --serve 0.0.0.0:9400".split(),
+            ("0.0.0.0", 9400),
+            "address and port",
+        ),
+        (
+            "github.com --serve localhost:9400".split(),
+            ("localhost", 9400),
+            "hostname and port",
+        ),
+        ("github.com --serve [::1]:9400".split(), ("::1", 9400), "ipv6 address"),
+    ],
+)
+def test_cli_valid_serve(parser, args, expected, comment):
+    args = parser.parse_args(args)
+    assert args.serve == expected
+
+
+@pytest.mark.parametrize(
+    "args,comment",
+    [
+        ("github.com --serve 65536".split(), "invalid port"),
+        ("github.com --serve localhost:x".split(), "port not numeric"),
+        ("github.com --serve host-:9400".split(), "invalid address"),
+    ],
+)
+def test_cli_invalid_serve(parser, args, comment):
+    with pytest.raises(SystemExit):
+        args = parser.parse_args(args)
+
+
+@pytest.mark.parametrize(
+    "args,expected,comment",
+    [
+        ("github.com".split(), (False, None, False), "default"),
+        ("github.com --timings".split(), (True, None, False), "timings"),
+        (
+            "github.com --timings-json t.json".split(),
+            (False, "t.json", False),
+            "timings as json",
+        ),
+        ("github.com --profile".split(), (False, None, True), "profile"),
+    ],
+)
+def test_cli_instrumentation(parser, args, expected, comment):
+    args = parser.parse_args(args)
+    assert (args.timings, args.timings_json, args.profile) == expected
+
+
+@pytest.mark.parametrize(
+    "args,expected,comment",
+    [
+        (
+            "github.com".split(),
+            (0, 1.0, 0.5, ["timeout", "reset", "resources"]),
+            "defaults",
+        ),
+        (
+            "github.com --retries 3 --retry-backoff 0.5 --retry-jitter 0".split(),
+            (3, 0.5, 0.0, ["timeout", "reset", "resources"]),
+            "retries with backoff",
+        ),
+        (
+            "github.com --retries 1 --retry-on timeout,refused,tls".split(),
+            (1, 1.0, 0.5, ["timeout", "refused", "tls"]),
+            "custom error classes",
+        ),
+    ],
+)
+def test_cli_valid_retry(parser, args, expected, comment):
+    args = parser.parse_args(args)
+    assert (
+        args.retries,
+        args.retry_backoff,
+        args.retry_jitter,
+        args.retry_on,
+    ) == expected
+
+
+@pytest.mark.parametrize(
+    "args,comment",
+    [
+        ("github.com --retries -1".split(), "negative retries"),
+        ("github.com --retry-backoff x".split(), "backoff not numeric"),
+        ("github.com --retry-jitter 1.5".split(), "jitter above 1"),
+        ("github.com --retry-on timeout,bogus".split(), "unknown error class"),
+    ],
+)
+def test_cli_invalid_retry(parser, args, comment):
+    with pytest.raises(SystemExit):
+        args = parser.parse_args(args)
+
+
+@pytest.mark.parametrize(
+    "args,expected,comment",
+    [
+        ("github.com --parquet".split(), OutputFormat.PARQUET, "PARQUET"),
+        ("github.com --arrow".split(), OutputFormat.ARROW, "ARROW"),
+    ],
+)
+def test_cli_columnar_outform(parser, args, expected, comment):
+    args = parser.parse_args(args)
+    assert args.outform == expected
+
+
+@pytest.mark.parametrize(
+    "args,expected,comment",
+    [
+        ("github.com".split(), (None, None, False, 100), "defaults"),
+        ("github.com --max-rows 10".split(), (10, None, False, 100), "max rows"),
+        ("github.com --page-size 50".split(), (None, 50, False, 100), "pages"),
+        (
+            "github.com --stream --sample-rows 0".split(),
+            (None, None, True, 0),
+            "stream with preset widths",
+        ),
+    ],
+)
+def test_cli_table_layout(parser, args, expected, comment):
+    args = parser.parse_args(args)
+    assert (args.max_rows, args.page_size, args.stream, args.sample_rows) == expected
+
+
+@pytest.mark.parametrize(
+    "args,expected,comment",
+    [
+        ("github.com".split(), (None, None, None, None), "defaults"),
+        (
+            "github.com -o out.json.gz --split-records 1000".split(),
+            ("out.json.gz", None, 1000, None),
+            "split by records",
+        ),
+        (
+            "github.com --output out.csv --compress zstd --split-size 64M".split(),
+            ("out.csv", "zstd", None, 64 * 1024**2),
+            "split by size",
+        ),
+        (
+            "github.com -o out --split-size 512k".split(),
+            ("out", None, None, 512 * 1024),
+            "lower case size suffix",
+        ),
+    ],
+)
+def test_cli_output(parser, args, expected, comment):
+    args = parser.parse_args(args)
+    assert (args.output, args.compress, args.split_records, args.split_size) == expected
+
+
+@pytest.mark.parametrize(
+    "args,comment",
+    [
+        ("github.com -o out --compress bzip2".split(), "unknown compression"),
+        ("github.com -o out --split-records 0".split(), "zero records"),
+        ("github.com -o out --split-size 10X".split(), "unknown size suffix"),
+        ("github.com -o out --split-size 0".split(), "zero size"),
+    ],
+)
+def test_cli_invalid_output(parser, args, comment):
+    with pytest.raises(SystemExit):
+        args = parser.parse_args(args)
+
+
+@pytest.mark.parametrize(
+    "args,comment",
+    [
+        ("--split-records 10", "split without output"),
+        ("--compress gzip", "compress without output"),
+        ("-o out.txt --split-records 10", "split table output"),
+    ],
+)
+def test_cli_main_invalid_output(args, comment):
+    command = "python -m ssl_certinfo github.com {}".format(args).split(" ")
+    out, err, exitcode = capture(command)
+    assert exitcode == 2
+    assert out == b""
+
+
+@pytest.mark.parametrize(
+    "args,expected,comment",
+    [
+        ("github.com".split(), (False, None), "defaults"),
+        ("github.com --verify".split(), (True, None), "default trust store"),
+        ("github.com --ca-file ca.pem".split(), (False, "ca.pem"), "CA file"),
+    ],
+)
+def test_cli_verify(parser, args, expected, comment):
+    args = parser.parse_args(args)
+    assert (args.verify, args.ca_file) == expected
+
+
+def test_cli_main_invalid_ca_file(tmp_path):
+    command = "python -m ssl_certinfo github.com --ca-file {}".format(
+        tmp_path / "missing.pem"
+    )
+    out, err, exitcode = capture(command.split(" "))
+    assert exitcode == 2
+    assert err.decode().find("could not load CA file") >= 0
+
+
+@pytest.mark.parametrize(
+    "args,expected,comment",
+    [
+        ("github.com".split(), False, "default"),
+        ("github.com --probe-protocols".split(), True, "probe"),
+    ],
+)
+def test_cli_probe_protocols(parser, args, expected, comment):
+    args = parser.parse_args(args)
+    assert args.probe_protocols == expected
+
+
+@pytest.mark.parametrize(
+    "args,expected,comment",
+    [
+        ("github.com".split(), (2**24, False), "defaults"),
+        ("github.com --max-targets 0 -n".split(), (0, True), "no limit"),
+        ("github.com --max-targets 100 --dry-run".split(), (100, True), "dry run"),
+    ],
+)
+def test_cli_target_limits(parser, args, expected, comment):
+    args = parser.parse_args(args)
+    assert (args.max_targets, args.dry_run) == expected
+
+
+def test_cli_main_dry_run():
+    command = "python -m ssl_certinfo --dry-run -w 4 github.com 10.0.0.0/16".split()
+    out, err, exitcode = capture(command)
+    assert exitcode == 0
+    assert out.decode().find("65537 hosts") >= 0
+
+
+def test_cli_main_max_targets():
+    command = "python -m ssl_certinfo --max-targets 1000 10.0.0.0/16".split()
+    out, err, exitcode = capture(command)
+    assert exitcode == 2
+    assert err.decode().find("65536 hosts, more than the maximum of 1000") >= 0
+
+
+@pytest.mark.parametrize(
+    "args,expected,comment",
+    [
+        ("10.0.0.0/24".split(), [], "no exclusions"),
+        (
+            "10.0.0.0/24 -e 10.0.0.1 --exclude *.example.com".split(),
+            ["10.0.0.1", "*.example.com"],
+            "address and wildcard",
+        ),
+        (
+            ["10.0.0.0/24", "-e", "10.0.0.10 - 10.0.0.20", "-e", "10.0.0.64/26"],
+            ["10.0.0.10 - 10.0.0.20", "10.0.0.64/26"],
+            "range and network",
+        ),
+    ],
+)
+def test_cli_exclude(parser, args, expected, comment):
+    args = parser.parse_args(args)
+    assert args.exclude == expected
+
+
+@pytest.mark.parametrize(
+    "args,comment",
+    [
+        ("10.0.0.0/24 -e *".split(), "bare wildcard"),
+        ("10.0.0.0/24 -e a.*.example.com".split(), "wildcard in the middle"),
+        ("10.0.0.0/24 -e 10.0.0.5-10.0.0.1".split(), "reversed range"),
+    ],
+)
+def test_cli_invalid_exclude(parser, args, comment):
+    with pytest.raises(SystemExit):
+        args = parser.parse_args(args)
+
+
+def test_read_exclude_file(tmp_path):
+    path = tmp_path / "exclude.txt"
+    path.write_text("# partners\n10.0.0.0/25\n*.honeypot.example  # traps\n\n")
+    assert cli.read_exclude_file(str(path)) == ["10.0.0.0/25", "*.honeypot.example"]
+
+
+def test_read_exclude_file_invalid(tmp_path):
+    path = tmp_path / "exclude.txt"
+    path.write_text("10.0.0.1\nnot valid\n")
+    with pytest.raises(ValueError, match=":2:"):
+        cli.read_exclude_file(str(path))
+
+
+def test_cli_main_dry_run_exclude(tmp_path):
+    path = tmp_path / "exclude.txt"
+    path.write_text("10.0.0.0/25\n")
+    command = "python -m ssl_certinfo -n 10.0.0.0/24 -e 10.0.0.255 --exclude-file {}"
+    out, err, exitcode = capture(command.format(path).split())
+    assert exitcode == 0
+    assert out.decode().find("Total: 127 hosts") >= 0
+
+
+def test_cli_resume_requires_checkpoint():
+    command = "python -m ssl_certinfo --resume 10.0.0.0/30".split()
+    out, err, exitcode = capture(command)
+    assert exitcode == 2
+    assert err.decode().find("--resume requires --checkpoint") >= 0
+
+
+def test_cli_resume_different_scan(tmp_path):
+    path = tmp_path / "scan.ckpt"
+    path.write_text(
+        '{"scan": {"hosts": ["10.0.0.0/24"], "exclude": [], "port": 443}}\n'
+    )
+    command = "python -m ssl_certinfo --checkpoint {} --resume 10.0.0.0/30"
+    out, err, exitcode = capture(command.format(path).split())
+    assert exitcode == 2
+    assert err.decode().find("different scan") >= 0
+
+
+@pytest.mark.parametrize(
+    "args,expected,comment",
+    [
+        ("--worker 9500".split(), ("127.0.0.1", 9500), "port only"),
+        ("--worker 10.0.0.1:9500".split(), ("10.0.0.1", 9500), "tcp address"),
+        ("--worker unix:/run/scan.sock".split(), "/run/scan.sock", "unix socket"),
+    ],
+)
+def test_cli_worker_address(parser, args, expected, comment):
+    assert parser.parse_args(args).worker == expected
+
+
+@pytest.mark.parametrize(
+    "args,comment",
+    [
+        ("--worker unix:".split(), "empty path"),
+        ("--coordinator host-:9500 github.com".split(), "invalid host"),
+        ("--coordinator 9500 --serve 9400 github.com".split(), "two run modes"),
+    ],
+)
+def test_cli_invalid_node_address(parser, args, comment):
+    with pytest.raises(SystemExit):
+        parser.parse_args(args)
+
+
+@pytest.mark.parametrize(
+    "args,expected,comment",
+    [
+        ("github.com".split(), (None, None), "no thresholds"),
+        ("github.com --warn-days 30".split(), (30, None), "warning only"),
+        ("github.com --warn-days 30 --crit-days 7".split(), (30, 7), "both"),
+    ],
+)
+def test_cli_thresholds(parser, args, expected, comment):
+    args = parser.parse_args(args)
+    assert (args.warn_days, args.crit_days) == expected
+
+
+@pytest.mark.parametrize(
+    "command,message",
+    [
+        ("--warn-days 7 --crit-days 30 github.com", "must not be less than"),
+        ("--warn-days 7 --serve 9400 github.com", "can not be used with"),
+    ],
+)
+def test_cli_invalid_thresholds(command, message):
+    out, err, exitcode = capture(["python", "-m", "ssl_certinfo"] + command.split())
+    assert exitcode == 2
+    assert err.decode().find(message) >= 0
+
+
+@pytest.mark.parametrize(
+    "command,message",
+    [
+        ("--retries 2 --serve 9400 github.com", "--retries can not be used"),
+        ("--retries 2 --daemon github.com", "--retries can not be used"),
+        ("--fields issuer --daemon github.com", "require the expire_in_days"),
+        ("--fields all --serve 9400 github.com", "can not be used with --serve"),
+        ("--probe-protocols --serve 9400 github.com", "can not be used with --serve"),
+    ],
+)
+def test_cli_invalid_schedule_options(command, message):
+    out, err, exitcode = capture(["python", "-m", "ssl_certinfo"] + command.split())
+    assert exitcode == 2
+    assert err.decode().find(message) >= 0
+
+
+@pytest.mark.parametrize(
+    "args,exitcode,alerted",
+    [
+        (["--warn-days", "7"], 0, False),
+        (["--warn-days", "60"], 1, True),
+        (["--warn-days", "60", "--crit-days", "45"], 2, True),
+    ],
+)
+def test_cli_main_thresholds(tls_server, args, exitcode, alerted):
+    command = "python -m ssl_certinfo --json -p {} localhost".format(tls_server.port)
+    out, err, code = capture(command.split() + args)
+    assert code == exitcode
+    assert ("localhost" in json.loads(out.strip() or "{}")) == alerted
+    assert (
+        err.decode()
+        .splitlines()[-1]
+        .startswith(("OK", "WARNING", "CRITICAL")[exitcode])
+    )
+
+
+@pytest.mark.parametrize(
+    "args,expected,comment",
+    [
+        ("github.com".split(), list(extractors.DEFAULT_FIELDS), "default fields"),
+        ("github.com --fields serial,CN".split(), ["CN", "serial"], "column order"),
+        (
+            "github.com --fields default,fingerprint_sha256".split(),
+            ["CN", "SAN", "valid_from", "valid_to", "expire_in_days"]
+            + ["fingerprint_sha256", "hostname_match", "ocsp_status"],
+            "defaults and more",
+        ),
+        (
+            "github.com --fields all".split(),
+            list(extractors.FIELDS) + list(extractors.CHECKS),
+            "all fields",
+        ),
+        (
+            "github.com --fields CN,hostname_match".split(),
+            ["CN", "hostname_match"],
+            "certificate fields and checks",
+        ),
+    ],
+)
+def test_cli_fields(parser, args, expected, comment):
+    assert parser.parse_args(args).fields == expected
+
+
+def test_cli_invalid_fields(parser):
+    with pytest.raises(SystemExit):
+        parser.parse_args("github.com --fields CN,bogus".split())
+
+
+def test_cli_thresholds_require_expire_in_days():
+    command = "python -m ssl_certinfo --warn-days 7 --fields CN github.com".split()
+    out, err, exitcode = capture(command)
+    assert exitcode == 2
+    assert err.decode().find("require the expire_in_days field") >= 0
+
+
+@pytest.mark.parametrize(
+    "config,args,message",
+    [
+        (None, [], "invalid TLS config"),
+        ("groups: [{name: a}]", [], "needs a list of targets"),
+        ("groups: []", ["--serve", "9400"], "can not be used with"),
+    ],
+)
+def test_cli_invalid_tls_config(tmp_path, config, args, message):
+    path = tmp_path / "tls.yaml"
+    if config is not None:
+        path.write_text(config)
+    command = ["python", "-m", "ssl_certinfo", "--tls-config", str(path)]
+    out, err, exitcode = capture(command + args + ["github.com"])
+    assert exitcode == 2
+    assert err.decode().find(message) >= 0
+
+
+def test_cli_main_tls_config(tmp_path, tls_server):
+    path = tmp_path / "tls.yaml"
+    path.write_text("groups: [{name: local, targets: [localhost], ciphers: ALL}]")
+    command = "python -m ssl_certinfo --json --tls-config {} -p {} localhost".format(
+        path, tls_server.port
+    )
+    out, err, exitcode = capture(command.split())
+    assert exitcode == 0
+    assert json.loads(out)["localhost"]["target_group"] == "local"
+
+
+def test_cli_main_scan_profile(tmp_path, tls_server):
+    path = tmp_path / "scan.yaml"
+    path.write_text(
+        "targets: [localhost]\nport: {}\nformat: json\nfields: [CN, serial]\n"
+        "groups: [{{name: local, targets: [localhost]}}]\n".format(tls_server.port)
+    )
+    command = ["python", "-m", "ssl_certinfo", "--scan-profile", str(path)]
+    out, err, exitcode = capture(command)
+    assert exitcode == 0
+    record = json.loads(out)["localhost"]
+    assert record["CN"] == "localhost"
+    assert "serial" in record
+    assert record["target_group"] == "local"
+
+
+def test_cli_main_write_and_scan_plan(tmp_path, tls_server):
+    profile = tmp_path / "scan.toml"
+    profile.write_text(
+        'targets = ["localhost", "127.0.0.1", "127.0.0.2"]\n'
+        'exclude = ["127.0.0.2"]\nport = {}\n'.format(tls_server.port)
+    )
+    plan = tmp_path / "scan.plan"
+    command = ["python", "-m", "ssl_certinfo", "--scan-profile", str(profile)]
+    out, err, exitcode = capture(command + ["--write-plan", str(plan)])
+    assert exitcode == 0
+    assert out.decode().find("Total: 2 hosts") >= 0
+    # The plan does not depend on the profile anymore
+    profile.unlink()
+
+    command = "python -m ssl_certinfo --json --plan {}".format(plan)
+    out, err, exitcode = capture(command.split())
+    assert exitcode == 0
+    assert sorted(json.loads(out)) == ["127.0.0.1", "localhost"]
+
+
+@pytest.mark.parametrize(
+    "profile,args,message",
+    [
+        (None, [], "invalid scan profile"),
+        ("port: [1]", [], "port is not a number"),
+        ("port: 70000", [], "invalid port number"),
+        ("targets: [localhost]", ["--write-plan", "/"], "could not write plan"),
+        ("groups: [{name: a}]", [], "needs a list of targets"),
+        ("groups: [{name: a, targets: [a.com]}]", ["--serve", "9400"], "can not"),
+    ],
+)
+def test_cli_invalid_scan_profile(tmp_path, profile, args, message):
+    path = tmp_path / "scan.yaml"
+    if profile is not None:
+        path.write_text(profile)
+    command = ["python", "-m", "ssl_certinfo", "--scan-profile", str(path)]
+    out, err, exitcode = capture(command + args)
+    assert exitcode == 2
+    assert err.decode().find(message) >= 0
+
+
+@pytest.mark.parametrize(
+    "args,message",
+    [
+        (["--write-plan", "x.plan", "github.com"], "requires --scan-profile"),
+        (["--plan", "missing.plan"], "invalid plan"),
+        (["--plan", "x.plan", "github.com"], "can not be used with hosts"),
+        (["--plan", "x.plan", "--scan-profile", "x.yaml"], "not allowed with"),
+    ],
+)
+def test_cli_invalid_plan(args, message):
+    out, err, exitcode = capture(["python", "-m", "ssl_certinfo"] + args)
+    assert exitcode == 2
+    assert err.decode().find(message) >= 0
+
+
+def test_cli_main_profile_worker_threads(tls_server):
+    command = "python -m ssl_certinfo --json --profile -w 2 -p {} localhost".format(
+        tls_server.port
+    )
+    out, err, exitcode = capture(command.split())
+    assert exitcode == 0
+    assert err.decode().find("fetch_host") >= 0
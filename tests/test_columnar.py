@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.columnar` module.
+
+Use tox or py.test to run the test suite.
+"""
+import io
+from datetime import datetime
+
+import pytest
+
+from ssl_certinfo import columnar, extractors, ssl_certinfo
+from ssl_certinfo.ssl_certinfo import OutputFormat
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+@pytest.fixture
+def records():
+    return [
+        {
+            "CN": "github.com",
+            "SAN": ["github.com", "www.github.com"],
+            "valid_from": "2018-05-08T00:00:00",
+            "valid_to": "2020-06-03T12:00:00",
+            "expire_in_days": -100,
+            "peername": "github.com",
+            "peerport": 443,
+            "elapsed": 0.25,
+        },
+        {
+            "error": "refused",
+            "phase": "connect",
+            "error_message": "[Errno 111] Connection refused",
+            "peername": "localhost",
+            "peerport": 2,
+            "elapsed": 0.001,
+        },
+    ]
+
+
+def read_table(data, parquet):
+    if parquet:
+        return pq.read_table(io.BytesIO(data))
+    return pa.ipc.open_file(io.BytesIO(data)).read_all()
+
+
+@pytest.mark.parametrize("parquet", [True, False])
+def test_write_records_types(records, parquet):
+    stream = io.BytesIO()
+    assert columnar.write_records(records, stream, parquet) == 2
+
+    table = read_table(stream.getvalue(), parquet)
+    assert pa.types.is_timestamp(table.schema.field("valid_to").type)
+    assert pa.types.is_integer(table.schema.field("expire_in_days").type)
+    assert pa.types.is_integer(table.schema.field("peerport").type)
+    assert pa.types.is_list(table.schema.field("SAN").type)
+
+    rows = table.to_pylist()
+    assert rows[0]["valid_to"] == datetime(2020, 6, 3, 12, 0, 0)
+    assert rows[0]["expire_in_days"] == -100
+    assert rows[0]["SAN"] == ["github.com", "www.github.com"]
+    assert rows[1]["error"] == "refused"
+    assert rows[1]["expire_in_days"] is None
+
+
+@pytest.mark.parametrize("parquet", [True, False])
+def test_write_records_in_batches(records, parquet):
+    stream = io.BytesIO()
+    assert columnar.write_records(records * 5, stream, parquet, batch_size=3) == 10
+
+    table = read_table(stream.getvalue(), parquet)
+    assert table.num_rows == 10
+    if parquet:
+        metadata = pq.ParquetFile(io.BytesIO(stream.getvalue())).metadata
+        assert metadata.num_row_groups == 4
+    else:
+        reader = pa.ipc.open_file(io.BytesIO(stream.getvalue()))
+        assert reader.num_record_batches == 4
+
+
+def test_schema_has_all_record_fields(tls_server, certificate_authority, tmp_path):
+    ca_file = tmp_path / "ca.pem"
+    ca_file.write_bytes(certificate_authority.pem())
+    context = ssl_certinfo.create_context(True, str(ca_file))
+    record = ssl_certinfo.fetch_host(
+        "localhost", tls_server.port, context=context, fields=list(extractors.FIELDS)
+    )
+    record.update(attempts=1, alert="warning", target_group="local")
+
+    stream = io.BytesIO()
+    columnar.write_records([record], stream)
+
+    row = read_table(stream.getvalue(), True).to_pylist()[0]
+    assert set(record) <= set(row)
+    assert row["family"] == "ipv4"
+    assert row["target_group"] == "local"
+
+
+def test_columnar_writer_holds_one_batch(records):
+    writer = columnar.ColumnarWriter(io.BytesIO(), batch_size=2)
+    for record in records * 3:
+        writer.write(record)
+        assert len(writer.batch) < 2
+    writer.close()
+
+
+@pytest.mark.parametrize(
+    "outform,parquet",
+    [(OutputFormat.PARQUET, True), (OutputFormat.ARROW, False)],
+)
+def test_format_results_columnar(records, outform, parquet):
+    results = {record["peername"]: record for record in records}
+    data = ssl_certinfo.format_results(results, outform)
+
+    table = read_table(data, parquet)
+    assert table.column("peername").to_pylist() == ["github.com", "localhost"]
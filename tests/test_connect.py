@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.connect` module.
+
+Use tox or py.test to run the test suite.
+"""
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from ssl_certinfo import connect, limits, ssl_certinfo
+from tests import conftest
+
+V4 = socket.AF_INET
+V6 = socket.AF_INET6
+
+
+def listening_socket(family=V4):
+    sock = socket.socket(family)
+    sock.bind(("::1" if family == V6 else "127.0.0.1", 0))
+    sock.listen()
+    return sock
+
+
+def closed_port(family=V4):
+    sock = listening_socket(family)
+    address = sock.getsockname()
+    sock.close()
+    return address
+
+
+def addrinfo(family, address):
+    return (family, socket.SOCK_STREAM, 6, "", address)
+
+
+@pytest.mark.parametrize(
+    "families,expected",
+    [
+        ([V6, V6, V4, V4], [V6, V4, V6, V4]),
+        ([V4, V6, V6, V6], [V4, V6, V6, V6]),
+        ([V4, V4], [V4, V4]),
+        ([], []),
+    ],
+)
+def test_resolve_interleaves_families(monkeypatch, families, expected):
+    infos = [
+        addrinfo(family, ("addr{}".format(i), 443)) for i, family in enumerate(families)
+    ]
+    monkeypatch.setattr(socket, "getaddrinfo", lambda *args: infos)
+    assert [family for family, _ in connect.resolve("example.com", 443)] == expected
+
+
+def test_connect_first_address():
+    server = listening_socket()
+    sock, family = connect.connect([(V4, server.getsockname())], 1)
+    with sock, server:
+        assert family == "ipv4"
+        assert sock.getpeername() == server.getsockname()
+        assert sock.gettimeout() == 1
+
+
+def test_connect_falls_back_after_failure():
+    server = listening_socket(V4)
+    addresses = [(V6, closed_port(V6)), (V4, server.getsockname())]
+    start = time.monotonic()
+    sock, family = connect.connect(addresses, 5, delay=2)
+    with sock, server:
+        assert family == "ipv4"
+        # The refused attempt must not delay the next one by the attempt delay
+        assert time.monotonic() - start < 1
+
+
+def test_connect_races_slow_attempt():
+    # With a full accept queue, further connection attempts are never answered
+    blackhole = socket.socket()
+    blackhole.bind(("127.0.0.1", 0))
+    blackhole.listen(0)
+    filler = socket.create_connection(blackhole.getsockname())
+    server = listening_socket(V6)
+
+    start = time.monotonic()
+    sock, family = connect.connect(
+        [(V4, blackhole.getsockname()), (V6, server.getsockname())], 5, delay=0.1
+    )
+    with sock, server, blackhole, filler:
+        assert family == "ipv6"
+        assert sock.getpeername()[:2] == server.getsockname()[:2]
+        assert 0.1 <= time.monotonic() - start < 1
+
+
+def test_connect_all_refused():
+    with pytest.raises(ConnectionRefusedError):
+        connect.connect([(V6, closed_port(V6)), (V4, closed_port(V4))], 1)
+
+
+def test_connect_no_addresses():
+    with pytest.raises(OSError):
+        connect.connect([], 1)
+
+
+def test_fetch_host_ipv6_literal(certificate_authority):
+    cert, key = certificate_authority.issue("localhost")
+    server = conftest.TLSServer(cert, key, host="::1")
+    try:
+        record = ssl_certinfo.fetch_host("::1", server.port)
+    finally:
+        server.close()
+
+    assert record["CN"] == "localhost"
+    assert record["family"] == "ipv6"
+    assert record["peername"] == "::1"
+    # No server name indication for ip addresses
+    assert server.server_names == [None]
+
+
+def test_fetch_host_localhost_dual_stack(tls_server):
+    record = ssl_certinfo.fetch_host("localhost", tls_server.port)
+
+    assert record["family"] == "ipv4"
+    assert tls_server.server_names == [b"localhost"]
+
+
+def test_proxy_connect_ipv6_literal():
+    proxy = listening_socket()
+    requests = []
+
+    def serve():
+        conn, _ = proxy.accept()
+        with conn:
+            requests.append(conn.recv(4096))
+            conn.sendall(b"HTTP/1.0 403 Forbidden\r\n\r\n")
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    record = ssl_certinfo.fetch_host(
+        "2001:db8::1", 443, 2, ("http", "127.0.0.1", proxy.getsockname()[1])
+    )
+    thread.join()
+    proxy.close()
+
+    assert record["error"] == "proxy"
+    assert requests[0].startswith(b"CONNECT [2001:db8::1]:443 HTTP/1.0\r\n")
+
+
+def out_of_descriptors(monkeypatch, failures):
+    """Let the first failures sockets created by connect fail with EMFILE."""
+    create = socket.socket
+    calls = []
+
+    def fake_socket(*args):
+        calls.append(args)
+        if len(calls) <= failures:
+            raise OSError(connect.errno.EMFILE, "Too many open files")
+        return create(*args)
+
+    monkeypatch.setattr(connect.socket, "socket", fake_socket)
+    return calls
+
+
+def test_connect_waits_for_descriptors(monkeypatch):
+    server = listening_socket()
+    calls = out_of_descriptors(monkeypatch, 3)
+    sock, family = connect.connect([(V4, server.getsockname())], 2)
+    with sock, server:
+        assert family == "ipv4"
+        assert len(calls) == 4
+
+
+def test_connect_out_of_descriptors(monkeypatch):
+    server = listening_socket()
+    out_of_descriptors(monkeypatch, 1000)
+    with server, pytest.raises(OSError) as excinfo:
+        connect.connect([(V4, server.getsockname())], 0.2)
+    assert ssl_certinfo.classify_error(excinfo.value) == "resources"
+
+
+def test_connect_limits_parallel_attempts(monkeypatch):
+    created = []
+    create = socket.socket
+
+    def counting_socket(*args):
+        created.append(args)
+        return create(*args)
+
+    # Unanswered attempts, see test_connect_races_slow_attempt
+    blackhole = socket.socket()
+    blackhole.bind(("127.0.0.1", 0))
+    blackhole.listen(0)
+    filler = socket.create_connection(blackhole.getsockname())
+    monkeypatch.setattr(connect.socket, "socket", counting_socket)
+    with blackhole, filler, pytest.raises(TimeoutError):
+        connect.connect([(V4, blackhole.getsockname())] * 4, 0.3, delay=0.01)
+
+    assert len(created) == connect.MAX_ATTEMPTS
+
+
+@pytest.mark.skipif(
+    not os.path.isdir("/proc/self/fd") or limits.resource is None,
+    reason="needs /proc/self/fd and RLIMIT_NOFILE",
+)
+def test_connect_with_one_free_descriptor():
+    server = listening_socket()
+    soft, hard = limits.nofile_limit()
+    used = set()
+    for fd in map(int, os.listdir("/proc/self/fd")):
+        # The listing has the descriptor of the directory, closed by now
+        try:
+            os.fstat(fd)
+            used.add(fd)
+        except OSError:
+            pass
+    # Descriptor numbers below the limit, all but one of them in use
+    free = [fd for fd in range(max(used) + 2) if fd not in used]
+    limit = free[0] + 1
+    limits.resource.setrlimit(limits.resource.RLIMIT_NOFILE, (limit, hard))
+    try:
+        sock, family = connect.connect([(V4, server.getsockname())], 2)
+    finally:
+        limits.resource.setrlimit(limits.resource.RLIMIT_NOFILE, (soft, hard))
+    with sock, server:
+        assert family == "ipv4"
+
+
+def tracking_connect(monkeypatch):
+    """Collect the sockets returned by connect.connect."""
+    sockets = []
+    original = connect.connect
+
+    def connect_and_track(*args):
+        sock, family = original(*args)
+        sockets.append(sock)
+        return sock, family
+
+    monkeypatch.setattr(connect, "connect", connect_and_track)
+    return sockets
+
+
+def test_socket_closed_after_failed_handshake(monkeypatch):
+    sockets = tracking_connect(monkeypatch)
+    server = listening_socket()
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            conn.sendall(b"SSH-2.0-OpenSSH_9.0\r\n")
+            conn.recv(4096)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    record = ssl_certinfo.fetch_host("127.0.0.1", server.getsockname()[1], 2)
+    thread.join()
+    server.close()
+
+    assert record["error"] == "tls"
+    assert sockets[0].fileno() == -1
+
+
+def test_socket_closed_after_proxy_error(monkeypatch):
+    sockets = tracking_connect(monkeypatch)
+    proxy = listening_socket()
+
+    def serve():
+        conn, _ = proxy.accept()
+        with conn:
+            conn.recv(4096)
+            conn.sendall(b"HTTP/1.0 502 Bad Gateway\r\n\r\n")
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    record = ssl_certinfo.fetch_host(
+        "example.com", 443, 2, ("http", "127.0.0.1", proxy.getsockname()[1])
+    )
+    thread.join()
+    proxy.close()
+
+    assert record["error"] == "proxy"
+    assert sockets[0].fileno() == -1
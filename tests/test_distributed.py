@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.distributed` module.
+
+Use tox or py.test to run the test suite.
+"""
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from ssl_certinfo import distributed, extractors, ssl_certinfo
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="workers are forked and use Unix sockets"
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def record(host, port=443):
+    return {"peername": host, "peerport": port, "expire_in_days": 30}
+
+
+@pytest.fixture
+def coordinator(tmp_path):
+    coordinator = distributed.Coordinator(
+        str(tmp_path / "coordinator.sock"), lease_size=2, lease_timeout=10
+    )
+    coordinator.hosts = iter(["a", "b", "c"])
+    yield coordinator
+    coordinator.server.server_close()
+
+
+@pytest.mark.parametrize(
+    "address,expected",
+    [
+        ("/run/c.sock", "unix:/run/c.sock"),
+        (("127.0.0.1", 9401), "127.0.0.1:9401"),
+        (("::1", 9401, 0, 0), "[::1]:9401"),
+    ],
+)
+def test_format_address(address, expected):
+    assert distributed.format_address(address) == expected
+
+
+def test_coordinator_leases(coordinator):
+    first, second = set(), set()
+    assert coordinator.acquire(first) == {
+        "lease": 1,
+        "hosts": ["a", "b"],
+        "port": 443,
+        "timeout": 5,
+        "fields": list(extractors.DEFAULT_FIELDS),
+    }
+    assert coordinator.acquire(second)["hosts"] == ["c"]
+    assert coordinator.acquire(second) == {"wait": distributed.WAIT_INTERVAL}
+
+    for lease, host in [(1, "a"), (1, "b"), (2, "c")]:
+        assert coordinator.report(lease, record(host))
+    assert coordinator.finished()
+    assert coordinator.acquire(second) == {"done": True}
+    assert coordinator.records.qsize() == 3
+
+
+def test_coordinator_reassigns_expired_lease(coordinator):
+    coordinator.clock = clock = FakeClock()
+    coordinator.acquire(set())
+    assert coordinator.report(1, record("a"))
+
+    clock.now = 5
+    coordinator.reclaim()
+    assert 1 in coordinator.leases
+    # The result of "a" renewed the lease
+    clock.now = 15
+    coordinator.reclaim()
+    assert 1 not in coordinator.leases
+
+    assert coordinator.acquire(set())["hosts"] == ["b"]
+    assert not coordinator.report(1, record("b"))
+    assert coordinator.report(2, record("b"))
+
+
+def test_coordinator_drops_duplicate_results(coordinator):
+    coordinator.acquire(set())
+    assert coordinator.report(1, record("a"))
+    assert not coordinator.report(1, record("a"))
+    assert not coordinator.report(1, record("c"))
+    assert coordinator.records.qsize() == 1
+
+
+def test_coordinator_release(coordinator):
+    leases = set()
+    coordinator.acquire(leases)
+    coordinator.report(1, record("a"))
+    coordinator.release(leases)
+    assert coordinator.acquire(set())["hosts"] == ["b"]
+
+
+def fake_fetch_host(host, port, *args):
+    time.sleep(0.01)
+    return dict(record(host, port), worker=os.getpid())
+
+
+def start_workers(monkeypatch, address, count):
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", fake_fetch_host)
+    fork = multiprocessing.get_context("fork")
+    workers = [
+        fork.Process(target=distributed.run_worker, args=(address,))
+        for _ in range(count)
+    ]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+@pytest.mark.parametrize("host", [None, "127.0.0.1", "::1"])
+def test_scan_with_worker_processes(monkeypatch, tmp_path, host):
+    if host is None:
+        address = str(tmp_path / "coordinator.sock")
+    elif ":" in host and not socket.has_ipv6:
+        pytest.skip("IPv6 is not available")
+    else:
+        address = (host, 0)
+    coordinator = distributed.Coordinator(address, 8443, lease_size=3)
+    hosts = ["host{}.example".format(i) for i in range(40)]
+    records = coordinator.scan(hosts)
+
+    workers = []
+    threading.Timer(
+        0.1,
+        lambda: workers.extend(start_workers(monkeypatch, coordinator.address, 3)),
+    ).start()
+    results = list(records)
+    for worker in workers:
+        worker.join(5)
+        assert worker.exitcode == 0
+
+    assert sorted(r["peername"] for r in results) == sorted(hosts)
+    assert {r["peerport"] for r in results} == {8443}
+    assert len({r["worker"] for r in results}) > 1
+
+
+def test_scan_reassigns_lease_of_stalled_worker(monkeypatch, tmp_path):
+    address = str(tmp_path / "coordinator.sock")
+    coordinator = distributed.Coordinator(address, lease_size=2, lease_timeout=1)
+    records = coordinator.scan(["a", "b", "c"])
+    results = []
+    thread = threading.Thread(target=lambda: results.extend(records))
+    thread.start()
+
+    with socket.socket(socket.AF_UNIX) as stalled:
+        stalled.connect(address)
+        stalled.sendall(b'{"op": "lease"}\n')
+        lease = json.loads(stalled.makefile("rb").readline())
+        assert lease["hosts"] == ["a", "b"]
+
+        workers = start_workers(monkeypatch, address, 1)
+        thread.join(10)
+
+    workers[0].join(5)
+    assert sorted(r["peername"] for r in results) == ["a", "b", "c"]
+    assert all("worker" in r for r in results)
+
+
+def test_scan_without_hosts(tmp_path):
+    coordinator = distributed.Coordinator(str(tmp_path / "coordinator.sock"))
+    assert list(coordinator.scan([])) == []
+
+
+def test_cli_coordinator_and_workers(tmp_path, tls_server):
+    path = tmp_path / "coordinator.sock"
+    address = "unix:{}".format(path)
+    command = [sys.executable, "-m", "ssl_certinfo", "--json", "--lease-size", "1"]
+    coordinator = subprocess.Popen(
+        command
+        + ["--coordinator", address, "-p", str(tls_server.port)]
+        + ["localhost", "127.0.0.1", "127.0.0.2"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    deadline = time.monotonic() + 10
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "ssl_certinfo", "--worker", address],
+            stderr=subprocess.PIPE,
+        )
+        for _ in range(2)
+    ]
+    out, err = coordinator.communicate(timeout=30)
+    for worker in workers:
+        worker.communicate(timeout=10)
+        assert worker.returncode == 0
+
+    assert coordinator.returncode == 0
+    results = json.loads(out)
+    assert sorted(results) == ["127.0.0.1", "127.0.0.2", "localhost"]
+    assert results["localhost"]["CN"] == "localhost"
+    assert results["127.0.0.2"]["error"] == "refused"
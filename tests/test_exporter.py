@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.exporter` module.
+
+Use tox or py.test to run the test suite.
+"""
+import re
+import socket
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from ssl_certinfo import exporter
+
+
+@pytest.fixture
+def snapshot():
+    snapshot = exporter.MetricsSnapshot()
+    snapshot.record_handshake("github.com", 443, 0.2)
+    snapshot.record_result("github.com", 443, {"expire_in_days": 42})
+    snapshot.record_handshake("example.org", 443, 3.0)
+    snapshot.record_error("example.org", 443)
+    return snapshot
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("github.com", "github.com"),
+        ('a"b', r"a\"b"),
+        ("a\\b", r"a\\b"),
+        ("a\nb", r"a\nb"),
+    ],
+)
+def test_escape_label_value(value, expected):
+    assert exporter.escape_label_value(value) == expected
+
+
+@pytest.mark.parametrize(
+    "expected",
+    [
+        r'^ssl_cert_expire_in_days\{host="github.com",port="443"\} 42$',
+        r'^ssl_cert_handshake_duration_seconds_bucket\{host="github.com",port="443",'
+        r'le="0.1"\} 0$',
+        r'^ssl_cert_handshake_duration_seconds_bucket\{host="github.com",port="443",'
+        r'le="0.25"\} 1$',
+        r'^ssl_cert_handshake_duration_seconds_bucket\{host="example.org",port="443",'
+        r'le="\+Inf"\} 1$',
+        r'^ssl_cert_handshake_duration_seconds_count\{host="github.com",'
+        r'port="443"\} 1$',
+        r'^ssl_cert_scan_errors_total\{host="github.com",port="443"\} 0$',
+        r'^ssl_cert_scan_errors_total\{host="example.org",port="443"\} 1$',
+        r'^ssl_cert_last_scan_success\{host="example.org",port="443"\} 0$',
+        r"^# TYPE ssl_cert_expire_in_days gauge$",
+        r"^# TYPE ssl_cert_handshake_duration_seconds histogram$",
+        r"^# TYPE ssl_cert_scan_errors_total counter$",
+    ],
+)
+def test_render(snapshot, expected):
+    assert re.search(expected, snapshot.render(), re.MULTILINE)
+
+
+@pytest.mark.parametrize(
+    "record,expected",
+    [
+        (
+            {"peername": "a.example", "peerport": 443, "error": "x", "elapsed": 1},
+            'ssl_cert_scan_errors_total{host="a.example",port="443"} 1',
+        ),
+        (
+            {
+                "peername": "a.example",
+                "peerport": 443,
+                "expire_in_days": 7,
+                "elapsed": 1,
+            },
+            'ssl_cert_expire_in_days{host="a.example",port="443"} 7',
+        ),
+    ],
+)
+def test_publish(record, expected):
+    snapshot = exporter.MetricsSnapshot()
+    snapshot.publish(record)
+    assert expected in snapshot.render().splitlines()
+
+
+def test_check_host(tls_server):
+    snapshot = exporter.MetricsSnapshot()
+    record = exporter.check_host(snapshot, "localhost", tls_server.port)
+    exporter.check_host(snapshot, "localhost", 2)
+
+    assert "expire_in_days" in record
+    assert "CN" not in record
+    histogram = snapshot.latency[("localhost", tls_server.port)]
+    assert histogram.count == 1
+    # elapsed is rounded to milliseconds
+    assert histogram.sum < record["elapsed"] + 0.001
+    assert ("localhost", 2) not in snapshot.latency
+
+
+def test_check_host_context(monkeypatch):
+    contexts = []
+
+    def fetch_host(host, port, timeout, proxy, timings, context, fields):
+        contexts.append(context)
+        assert fields == exporter.FIELDS
+        return {"peername": host, "peerport": port, "expire_in_days": 30}
+
+    monkeypatch.setattr(exporter.ssl_certinfo, "fetch_host", fetch_host)
+    context = exporter.ssl_certinfo.create_context()
+    exporter.check_host(exporter.MetricsSnapshot(), "a.example", 443, context=context)
+
+    assert contexts == [context]
+
+
+@pytest.mark.parametrize("host", ["127.0.0.1", "::1"])
+def test_metrics_endpoint(snapshot, host):
+    if ":" in host and not socket.has_ipv6:
+        pytest.skip("IPv6 is not available")
+    server = exporter.create_server(snapshot, (host, 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = "http://{}:{}".format(
+        "[{}]".format(host) if ":" in host else host, server.server_address[1]
+    )
+    try:
+        with urllib.request.urlopen(url + "/metrics") as response:
+            body = response.read().decode()
+            content_type = response.headers["Content-Type"]
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert body == snapshot.render()
+    assert content_type.startswith("text/plain")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.extractors` module.
+
+Use tox or py.test to run the test suite.
+"""
+from datetime import datetime
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from ssl_certinfo import alerts, extractors, ssl_certinfo
+from tests import conftest
+
+
+def make_certificate(key, issuer_key=None, algorithm=hashes.SHA256()):
+    issuer_key = issuer_key or key
+    return (
+        x509.CertificateBuilder()
+        .subject_name(conftest.make_name("example.com"))
+        .issuer_name(conftest.make_name("Example CA"))
+        .public_key(key.public_key())
+        .serial_number(0x1234ABCD)
+        .not_valid_before(datetime(2020, 1, 1))
+        .not_valid_after(datetime(2030, 1, 1))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.DNSName("example.com")]), critical=False
+        )
+        .sign(issuer_key, algorithm)
+    )
+
+
+@pytest.mark.parametrize(
+    "key,algorithm,expected",
+    [
+        (
+            rsa.generate_private_key(65537, 2048),
+            hashes.SHA256(),
+            ("RSA", 2048, "sha256WithRSAEncryption"),
+        ),
+        (
+            ec.generate_private_key(ec.SECP384R1()),
+            hashes.SHA384(),
+            ("EC", 384, "ecdsa-with-SHA384"),
+        ),
+        (ed25519.Ed25519PrivateKey.generate(), None, ("Ed25519", 256, "ed25519")),
+    ],
+)
+def test_key_fields(key, algorithm, expected):
+    cert = make_certificate(key, algorithm=algorithm)
+    info = extractors.extract(cert, ["key_type", "key_size", "signature_algorithm"])
+    assert (info["key_type"], info["key_size"], info["signature_algorithm"]) == expected
+
+
+def test_extract_all_fields():
+    cert = make_certificate(ec.generate_private_key(ec.SECP256R1()))
+    info = extractors.extract(cert, list(extractors.FIELDS))
+
+    assert list(info) == list(extractors.FIELDS)
+    assert info["CN"] == "example.com"
+    assert info["SAN"] == ["example.com"]
+    assert info["valid_to"] == "2030-01-01T00:00:00"
+    assert info["fingerprint_sha256"] == cert.fingerprint(hashes.SHA256()).hex()
+    assert info["serial"] == "1234abcd"
+    assert info["issuer"] == "CN=Example CA"
+
+
+def test_certificate_without_san(certificate_authority):
+    key = ec.generate_private_key(ec.SECP256R1())
+    cert = conftest.make_certificate(
+        "localhost", certificate_authority.name, key, certificate_authority.key, 5
+    )
+    server = conftest.TLSServer(cert, key)
+    try:
+        record = ssl_certinfo.fetch_host("localhost", server.port)
+    finally:
+        server.close()
+
+    assert extractors.extract(cert, ["SAN"]) == {"SAN": []}
+    assert "error" not in record
+    assert record["CN"] == "localhost"
+    assert record["SAN"] == []
+    assert record["hostname_match"] is True
+    thresholds = alerts.ExpiryThresholds(crit_days=7)
+    assert thresholds.status(record) == alerts.CRITICAL
+
+
+def test_extract_runs_only_selected_extractors(monkeypatch):
+    calls = []
+    for name in extractors.FIELDS:
+        monkeypatch.setitem(
+            extractors.FIELDS, name, lambda cert, name=name: calls.append(name)
+        )
+    extractors.extract(None, ["CN", "serial"])
+    assert calls == ["CN", "serial"]
+
+
+def test_default_fields():
+    cert = make_certificate(ec.generate_private_key(ec.SECP256R1()))
+    assert list(extractors.extract(cert)) == extractors.certificate_fields(
+        extractors.DEFAULT_FIELDS
+    )
+
+
+def test_common_name_missing():
+    key = ec.generate_private_key(ec.SECP256R1())
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(x509.Name([]))
+        .issuer_name(conftest.make_name("Example CA"))
+        .public_key(key.public_key())
+        .serial_number(1)
+        .not_valid_before(datetime(2020, 1, 1))
+        .not_valid_after(datetime(2030, 1, 1))
+        .sign(key, hashes.SHA256())
+    )
+    assert extractors.extract(cert, ["CN"]) == {"CN": None}
+
+
+@pytest.mark.parametrize(
+    "names,expected",
+    [
+        (["serial", "CN"], ["CN", "serial"]),
+        (
+            ["default", "serial"],
+            ["CN", "SAN", "valid_from", "valid_to", "expire_in_days", "serial"]
+            + list(extractors.CHECKS),
+        ),
+        (["all"], list(extractors.FIELDS) + list(extractors.CHECKS)),
+        (["ocsp_status", "CN"], ["CN", "ocsp_status"]),
+        (["CN", "CN"], ["CN"]),
+    ],
+)
+def test_select(names, expected):
+    assert extractors.select(names) == expected
+
+
+def test_select_unknown_field():
+    with pytest.raises(ValueError):
+        extractors.select(["CN", "bogus"])
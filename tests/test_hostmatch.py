@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.hostmatch` module.
+
+Use tox or py.test to run the test suite.
+"""
+import ipaddress
+from datetime import datetime
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from ssl_certinfo import hostmatch
+from tests import conftest
+
+NAMES = ["example.com", "*.example.com", "WWW.Example.org", "*.b.example.net"]
+
+
+@pytest.mark.parametrize(
+    "hostname,expected",
+    [
+        ("example.com", "example.com"),
+        ("EXAMPLE.com.", "example.com"),
+        ("www.example.com", "*.example.com"),
+        ("a.b.example.com", None),
+        ("www.example.org", "WWW.Example.org"),
+        ("example.org", None),
+        ("a.b.example.net", "*.b.example.net"),
+        ("b.example.net", None),
+        (".example.com", None),
+        ("192.0.2.1", "192.0.2.1"),
+        ("2001:db8::1", "2001:db8::1"),
+        ("[2001:db8::1]", "2001:db8::1"),
+        ("192.0.2.2", None),
+    ],
+)
+def test_match(hostname, expected):
+    matcher = hostmatch.HostnameMatcher(
+        NAMES, [ipaddress.ip_address("192.0.2.1"), ipaddress.ip_address("2001:db8::1")]
+    )
+    assert matcher.match(hostname) == expected
+
+
+@pytest.mark.parametrize(
+    "pattern,hostname",
+    [
+        ("*.com", "example.com"),
+        ("w*.example.com", "www.example.com"),
+        ("www.*.example.com", "www.a.example.com"),
+        ("*.*.example.com", "a.b.example.com"),
+        ("*.example.com", "192.0.2.1"),
+    ],
+)
+def test_invalid_wildcards_do_not_match(pattern, hostname):
+    assert hostmatch.HostnameMatcher([pattern]).match(hostname) is None
+
+
+def test_common_name_only_without_dns_names():
+    assert hostmatch.HostnameMatcher([], [], "example.com").match("example.com")
+    matcher = hostmatch.HostnameMatcher(["www.example.com"], [], "example.com")
+    assert matcher.match("example.com") is None
+
+
+def make_certificate(common_name, san):
+    key = ec.generate_private_key(ec.SECP256R1())
+    builder = (
+        x509.CertificateBuilder()
+        .subject_name(conftest.make_name(common_name))
+        .issuer_name(conftest.make_name(common_name))
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(datetime(2020, 1, 1))
+        .not_valid_after(datetime(2030, 1, 1))
+        .add_extension(x509.SubjectAlternativeName(san), critical=False)
+    )
+    return builder.sign(key, hashes.SHA256())
+
+
+def test_hostname_match_from_certificate():
+    cert = make_certificate(
+        "example.com",
+        [
+            x509.DNSName("*.example.com"),
+            x509.IPAddress(ipaddress.ip_address("192.0.2.1")),
+        ],
+    )
+    assert hostmatch.hostname_match(cert, "www.example.com") == {
+        "hostname_match": True,
+        "matched_name": "*.example.com",
+    }
+    assert hostmatch.hostname_match(cert, "192.0.2.1")["matched_name"] == "192.0.2.1"
+    assert hostmatch.hostname_match(cert, "example.com") == {"hostname_match": False}
+
+
+def test_cache_by_fingerprint(monkeypatch):
+    cache = hostmatch.MatcherCache(maxsize=2)
+    compiled = []
+    original = hostmatch.HostnameMatcher.from_certificate
+
+    def from_certificate(cert):
+        compiled.append(cert)
+        return original(cert)
+
+    monkeypatch.setattr(hostmatch.HostnameMatcher, "from_certificate", from_certificate)
+    certs = [make_certificate("c{}.example".format(i), []) for i in range(3)]
+    for cert in certs[:2] + certs[:2]:
+        cache.get(cert)
+    assert len(compiled) == 2
+
+    cache.get(certs[2])
+    assert len(cache.entries) == 2
+    cache.get(certs[0])
+    assert len(compiled) == 4
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.instrumentation` module.
+
+Use tox or py.test to run the test suite.
+"""
+import json
+
+import pytest
+
+from ssl_certinfo import instrumentation, scanner
+from ssl_certinfo.ssl_certinfo import Phase
+
+
+@pytest.mark.parametrize(
+    "values,q,expected",
+    [
+        ([], 0.5, None),
+        ([0.002, 0.003, 0.2], 0.5, 0.005),
+        ([0.002, 0.003, 0.2], 0.99, 0.25),
+        ([0.002, 20.0], 0.99, float("inf")),
+    ],
+)
+def test_histogram_quantile(values, q, expected):
+    hist = instrumentation.Histogram()
+    for value in values:
+        hist.observe(value)
+    assert hist.quantile(q) == expected
+
+
+def test_histogram_observe():
+    hist = instrumentation.Histogram((0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        hist.observe(value)
+
+    assert hist.counts == [1, 3]
+    assert hist.count == 4
+    assert hist.sum == pytest.approx(4.25)
+    assert hist.max == 3.0
+
+
+def test_phase_tracer_records_phases(monkeypatch):
+    clock = iter([1.0, 1.5, 4.0, 4.25])
+    monkeypatch.setattr(instrumentation.time, "perf_counter", lambda: next(clock))
+    timings = instrumentation.Timings()
+    tracer = instrumentation.PhaseTracer(timings)
+
+    tracer(Phase.RESOLVE)
+    tracer(Phase.CONNECT)
+    tracer(Phase.HANDSHAKE)
+    tracer.finish()
+
+    summary = timings.summary()
+    assert summary["resolve"]["total"] == 0.5
+    assert summary["connect"]["total"] == 2.5
+    assert summary["handshake"]["total"] == 0.25
+    assert tracer.phase == Phase.HANDSHAKE
+
+
+def test_phase_tracer_disabled():
+    tracer = instrumentation.PhaseTracer()
+    tracer(Phase.RESOLVE)
+    tracer(Phase.CONNECT)
+    tracer.finish()
+
+    assert tracer.phase == Phase.CONNECT
+    assert tracer.start is None
+
+
+def test_timings_time():
+    timings = instrumentation.Timings()
+    with timings.time("format"):
+        pass
+    with timings.time("format"):
+        pass
+
+    assert timings.summary()["format"]["count"] == 2
+
+
+def test_timings_output():
+    timings = instrumentation.Timings()
+    timings.record("connect", 0.02)
+    timings.record("handshake", 0.3)
+
+    summary = json.loads(timings.to_json())
+    assert summary["connect"]["count"] == 1
+    assert summary["handshake"]["p50"] == 0.5
+
+    lines = timings.format_summary().splitlines()
+    assert lines[0].split()[:3] == ["phase", "count", "total"]
+    assert lines[1].split()[:2] == ["connect", "1"]
+    assert lines[2].split()[:2] == ["handshake", "1"]
+
+
+def test_profiler():
+    with instrumentation.Profiler() as profiler:
+        sorted(range(1000))
+
+    assert "function calls" in profiler.format_stats()
+
+
+def test_profiler_includes_worker_threads(tls_server):
+    with instrumentation.Profiler() as profiler:
+        records = list(scanner.scan(["localhost"] * 2, tls_server.port, workers=2))
+
+    stats = profiler.format_stats(limit=None)
+    assert len(records) == 2
+    assert "fetch_host" in stats
+    assert "get_certificate" in stats
+    assert instrumentation.ACTIVE_PROFILER is None
+
+
+def test_profiled_without_profiler():
+    assert instrumentation.profiled(max, 1, 2) == 2
+
+
+def test_profiler_disabled():
+    with instrumentation.Profiler(False) as profiler:
+        pass
+
+    assert profiler.profile is None
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.limits` module.
+
+Use tox or py.test to run the test suite.
+"""
+import threading
+import time
+
+import pytest
+
+from ssl_certinfo import limits, scanner, ssl_certinfo
+
+pytestmark = pytest.mark.skipif(
+    limits.resource is None, reason="RLIMIT_NOFILE is not available"
+)
+
+
+@pytest.mark.parametrize(
+    "workers,sockets,budget,expected",
+    [
+        (10, 2, None, 10),
+        (10, 2, 100, 10),
+        (100, 2, 100, 50),
+        (100, 4, 100, 25),
+        (100, 2, 1, 1),
+    ],
+)
+def test_fit_workers(monkeypatch, workers, sockets, budget, expected):
+    monkeypatch.setattr(limits, "socket_budget", lambda: None)
+    assert limits.fit_workers(workers, sockets, budget) == expected
+
+
+def test_socket_budget(monkeypatch):
+    monkeypatch.setattr(limits, "nofile_limit", lambda: (1024, 4096))
+    assert limits.socket_budget() == 1024 - limits.RESERVED_DESCRIPTORS
+    monkeypatch.setattr(limits, "nofile_limit", lambda: (10, 4096))
+    assert limits.socket_budget() == limits.SOCKETS_PER_HOST
+    monkeypatch.setattr(
+        limits, "nofile_limit", lambda: (limits.resource.RLIM_INFINITY,) * 2
+    )
+    assert limits.socket_budget() is None
+
+
+def test_raise_nofile_limit():
+    soft, hard = limits.nofile_limit()
+    try:
+        assert limits.raise_nofile_limit(soft) == soft
+        assert limits.raise_nofile_limit() == limits.nofile_limit()[0]
+        if hard != limits.resource.RLIM_INFINITY:
+            assert limits.nofile_limit()[0] == hard
+    finally:
+        limits.resource.setrlimit(limits.resource.RLIMIT_NOFILE, (soft, hard))
+
+
+def test_scan_fits_workers(monkeypatch):
+    in_flight = []
+    active = set()
+    lock = threading.Lock()
+
+    def fetch_host(host, port, *args):
+        with lock:
+            active.add(host)
+            in_flight.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.discard(host)
+        return {"peername": host, "peerport": port, "expire_in_days": 30}
+
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", fetch_host)
+    monkeypatch.setattr(limits, "socket_budget", lambda: 3 * limits.SOCKETS_PER_HOST)
+    hosts = ["host{}.example".format(i) for i in range(20)]
+    records = list(scanner.scan(hosts, workers=100))
+    assert len(records) == 20
+    assert max(in_flight) == 3
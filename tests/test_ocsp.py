@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.ocsp` module.
+
+Use tox or py.test to run the test suite.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from cryptography.x509.ocsp import OCSPCertStatus
+from cryptography.x509.oid import ExtendedKeyUsageOID
+
+from ssl_certinfo import ocsp, ssl_certinfo
+from tests import conftest
+
+
+@pytest.fixture
+def cert(certificate_authority):
+    return certificate_authority.issue("example.com")[0]
+
+
+@pytest.mark.parametrize(
+    "status,expected",
+    [
+        (OCSPCertStatus.GOOD, "good"),
+        (OCSPCertStatus.REVOKED, "revoked"),
+        (OCSPCertStatus.UNKNOWN, "unknown"),
+    ],
+)
+def test_parse_response(certificate_authority, cert, status, expected):
+    data = certificate_authority.ocsp_response(cert, status)
+    info, next_update = ocsp.parse_response(cert, data, certificate_authority.cert)
+
+    assert info["ocsp_status"] == expected
+    assert info["ocsp_next_update"] == next_update.isoformat()
+    assert next_update > datetime.utcnow()
+    assert ("ocsp_revoked_at" in info) == (expected == "revoked")
+
+
+def test_parse_response_mismatch(certificate_authority, cert):
+    other = certificate_authority.issue("other.example.com")[0]
+    data = certificate_authority.ocsp_response(other)
+    assert ocsp.parse_response(cert, data) == ({"ocsp_status": "mismatch"}, None)
+
+
+def test_parse_response_delegated(certificate_authority, cert):
+    responder = certificate_authority.issue(
+        "ocsp.example.com", usage=[ExtendedKeyUsageOID.OCSP_SIGNING]
+    )
+    data = certificate_authority.ocsp_response(cert, responder=responder)
+    info, _ = ocsp.parse_response(cert, data, certificate_authority.cert)
+
+    assert info["ocsp_status"] == "good"
+
+
+@pytest.mark.parametrize("usage", [None, [ExtendedKeyUsageOID.SERVER_AUTH]])
+def test_parse_response_unauthorized_responder(certificate_authority, cert, usage):
+    responder = certificate_authority.issue("ocsp.example.com", usage=usage)
+    data = certificate_authority.ocsp_response(cert, responder=responder)
+    info, _ = ocsp.parse_response(cert, data, certificate_authority.cert)
+
+    assert info == {"ocsp_status": "bad_signature"}
+
+
+def test_parse_response_forged(certificate_authority, cert):
+    # Same name as the issuer, but another key
+    forger = conftest.CertificateAuthority(certificate_authority.name)
+    data = forger.ocsp_response(cert)
+    info, _ = ocsp.parse_response(cert, data, certificate_authority.cert)
+
+    assert info == {"ocsp_status": "mismatch"}
+
+    data = certificate_authority.ocsp_response(
+        cert, responder=(forger.cert, forger.key)
+    )
+    info, _ = ocsp.parse_response(cert, data, certificate_authority.cert)
+
+    assert info == {"ocsp_status": "bad_signature"}
+
+
+def test_parse_response_unverified(certificate_authority, cert):
+    data = certificate_authority.ocsp_response(cert, OCSPCertStatus.REVOKED)
+    info, next_update = ocsp.parse_response(cert, data)
+
+    assert (info, next_update) == ({"ocsp_status": "unverified"}, None)
+
+
+def test_find_issuer(certificate_authority, cert):
+    other = conftest.CertificateAuthority(certificate_authority.name)
+
+    assert ocsp.find_issuer(cert, []) is None
+    assert ocsp.find_issuer(cert, [cert, other.cert]) is None
+    assert ocsp.find_issuer(cert, [other.cert, certificate_authority.cert]) is (
+        certificate_authority.cert
+    )
+
+
+@pytest.mark.parametrize(
+    "data,expected",
+    [(b"", "none"), (None, "none"), (b"garbage", "invalid")],
+)
+def test_certificate_status_without_response(cert, data, expected):
+    assert ocsp.certificate_status(cert, data, ocsp.OcspCache()) == {
+        "ocsp_status": expected
+    }
+
+
+def test_certificate_status_cached(monkeypatch, certificate_authority, cert):
+    cache = ocsp.OcspCache()
+    data = certificate_authority.ocsp_response(cert)
+    calls = []
+    parse_response = ocsp.parse_response
+
+    def counting_parse(*args):
+        calls.append(args)
+        return parse_response(*args)
+
+    monkeypatch.setattr(ocsp, "parse_response", counting_parse)
+    chain = [cert, certificate_authority.cert]
+    first = ocsp.certificate_status(cert, data, cache, chain)
+    first["ocsp_status"] = "modified"
+    second = ocsp.certificate_status(cert, data, cache, chain)
+
+    assert len(calls) == 1
+    assert second["ocsp_status"] == "good"
+
+
+def test_certificate_status_cached_before_verification(
+    monkeypatch, certificate_authority, cert
+):
+    cache = ocsp.OcspCache()
+    data = certificate_authority.ocsp_response(cert)
+    calls = []
+    find_issuer = ocsp.find_issuer
+
+    def counting_find_issuer(*args):
+        calls.append(args)
+        return find_issuer(*args)
+
+    monkeypatch.setattr(ocsp, "find_issuer", counting_find_issuer)
+    chain = [cert, certificate_authority.cert]
+    ocsp.certificate_status(cert, data, cache, chain)
+    second = ocsp.certificate_status(cert, data, cache, chain)
+
+    assert len(calls) == 1
+    assert second["ocsp_status"] == "good"
+
+
+def test_certificate_status_unverified_not_cached(certificate_authority, cert):
+    cache = ocsp.OcspCache()
+    data = certificate_authority.ocsp_response(cert)
+
+    first = ocsp.certificate_status(cert, data, cache, [cert])
+    second = ocsp.certificate_status(
+        cert, data, cache, [cert, certificate_authority.cert]
+    )
+
+    assert first["ocsp_status"] == "unverified"
+    assert second["ocsp_status"] == "good"
+
+
+def test_ocsp_cache_expiry():
+    now = datetime(2020, 1, 1)
+    cache = ocsp.OcspCache(maxsize=2, clock=lambda: now)
+    cache.put("a", {"ocsp_status": "good"}, now + timedelta(hours=1))
+    cache.put("b", {"ocsp_status": "good"}, now)
+    assert cache.get("a") == {"ocsp_status": "good"}
+    assert cache.get("b") is None
+
+    cache.put("c", {"ocsp_status": "good"})
+    cache.put("d", {"ocsp_status": "good"})
+    assert cache.get("a") is None
+    assert cache.get("d") == {"ocsp_status": "good"}
+
+
+@pytest.mark.parametrize(
+    "status,expected",
+    [(OCSPCertStatus.GOOD, "good"), (OCSPCertStatus.REVOKED, "revoked")],
+)
+def test_fetch_host_stapled(certificate_authority, status, expected):
+    ocsp.CACHE.clear()
+    cert, key = certificate_authority.issue("localhost")
+    server = conftest.TLSServer(
+        cert,
+        key,
+        certificate_authority.ocsp_response(cert, status),
+        chain=[certificate_authority.cert],
+    )
+    try:
+        record = ssl_certinfo.fetch_host("localhost", server.port)
+    finally:
+        server.close()
+
+    assert "error" not in record
+    assert record["CN"] == "localhost"
+    assert record["ocsp_status"] == expected
+    assert "ocsp_next_update" in record
+
+
+def test_fetch_host_stapled_without_issuer(tls_server):
+    ocsp.CACHE.clear()
+    record = ssl_certinfo.fetch_host("localhost", tls_server.port)
+
+    assert record["ocsp_status"] == "unverified"
+    assert "ocsp_next_update" not in record
+
+
+def test_fetch_host_without_staple(tls_server):
+    tls_server.ocsp = b""
+    record = ssl_certinfo.fetch_host("localhost", tls_server.port)
+
+    assert record["ocsp_status"] == "none"
+    assert "ocsp_next_update" not in record
+
+
+def test_get_certificate_chain_only_with_staple(tls_server):
+    details = {}
+    ssl_certinfo.get_certificate("localhost", tls_server.port, details=details)
+    assert details["chain"]
+
+    tls_server.ocsp = b""
+    details = {}
+    ssl_certinfo.get_certificate("localhost", tls_server.port, details=details)
+    assert "chain" not in details
+
+
+def test_get_certificate_without_details(tls_server):
+    cert = ssl_certinfo.get_certificate("localhost", tls_server.port)
+    assert cert.serial_number == tls_server.cert.serial_number
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.output` module.
+
+Use tox or py.test to run the test suite.
+"""
+import csv
+import gzip
+import io
+import json
+
+import pytest
+import yaml
+
+from ssl_certinfo import output, serializers, ssl_certinfo
+from ssl_certinfo.ssl_certinfo import OutputFormat
+
+
+def read_file(path, compression=None):
+    if compression == "gzip":
+        with gzip.open(path, "rb") as f:
+            return f.read().decode()
+    if compression == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+        with open(path, "rb") as f:
+            reader = zstandard.ZstdDecompressor().stream_reader(f)
+            return reader.read().decode()
+    with open(path) as f:
+        return f.read()
+
+
+@pytest.mark.parametrize(
+    "path,expected",
+    [
+        ("results.json", None),
+        ("results.json.gz", "gzip"),
+        ("results.csv.zst", "zstd"),
+        ("results.CSV.GZ", "gzip"),
+        ("results", None),
+    ],
+)
+def test_compression_from_path(path, expected):
+    assert output.compression_from_path(path) == expected
+
+
+@pytest.mark.parametrize(
+    "path,index,expected",
+    [
+        ("results.json", 1, "results.0001.json"),
+        ("out/results.csv.gz", 12, "out/results.0012.csv.gz"),
+        ("results", 3, "results.0003"),
+    ],
+)
+def test_chunk_path(path, index, expected):
+    assert output.chunk_path(path, index) == expected
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "zstd"])
+def test_output_writer(tmp_path, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    path = str(tmp_path / "results.txt")
+    with output.OutputWriter(path, compression, buffer_size=16) as writer:
+        for i in range(100):
+            writer.write("line {}\n".format(i))
+        writer.write(b"bytes\n")
+
+    assert writer.paths == [path]
+    assert writer.tell() == sum(len("line {}\n".format(i)) for i in range(100)) + 6
+    lines = read_file(path, compression).splitlines()
+    assert len(lines) == 101
+    assert lines[-1] == "bytes"
+
+
+def test_output_writer_rotate(tmp_path):
+    path = str(tmp_path / "results.txt.gz")
+    writer = output.OutputWriter(path, "gzip", split=True)
+    writer.write("first\n")
+    writer.rotate()
+    writer.write("second\n")
+    writer.close()
+
+    assert writer.paths == [
+        str(tmp_path / "results.0001.txt.gz"),
+        str(tmp_path / "results.0002.txt.gz"),
+    ]
+    assert read_file(writer.paths[0], "gzip") == "first\n"
+    assert read_file(writer.paths[1], "gzip") == "second\n"
+
+
+def test_output_writer_error(tmp_path):
+    writer = output.OutputWriter(str(tmp_path / "missing" / "results.txt"))
+    writer.write("data")
+    with pytest.raises(FileNotFoundError):
+        writer.close()
+
+
+def records(count):
+    return [
+        {"peername": "host{}.example".format(i), "peerport": 443, "expire_in_days": i}
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize(
+    "formatter,load",
+    [
+        (serializers.JsonRecordFormatter(), json.loads),
+        (serializers.JsonRecordFormatter(compact=True), json.loads),
+        (serializers.YamlRecordFormatter(), yaml.safe_load),
+        (serializers.YamlRecordFormatter(compact=True), yaml.safe_load),
+    ],
+)
+@pytest.mark.parametrize(
+    "split_records,split_size,chunks",
+    [(None, None, 1), (4, None, 3), (None, 1, 10)],
+)
+def test_chunked_record_writer(
+    tmp_path, formatter, load, split_records, split_size, chunks
+):
+    opts = output.OutputOptions(
+        str(tmp_path / "results.out.gz"), None, split_records, split_size
+    )
+    with opts.open() as writer:
+        chunked = output.ChunkedRecordWriter(
+            writer, formatter, split_records, split_size
+        )
+        for record in records(10):
+            chunked.write(record["peername"], record)
+        chunked.close()
+
+    assert len(writer.paths) == chunks
+    merged = {}
+    for path in writer.paths:
+        merged.update(load(read_file(path, "gzip")))
+    assert merged == {r["peername"]: r for r in records(10)}
+
+
+def test_chunked_record_writer_csv(tmp_path):
+    columns = ["peername", "peerport", "expire_in_days", "error"]
+    opts = output.OutputOptions(str(tmp_path / "results.csv"), split_records=3)
+    with opts.open() as writer:
+        chunked = output.ChunkedRecordWriter(
+            writer, serializers.CsvRecordFormatter(columns), split_records=3
+        )
+        for record in records(7):
+            chunked.write(record["peername"], record)
+        chunked.close()
+
+    assert len(writer.paths) == 3
+    chunks = [list(csv.reader(io.StringIO(read_file(p)))) for p in writer.paths]
+    assert [len(rows) for rows in chunks] == [4, 4, 2]
+    assert all(rows[0] == ["peer"] + columns for rows in chunks)
+    assert chunks[2][1] == ["host6.example", "host6.example", "443", "6", ""]
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_json_record_formatter_matches_write_json(compact):
+    results = {r["peername"]: r for r in records(3)}
+    formatter = serializers.JsonRecordFormatter(compact)
+    text = formatter.header()
+    for i, (peer, record) in enumerate(results.items()):
+        text += formatter.record(peer, record, i == 0)
+    text += formatter.footer()
+
+    stream = io.StringIO()
+    serializers.write_json(results, stream, compact)
+    assert text == stream.getvalue() + "\n"
+
+
+def load_csv(text):
+    return {row["peer"]: row for row in csv.DictReader(io.StringIO(text))}
+
+
+@pytest.mark.parametrize(
+    "outform,split_records,load",
+    [
+        (OutputFormat.JSON, None, json.loads),
+        (OutputFormat.YAML, None, yaml.safe_load),
+        (OutputFormat.JSON, 2, json.loads),
+        (OutputFormat.YAML, 2, yaml.safe_load),
+        (OutputFormat.CSV, None, load_csv),
+        (OutputFormat.CSV, 2, load_csv),
+    ],
+)
+def test_process_hosts_output(
+    monkeypatch, capsys, tmp_path, outform, split_records, load
+):
+    def fetch_host(host, port, *args):
+        return {"peername": host, "peerport": port, "expire_in_days": 3}
+
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", fetch_host)
+    opts = output.OutputOptions(
+        str(tmp_path / "results.gz"), split_records=split_records
+    )
+    hosts = ["a.example", "b.example", "c.example"]
+    ssl_certinfo.process_hosts(hosts, 443, outform=outform, output=opts)
+
+    out, err = capsys.readouterr()
+    assert out == ""
+    merged = {}
+    for path in sorted(tmp_path.iterdir()):
+        merged.update(load(read_file(str(path), "gzip")))
+    assert sorted(merged) == hosts
+
+
+@pytest.mark.parametrize(
+    "outform,load",
+    [
+        (OutputFormat.JSON, json.loads),
+        (OutputFormat.YAML, yaml.safe_load),
+        (OutputFormat.CSV, load_csv),
+    ],
+)
+def test_process_hosts_streams_records(monkeypatch, capsys, outform, load):
+    printed = []
+
+    def fetch_host(host, port, *args):
+        # Every record is written before the next host is scanned
+        printed.append(capsys.readouterr().out)
+        return {"peername": host, "peerport": port, "expire_in_days": 3}
+
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", fetch_host)
+    hosts = ["a.example", "b.example", "c.example"]
+    ssl_certinfo.process_hosts(hosts, 443, outform=outform)
+
+    printed.append(capsys.readouterr().out)
+    assert all(printed[1:])
+    results = load("".join(printed))
+    assert list(results) == hosts
+    assert str(results["b.example"]["expire_in_days"]) == "3"
+
+
+def test_process_hosts_output_table(monkeypatch, capsys, tmp_path):
+    def fetch_host(host, port, *args):
+        return {"peername": host, "peerport": port, "expire_in_days": 3}
+
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", fetch_host)
+    path = tmp_path / "results.txt"
+    ssl_certinfo.process_hosts(
+        ["a.example"], 443, output=output.OutputOptions(str(path))
+    )
+
+    assert capsys.readouterr().out == ""
+    assert "a.example" in path.read_text()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.planfile` module.
+
+Use tox or py.test to run the test suite.
+"""
+import pytest
+
+from ssl_certinfo import planfile, targets
+
+SPECS = [
+    "example.com",
+    "10.0.0.0/28",
+    "10.0.0.5",
+    "Example.COM.",
+    "2001:db8::/126",
+    "www.b.example",
+    "192.0.2.1 - 192.0.2.3",
+]
+SETTINGS = {"profile": {"targets": ["example.com"], "port": 8443}, "base_dir": "/"}
+
+
+@pytest.fixture
+def plan_path(tmp_path):
+    plan = targets.plan_targets(SPECS, exclude=["10.0.0.1", "*.example"])
+    path = str(tmp_path / "scan.plan")
+    planfile.write_plan(path, plan, SETTINGS)
+    return path
+
+
+def test_plan_file_iterates_like_target_plan(plan_path):
+    plan = targets.plan_targets(SPECS, exclude=["10.0.0.1", "*.example"])
+
+    with planfile.PlanFile(plan_path) as mapped:
+        assert list(mapped) == list(plan)
+        assert mapped.total == plan.total == 15 + 4 + 3 + 1
+        assert mapped.entries == 5
+        assert mapped.settings == SETTINGS
+
+
+def test_plan_file_is_compact(tmp_path):
+    path = tmp_path / "large.plan"
+    planfile.write_plan(str(path), targets.plan_targets(["10.0.0.0/8"]), SETTINGS)
+
+    with planfile.PlanFile(str(path)) as mapped:
+        assert mapped.total == 2**24
+        assert next(iter(mapped)) == "10.0.0.0"
+    assert path.stat().st_size < 256
+
+
+@pytest.mark.parametrize("spec", ["2001:db8::/56", "::/0"])
+def test_plan_file_huge_network(tmp_path, spec):
+    path = str(tmp_path / "huge.plan")
+    plan = targets.plan_targets([spec])
+    planfile.write_plan(path, plan, SETTINGS)
+
+    with planfile.PlanFile(path) as mapped:
+        assert mapped.total == plan.total >= 2**72
+        assert next(iter(mapped)) == str(next(iter(plan)))
+
+
+def test_plan_file_profile(plan_path):
+    with planfile.PlanFile(plan_path) as mapped:
+        profile = mapped.profile
+
+    assert profile.defaults["port"] == "8443"
+    assert profile.base_dir == "/"
+
+
+def test_plan_file_format(plan_path):
+    with planfile.PlanFile(plan_path) as mapped:
+        text = mapped.format(workers=2, timeout=5)
+
+    assert "10.0.0.2 - 10.0.0.15" in text
+    assert " 10.0.0.0 " in text
+    assert "2001:db8:: - 2001:db8::3" in text
+    assert text.splitlines()[-1].startswith("Total: 23 hosts")
+
+
+def test_plan_file_check_limit(plan_path):
+    with planfile.PlanFile(plan_path) as mapped:
+        mapped.check_limit(23)
+        with pytest.raises(targets.TargetLimitError):
+            mapped.check_limit(22)
+
+
+@pytest.mark.parametrize(
+    "content,message",
+    [
+        (b"", "empty file"),
+        (b"SSLCPLAN", "not a plan file"),
+        (b"x" * 64, "not a plan file of version"),
+        (planfile.HEADER.pack(planfile.MAGIC, 1, 0, 0), "of version"),
+        (planfile.HEADER.pack(planfile.MAGIC, 2, 3, 0) + b"{x}", "settings"),
+        (planfile.HEADER.pack(planfile.MAGIC, 2, 2, 1) + b"{}", "truncated"),
+    ],
+)
+def test_invalid_plan_file(tmp_path, content, message):
+    path = tmp_path / "invalid.plan"
+    path.write_bytes(content)
+
+    with pytest.raises(planfile.PlanError, match=message):
+        planfile.PlanFile(str(path))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.profiles` module.
+
+Use tox or py.test to run the test suite.
+"""
+import pytest
+
+from ssl_certinfo import cli, profiles
+from ssl_certinfo.ssl_certinfo import OutputFormat
+
+PROFILE = """
+targets: [example.com, 192.0.2.0/28]
+exclude: [192.0.2.1]
+port: 8443
+workers: 4
+verify: true
+fields: [serial, CN]
+format: csv
+groups:
+  - name: internal
+    targets: [10.0.0.0/30, "*.corp.example.com"]
+    min_version: TLSv1.2
+"""
+
+TOML_PROFILE = """
+targets = ["example.com"]
+timeout = 10
+retry_on = "timeout,reset"
+compact = true
+"""
+
+
+def write_profile(tmp_path, text=PROFILE, name="profile.yaml"):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_profile_defaults(tmp_path):
+    profile = profiles.load_profile(write_profile(tmp_path))
+
+    assert profile.defaults == {
+        "host": ["example.com", "192.0.2.0/28", "10.0.0.0/30"],
+        "exclude": ["192.0.2.1"],
+        "port": "8443",
+        "workers": "4",
+        "verify": True,
+        "fields": "serial,CN",
+        "outform": OutputFormat.CSV,
+    }
+    assert profile.base_dir == str(tmp_path)
+    assert [group["name"] for group in profile.groups] == ["internal"]
+
+
+def test_toml_profile(tmp_path):
+    profile = profiles.load_profile(write_profile(tmp_path, TOML_PROFILE, "p.toml"))
+
+    assert profile.defaults == {
+        "host": ["example.com"],
+        "exclude": [],
+        "timeout": "10",
+        "retry_on": "timeout,reset",
+        "compact": True,
+    }
+
+
+def test_profile_paths(tmp_path):
+    text = "exclude_file: exclude.txt\nca_file: /etc/ca.pem\noutput: out/r.json\n"
+    profile = profiles.load_profile(write_profile(tmp_path, text))
+
+    assert profile.defaults["exclude_file"] == str(tmp_path / "exclude.txt")
+    assert profile.defaults["ca_file"] == "/etc/ca.pem"
+    assert profile.defaults["output"] == str(tmp_path / "out" / "r.json")
+
+
+@pytest.mark.parametrize(
+    "argv,expected",
+    [
+        ([], {"port": 8443, "workers": 4, "fields": ["CN", "serial"]}),
+        (["-p", "443"], {"port": 443, "workers": 4}),
+        (["--json"], {"outform": OutputFormat.JSON}),
+        (["-e", "192.0.2.2"], {"exclude": ["192.0.2.1", "192.0.2.2"]}),
+        (["github.com"], {"host": ["github.com"]}),
+    ],
+)
+def test_command_line_overrides_profile(tmp_path, argv, expected):
+    parser = cli.create_parser()
+    parser.set_defaults(**profiles.load_profile(write_profile(tmp_path)).defaults)
+
+    args = parser.parse_args(argv)
+
+    assert {key: getattr(args, key) for key in expected} == expected
+
+
+def test_profile_options_are_validated(tmp_path):
+    parser = cli.create_parser()
+    parser.set_defaults(
+        **profiles.load_profile(write_profile(tmp_path, "port: 70000")).defaults
+    )
+
+    with pytest.raises(SystemExit):
+        parser.parse_args([])
+
+
+def test_profile_tls_config(tmp_path):
+    config = profiles.load_profile(write_profile(tmp_path)).tls_config()
+
+    assert config.lookup("10.0.0.1").name == "internal"
+    assert config.lookup("www.corp.example.com").name == "internal"
+    assert config.lookup("example.com") is None
+
+
+def test_resolved(tmp_path):
+    profile = profiles.Profile({"exclude_file": "x", "port": 1})
+
+    assert profile.resolved(["a.example.com"]) == {
+        "exclude": ["a.example.com"],
+        "port": 1,
+    }
+
+
+@pytest.mark.parametrize(
+    "text,message",
+    [
+        ("- example.com\n", "expected a mapping"),
+        ("hosts: [example.com]\n", "unknown keys: hosts"),
+        ("profile: true\n", "unknown keys"),
+        ("targets: example.com\n", "targets is not a list"),
+        ("targets: [not a host]\n", "not a valid host in targets"),
+        ("exclude: [not a host]\n", "not a valid host in exclude"),
+        ("port: [443]\n", "port is not a number"),
+        ("workers: true\n", "workers is not a number"),
+        ("verify: yes please\n", "verify is not true or false"),
+        ("fields: 1\n", "fields is not a list"),
+        ("format: xml\n", "format is not one of"),
+        ("compress: bogus\n", "compress is not one of gzip, zstd"),
+        ("groups: [internal]\n", "groups is not a list of mappings"),
+        ("targets: [\n", "expected"),
+    ],
+)
+def test_invalid_profile(tmp_path, text, message):
+    with pytest.raises(profiles.ProfileError, match=message):
+        profiles.load_profile(write_profile(tmp_path, text))
+
+
+def test_invalid_toml_profile(tmp_path):
+    with pytest.raises(profiles.ProfileError):
+        profiles.load_profile(write_profile(tmp_path, "targets = [", "p.toml"))
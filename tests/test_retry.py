@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.retry` module.
+
+Use tox or py.test to run the test suite.
+"""
+import pytest
+
+from ssl_certinfo import retry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize(
+    "record,attempt,expected,comment",
+    [
+        ({"error": "timeout"}, 1, True, "first retry"),
+        ({"error": "reset"}, 2, True, "second retry"),
+        ({"error": "timeout"}, 3, False, "retries exhausted"),
+        ({"error": "refused"}, 1, False, "error class not retried"),
+        ({"expire_in_days": 3}, 1, False, "success"),
+    ],
+)
+def test_should_retry(record, attempt, expected, comment):
+    policy = retry.RetryPolicy(retries=2)
+    assert policy.should_retry(record, attempt) == expected
+
+
+def test_should_retry_custom_classes():
+    policy = retry.RetryPolicy(retries=1, retry_on=["refused"])
+    assert policy.should_retry({"error": "refused"}, 1)
+    assert not policy.should_retry({"error": "timeout"}, 1)
+
+
+@pytest.mark.parametrize(
+    "rand,attempt,expected",
+    [
+        (0.5, 1, 2.0),
+        (0.5, 3, 8.0),
+        (0.0, 1, 1.0),
+        (1.0, 1, 3.0),
+    ],
+)
+def test_delay(rand, attempt, expected):
+    policy = retry.RetryPolicy(retries=3, backoff=2.0, jitter=0.5, rand=lambda: rand)
+    assert policy.delay(attempt) == pytest.approx(expected)
+
+
+def test_work_queue_fifo():
+    queue = retry.WorkQueue(["a", "b"])
+    assert queue.get() == ("a", 1)
+    assert queue.get() == ("b", 1)
+    assert queue.get() is None
+    assert queue.empty()
+
+
+def test_work_queue_retry_at_tail():
+    clock = FakeClock()
+    queue = retry.WorkQueue(["a", "b", "c"], clock=clock)
+
+    assert queue.get() == ("a", 1)
+    queue.retry("a", 2, 5)
+    assert queue.get() == ("b", 1)
+    assert queue.wait_time() == 5
+
+    clock.now += 5
+    assert queue.get() == ("a", 2)
+    assert queue.get() == ("c", 1)
+    assert queue.empty()
+
+
+def test_work_queue_waiting_for_retry():
+    clock = FakeClock()
+    queue = retry.WorkQueue(["a"], clock=clock)
+
+    assert queue.get() == ("a", 1)
+    queue.retry("a", 2, 3)
+    assert queue.get() is None
+    assert not queue.empty()
+    assert queue.wait_time() == 3
+
+    clock.now += 3
+    assert queue.get() == ("a", 2)
+    assert queue.empty()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.scanner` module.
+
+Use tox or py.test to run the test suite.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+import ssl_certinfo as package
+from ssl_certinfo import retry, scanner, ssl_certinfo
+
+
+@pytest.fixture
+def fake_fetch(monkeypatch):
+    """Replace fetch_host, hosts named slow.* take 0.2 seconds, fail.* fail."""
+    calls = []
+
+    def fetch_host(host, port, timeout=5, proxy=None, timings=None, *args):
+        calls.append(host)
+        if host.startswith("slow."):
+            time.sleep(0.2)
+        record = {"peername": host, "peerport": port}
+        if host.startswith("fail."):
+            record["error"] = "timeout"
+        else:
+            record["expire_in_days"] = 30
+        return record
+
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", fetch_host)
+    return calls
+
+
+def test_scan_exported():
+    assert package.scan is scanner.scan
+    assert package.scan_async is scanner.scan_async
+
+
+def test_scan_yields_all(fake_fetch):
+    hosts = ["a.example", "fail.example", "b.example"]
+    records = list(scanner.scan(hosts, 8443))
+
+    assert [r["peername"] for r in records] == hosts
+    assert all(r["peerport"] == 8443 for r in records)
+    assert "error" in records[1]
+
+
+def test_scan_yields_as_completed(fake_fetch):
+    hosts = ["slow.example", "a.example", "b.example"]
+    records = list(scanner.scan(hosts, workers=3))
+
+    assert [r["peername"] for r in records][-1] == "slow.example"
+
+
+def test_scan_consumes_targets_lazily(fake_fetch):
+    def targets():
+        for i in range(1000):
+            yield "host{}.example".format(i)
+
+    records = list(scanner.scan(targets(), workers=2, max_results=5))
+
+    assert len(records) == 5
+    assert len(fake_fetch) <= 7
+
+
+def test_scan_cancel(fake_fetch):
+    cancel = threading.Event()
+    hosts = ["a.example", "b.example", "c.example"]
+    records = []
+    for record in scanner.scan(hosts, cancel=cancel):
+        records.append(record)
+        cancel.set()
+
+    assert len(records) == 1
+
+
+def test_scan_callbacks(fake_fetch):
+    ok, failed = [], []
+    hosts = ["a.example", "fail.example"]
+    list(scanner.scan(hosts, on_result=ok.append, on_error=failed.append))
+
+    assert [r["peername"] for r in ok] == ["a.example"]
+    assert [r["peername"] for r in failed] == ["fail.example"]
+
+
+def test_scan_retry(fake_fetch):
+    policy = retry.RetryPolicy(retries=2, backoff=0.01)
+    records = list(scanner.scan(["fail.example", "a.example"], retry_policy=policy))
+
+    assert fake_fetch.count("fail.example") == 3
+    assert [(r["peername"], r["attempts"]) for r in records] == [
+        ("a.example", 1),
+        ("fail.example", 3),
+    ]
+
+
+def test_scan_shares_default_context(monkeypatch):
+    contexts = []
+
+    def fetch_host(host, port, timeout, proxy, timings, context, *args):
+        contexts.append(context)
+        return {"peername": host, "peerport": port}
+
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", fetch_host)
+    list(scanner.scan(["a.example", "b.example", "c.example"], workers=2))
+
+    assert len(contexts) == 3
+    assert contexts[0] is not None
+    assert all(context is contexts[0] for context in contexts)
+
+
+def test_scan_async(fake_fetch):
+    async def collect():
+        return [r async for r in scanner.scan_async(["a.example", "b.example"])]
+
+    records = asyncio.run(collect())
+    assert sorted(r["peername"] for r in records) == ["a.example", "b.example"]
+
+
+def test_scan_async_close_cancels(fake_fetch):
+    hosts = ["slow.{}.example".format(i) for i in range(20)]
+
+    async def first():
+        agen = scanner.scan_async(hosts)
+        record = await agen.__anext__()
+        await agen.aclose()
+        return record
+
+    record = asyncio.run(first())
+    time.sleep(0.5)
+    assert record["peername"] == "slow.0.example"
+    assert len(fake_fetch) < len(hosts)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.scheduler` module.
+
+Use tox or py.test to run the test suite.
+"""
+import io
+import json
+import threading
+import time
+
+import pytest
+
+from ssl_certinfo import scheduler, ssl_certinfo
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def fake_check(results):
+    """Return a check function answering with a fixed record per host."""
+
+    def check(host, port):
+        record = {"peername": host, "peerport": port}
+        record.update(results[host])
+        return record
+
+    return check
+
+
+@pytest.mark.parametrize(
+    "count,interval,expected",
+    [
+        (0, 60, []),
+        (1, 60, [0]),
+        (4, 60, [0, 15, 30, 45]),
+    ],
+)
+def test_stagger_offsets(count, interval, expected):
+    assert scheduler.stagger_offsets(count, interval) == expected
+
+
+@pytest.mark.parametrize(
+    "expire_in_days,failures,expected,comment",
+    [
+        (300, 0, 86400, "far from expiry, capped at max interval"),
+        (3, 0, 1800, "close to expiry"),
+        (0, 0, 300, "expired, capped at min interval"),
+        (-10, 0, 300, "long expired, capped at min interval"),
+        (None, 0, 86400, "unknown expiry"),
+        (None, 1, 300, "first failure"),
+        (None, 3, 1200, "backoff after repeated failures"),
+        (None, 20, 86400, "backoff capped at max interval"),
+        (3, 4, 1800, "backoff never exceeds expiry based interval"),
+    ],
+)
+def test_expiry_interval(expire_in_days, failures, expected, comment):
+    policy = scheduler.ExpiryInterval(300, 86400, 600)
+    state = {"expire_in_days": expire_in_days, "failures": failures}
+    assert policy(state) == expected
+
+
+def test_fixed_interval():
+    policy = scheduler.FixedInterval(60)
+    assert policy({"expire_in_days": 3, "failures": 2}) == 60
+
+
+def test_scheduler_orders_by_next_check():
+    clock = FakeClock()
+    results = {
+        "soon.example": {"expire_in_days": 3},
+        "later.example": {"expire_in_days": 300},
+        "broken.example": {"error": "ConnectionRefusedError()"},
+    }
+    published = []
+    sched = scheduler.Scheduler(
+        [(host, 443) for host in results],
+        fake_check(results),
+        published.append,
+        scheduler.ExpiryInterval(300, 86400, 600),
+        clock=clock,
+    )
+
+    sched.run_pending()
+    assert [r["peername"] for r in published] == list(results)
+    assert sched.next_due() == clock.now + 300
+
+    clock.now += 300
+    sched.run_pending()
+    assert published[-1]["peername"] == "broken.example"
+    assert sched.state[("broken.example", 443)]["failures"] == 2
+
+    clock.now += 1500
+    published.clear()
+    sched.run_pending()
+    assert [r["peername"] for r in published] == ["broken.example", "soon.example"]
+
+
+def test_scheduler_spread():
+    clock = FakeClock()
+    published = []
+    hosts = ["a.example", "b.example", "c.example"]
+    sched = scheduler.Scheduler(
+        [(host, 443) for host in hosts],
+        fake_check({host: {"expire_in_days": 30} for host in hosts}),
+        published.append,
+        scheduler.FixedInterval(60),
+        spread=60,
+        clock=clock,
+    )
+
+    sched.run_pending()
+    assert len(published) == 1
+    clock.now += 20
+    sched.run_pending()
+    assert len(published) == 2
+
+
+def test_scheduler_run_stops():
+    stop_event = threading.Event()
+    published = []
+
+    def sink(record):
+        published.append(record)
+        stop_event.set()
+
+    sched = scheduler.Scheduler(
+        [("a.example", 443)],
+        fake_check({"a.example": {"expire_in_days": 30}}),
+        sink,
+        scheduler.FixedInterval(3600),
+    )
+    thread = threading.Thread(target=sched.run, args=(stop_event,))
+    thread.start()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert len(published) == 1
+
+
+def test_scheduler_run_workers():
+    stop_event = threading.Event()
+    hosts = ["a.example", "b.example", "c.example"]
+    barrier = threading.Barrier(len(hosts), timeout=5)
+    published = []
+
+    def check(host, port):
+        # Only returns if all hosts are checked at the same time
+        barrier.wait()
+        return {"peername": host, "peerport": port, "expire_in_days": 30}
+
+    def sink(record):
+        published.append(record)
+        if len(published) == len(hosts):
+            stop_event.set()
+
+    sched = scheduler.Scheduler(
+        [(host, 443) for host in hosts],
+        check,
+        sink,
+        scheduler.FixedInterval(3600),
+        workers=len(hosts),
+    )
+    thread = threading.Thread(target=sched.run, args=(stop_event,))
+    thread.start()
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert sorted(r["peername"] for r in published) == hosts
+
+
+def test_scheduler_run_bounded_by_workers():
+    stop_event = threading.Event()
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def check(host, port):
+        with lock:
+            running.append(host)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(host)
+        return {"peername": host, "peerport": port, "expire_in_days": 30}
+
+    def sink(record):
+        if len(peak) >= 6:
+            stop_event.set()
+
+    sched = scheduler.Scheduler(
+        [("host{}.example".format(i), 443) for i in range(6)],
+        check,
+        sink,
+        scheduler.FixedInterval(3600),
+        workers=2,
+    )
+    thread = threading.Thread(target=sched.run, args=(stop_event,))
+    thread.start()
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert len(peak) == 6
+    assert max(peak) <= 2
+
+
+def test_run_daemon_passes_options(monkeypatch):
+    stop_event = threading.Event()
+    calls = []
+
+    def fetch_host(host, port, timeout=5, proxy=None, **kwargs):
+        calls.append(kwargs)
+        stop_event.set()
+        return {"peername": host, "peerport": port, "expire_in_days": 30}
+
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", fetch_host)
+    scheduler.run_daemon(
+        ["a.example"],
+        443,
+        policy=scheduler.FixedInterval(3600),
+        sink=lambda record: None,
+        stop_event=stop_event,
+        fields=["expire_in_days", "issuer"],
+        prober="prober",
+    )
+
+    assert calls[0]["fields"] == ["expire_in_days", "issuer"]
+    assert calls[0]["prober"] == "prober"
+
+
+def test_run_daemon_shares_context(monkeypatch):
+    stop_event = threading.Event()
+    contexts = []
+
+    def fetch_host(host, port, timeout=5, proxy=None, context=None, **kwargs):
+        contexts.append(context)
+        return {"peername": host, "peerport": port, "expire_in_days": 30}
+
+    def sink(record):
+        if len(contexts) >= 3:
+            stop_event.set()
+
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", fetch_host)
+    scheduler.run_daemon(
+        ["a.example", "b.example", "c.example"],
+        443,
+        policy=scheduler.FixedInterval(3600),
+        sink=sink,
+        stop_event=stop_event,
+    )
+
+    assert len(contexts) == 3
+    assert contexts[0] is not None
+    assert all(context is contexts[0] for context in contexts)
+
+
+def test_stream_sink():
+    stream = io.StringIO()
+    sink = scheduler.StreamSink(stream)
+    sink({"peername": "a.example", "expire_in_days": 3})
+    sink({"peername": "b.example", "error": "x"})
+
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line)["peername"] for line in lines] == [
+        "a.example",
+        "b.example",
+    ]
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.serializers` module.
+
+Use tox or py.test to run the test suite.
+"""
+import io
+import json
+
+import pytest
+import yaml
+
+from ssl_certinfo import serializers
+
+
+@pytest.fixture
+def results():
+    return {
+        "github.com": {
+            "CN": "github.com",
+            "SAN": ["github.com", "www.github.com"],
+            "valid_from": "2018-05-08T00:00:00",
+            "valid_to": "2020-06-03T12:00:00",
+            "expire_in_days": -100,
+            "peername": "github.com",
+            "peerport": 443,
+        },
+        "localhost": {
+            "error": "refused",
+            "phase": "connect",
+            "error_message": "[Errno 111] Connection refused",
+            "peername": "localhost",
+            "peerport": 2,
+            "elapsed": 0.001,
+        },
+    }
+
+
+@pytest.fixture(params=["orjson", "json"])
+def json_backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serializers, "orjson", None)
+    return request.param
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_write_json(results, json_backend, compact):
+    stream = io.StringIO()
+    serializers.write_json(results, stream, compact)
+
+    out = stream.getvalue()
+    assert json.loads(out) == results
+    assert ("\n" in out) != compact
+
+
+def test_write_json_compact_empty(json_backend):
+    stream = io.StringIO()
+    serializers.write_json({}, stream, compact=True)
+    assert stream.getvalue() == "{}"
+
+
+@pytest.mark.parametrize(
+    "compact,expected_lines",
+    [(False, 17), (True, 2)],
+)
+def test_write_yaml(results, compact, expected_lines):
+    stream = io.StringIO()
+    serializers.write_yaml(results, stream, compact)
+
+    out = stream.getvalue()
+    assert yaml.safe_load(out) == results
+    assert len(out.splitlines()) == expected_lines
+
+
+def test_yaml_dumper_uses_libyaml():
+    if not yaml.__with_libyaml__:
+        pytest.skip("libyaml not available")
+    assert serializers.YAML_DUMPER is yaml.CSafeDumper
+
+
+def test_csv_record_formatter_joins_lists(results):
+    formatter = serializers.CsvRecordFormatter(["CN", "SAN", "expire_in_days"])
+    assert formatter.header() == "peer,CN,SAN,expire_in_days\n"
+    assert formatter.record("github.com", results["github.com"], True) == (
+        "github.com,github.com,github.com;www.github.com,-100\n"
+    )
+    assert formatter.record("localhost", results["localhost"], False) == (
+        "localhost,,,\n"
+    )
@@ -4,6 +4,10 @@
 
 Use tox or py.test to run the test suite.
 """
+import csv
+import io
+import itertools
+import json
 import os
 import re
 import socket
@@ -18,8 +22,18 @@ from cryptography.x509 import load_pem_x509_certificate
 from cryptography.x509.oid import NameOID
 from OpenSSL import SSL
 
-from ssl_certinfo import ssl_certinfo
+from ssl_certinfo import (
+    alerts,
+    extractors,
+    instrumentation,
+    retry,
+    scanner,
+    ssl_certinfo,
+    table,
+    targets,
+)
 from ssl_certinfo.ssl_certinfo import OutputFormat
+from tests import conftest
 
 global_sock = None
 proxydaemon = None
@@ -94,7 +108,7 @@ def teardown_module(module):
 def sample_result():
     certinfo = {
         "CN": "github.com",
-        "SAN": "github.com;www.github.com",
+        "SAN": ["github.com", "www.github.com"],
         "valid_from": "2018-05-08T00:00:00",
         "valid_to": "2020-06-03T12:00:00",
         "expire_in_days": (datetime(2020, 6, 3, 12, 0, 0) - datetime.now()).days,
@@ -157,7 +171,7 @@ WUjbST4VXmdaol7uzFMojA4zkxQDZAvF5XgJlAFadfySna/teik=
 
     expected = {
         "CN": "github.com",
-        "SAN": "github.com;www.github.com",
+        "SAN": ["github.com", "www.github.com"],
         "valid_from": "2018-05-08T00:00:00",
         "valid_to": "2020-06-03T12:00:00",
     }
@@ -300,7 +314,64 @@ def test_process_hosts_timeout(capsys, hostname, port, comment):
 
     out, err = capsys.readouterr()
 
-    assert out == "\n"
+    assert out.find(hostname) >= 0
+    assert re.search(r"\| +(dns|refused|timeout|tls) +\|", out)
+
+
+@pytest.mark.timeout(15)
+@pytest.mark.parametrize(
+    "hostname,port,proxy,error,phase",
+    [
+        ("localhost", 2, None, "refused", "connect"),
+        ("localhost", 12345, None, "timeout", "handshake"),
+        ("nonexistent.invalid", 443, None, "dns", "resolve"),
+        ("github.com", 443, ("http", "localhost", 2), "refused", "connect"),
+        ("github.com", 443, ("http", "localhost", 12345), "timeout", "proxy"),
+    ],
+)
+def test_fetch_host_fail(hostname, port, proxy, error, phase):
+    record = ssl_certinfo.fetch_host(hostname, port, 2, proxy)
+
+    assert record["peername"] == hostname
+    assert record["peerport"] == port
+    assert record["error"] == error
+    assert record["phase"] == phase
+    assert record["error_message"]
+    assert record["elapsed"] >= 0
+
+
+@pytest.mark.parametrize(
+    "err,expected",
+    [
+        (ssl_certinfo.ProxyError("HTTP/1.1 403 Forbidden"), "proxy"),
+        (socket.gaierror(-2, "Name or service not known"), "dns"),
+        (socket.timeout("timed out"), "timeout"),
+        (TimeoutError(), "timeout"),
+        (ConnectionRefusedError(), "refused"),
+        (ConnectionResetError(), "reset"),
+        (SSL.Error([]), "tls"),
+        (OSError(113, "No route to host"), "unreachable"),
+        (OSError(24, "Too many open files"), "resources"),
+        (OSError(), "os"),
+        (ValueError(), "parse"),
+    ],
+)
+def test_classify_error(err, expected):
+    assert ssl_certinfo.classify_error(err) == expected
+
+
+def test_summarize_results(sample_result):
+    results = dict(sample_result)
+    results["localhost"] = {"error": "refused", "phase": "connect"}
+    results["10.0.0.1"] = {"error": "timeout", "phase": "connect"}
+    results["10.0.0.2"] = {"error": "timeout", "phase": "connect"}
+
+    assert ssl_certinfo.summarize_results(results) == {
+        "total": 4,
+        "ok": 1,
+        "failed": 3,
+        "errors": {"connect/refused": 1, "connect/timeout": 2},
+    }
 
 
 @pytest.mark.parametrize(
@@ -322,7 +393,10 @@ def test_process_hosts_timeout(capsys, hostname, port, comment):
             "{(\r)?\n"
             ' +"github.com": {(\r)?\n'
             ' +"CN": "github.com",(\r)?\n'
-            ' +"SAN": "github.com;www.github.com",(\r)?\n'
+            ' +"SAN": \\[(\r)?\n'
+            ' +"github.com",(\r)?\n'
+            ' +"www.github.com"(\r)?\n'
+            " +\\],(\r)?\n"
             ' +"valid_from": "2018-05-08T00:00:00",(\r)?\n'
             ' +"valid_to": "2020-06-03T12:00:00",(\r)?\n'
             ' +"expire_in_days": -?[0-9]+,(\r)?\n'
@@ -335,7 +409,9 @@ def test_process_hosts_timeout(capsys, hostname, port, comment):
             OutputFormat.YAML,
             "github.com:(\r)?\n"
             "  CN: github.com(\r)?\n"
-            "  SAN: github.com;www.github.com(\r)?\n"
+            "  SAN:(\r)?\n"
+            "  - github.com(\r)?\n"
+            "  - www.github.com(\r)?\n"
             "  expire_in_days: -?[0-9]+(\r)?\n"
             "  peername: github.com(\r)?\n"
             "  peerport: 443(\r)?\n"
@@ -362,6 +438,32 @@ def test_format_results(sample_result, outform, expected):
     assert re.match(expected, outstr)
 
 
+@pytest.mark.parametrize(
+    "outform,expected",
+    [
+        (
+            OutputFormat.TABLE,
+            r"\| +localhost +\|.*\| +refused +\| +connect +\| +0.001 +\|",
+        ),
+        (OutputFormat.JSON, r'"error": "refused",(\r)?\n +"phase": "connect"'),
+        (OutputFormat.YAML, r"error: refused(\r)?\n +error_message: "),
+        (OutputFormat.CSV, r"(\r)?\nlocalhost,,,,,,localhost,2,refused,connect,0.001"),
+        (OutputFormat.RAW, r"localhost +NaN +NaN .* +refused +connect +0.001"),
+    ],
+)
+def test_format_results_error(sample_result, outform, expected):
+    sample_result["localhost"] = {
+        "error": "refused",
+        "phase": "connect",
+        "error_message": "[Errno 111] Connection refused",
+        "peername": "localhost",
+        "peerport": 2,
+        "elapsed": 0.001,
+    }
+    outstr = ssl_certinfo.format_results(sample_result, outform)
+    assert re.search(expected, outstr)
+
+
 @pytest.mark.parametrize(
     "outform,expected",
     [
@@ -375,3 +477,342 @@ def test_format_results(sample_result, outform, expected):
 def test_format_results_empty(outform, expected):
     outstr = ssl_certinfo.format_results({}, outform)
     assert outstr == ""
+
+
+@pytest.mark.timeout(15)
+def test_fetch_host_timings():
+    timings = instrumentation.Timings()
+    ssl_certinfo.fetch_host("localhost", 2, 2, timings=timings)
+
+    summary = timings.summary()
+    assert summary["resolve"]["count"] == 1
+    assert summary["connect"]["count"] == 1
+    assert "handshake" not in summary
+
+
+def test_process_hosts_retry(monkeypatch, capsys):
+    attempts = []
+
+    def flaky(host, port, *args):
+        attempts.append(host)
+        if host == "flaky.example" and attempts.count(host) < 3:
+            return {"peername": host, "peerport": port, "error": "timeout"}
+        return {"peername": host, "peerport": port, "expire_in_days": 3}
+
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", flaky)
+    policy = retry.RetryPolicy(retries=3, backoff=0.01)
+    ssl_certinfo.process_hosts(
+        ["flaky.example", "ok.example"],
+        443,
+        outform=OutputFormat.JSON,
+        retry_policy=policy,
+    )
+
+    out, err = capsys.readouterr()
+    results = json.loads(out)
+    assert attempts[:2] == ["flaky.example", "ok.example"]
+    assert results["flaky.example"]["attempts"] == 3
+    assert results["ok.example"]["attempts"] == 1
+    assert "error" not in results["flaky.example"]
+
+
+def test_process_hosts_huge_plan(monkeypatch, capsys):
+    plan = targets.plan_targets(["2001:db8::/56"])
+
+    def scan(hosts, port, *args, **kwargs):
+        for host in itertools.islice(hosts, 2):
+            record = {"peername": host, "peerport": port, "expire_in_days": 3}
+            kwargs["on_result"](record)
+            yield record
+
+    monkeypatch.setattr(scanner, "scan", scan)
+    ssl_certinfo.process_hosts(plan, 443, outform=OutputFormat.JSON)
+
+    out, err = capsys.readouterr()
+    assert sorted(json.loads(out)) == ["2001:db8::", "2001:db8::1"]
+
+
+@pytest.mark.parametrize(
+    "outform,layout",
+    [
+        (OutputFormat.TABLE, None),
+        (OutputFormat.TABLE, table.TableLayout(stream=True)),
+        (OutputFormat.TABLE, table.TableLayout(page_size=1)),
+        (OutputFormat.JSON, None),
+        (OutputFormat.YAML, None),
+        (OutputFormat.CSV, None),
+    ],
+)
+def test_process_hosts_format_timings(monkeypatch, capsys, outform, layout):
+    def fetch_host(host, port, *args):
+        return {"peername": host, "peerport": port, "expire_in_days": 3}
+
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", fetch_host)
+    timings = instrumentation.Timings()
+    ssl_certinfo.process_hosts(
+        ["a.example", "b.example"],
+        443,
+        outform=outform,
+        timings=timings,
+        layout=layout,
+    )
+
+    assert timings.summary()["format"]["count"] >= 1
+
+
+class FakeCoordinator:
+    def __init__(self, records):
+        self.records = records
+
+    def scan(self, hosts, on_result=None, on_error=None):
+        for record in self.records:
+            on_result(record)
+            yield record
+
+
+def test_process_hosts_coordinator_columns(capsys):
+    worker_record = {
+        "peername": "a.example",
+        "peerport": 443,
+        "expire_in_days": 3,
+        "target_group": "web",
+        "protocols": "TLSv1.3",
+        "verify": "ok",
+        "verify_depth": 2,
+        "attempts": 2,
+    }
+    ssl_certinfo.process_hosts(
+        ["a.example"],
+        443,
+        outform=OutputFormat.CSV,
+        coordinator=FakeCoordinator([worker_record]),
+    )
+
+    out, err = capsys.readouterr()
+    row = next(csv.DictReader(io.StringIO(out)))
+    for column in ["target_group", "protocols", "verify", "verify_depth"]:
+        assert row[column] == str(worker_record[column])
+    assert row["attempts"] == "2"
+
+
+def test_process_hosts_thresholds(monkeypatch, capsys):
+    days = {"a.example": 90, "b.example": 20, "c.example": 3}
+
+    def fetch_host(host, port, *args):
+        return {"peername": host, "peerport": port, "expire_in_days": days[host]}
+
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", fetch_host)
+    thresholds = alerts.ExpiryThresholds(warn_days=30, crit_days=7)
+    ssl_certinfo.process_hosts(
+        list(days), 443, outform=OutputFormat.JSON, thresholds=thresholds
+    )
+
+    out, err = capsys.readouterr()
+    results = json.loads(out)
+    assert sorted(results) == ["b.example", "c.example"]
+    assert results["c.example"]["alert"] == "critical"
+    assert thresholds.exit_code == alerts.CRITICAL
+
+
+@pytest.mark.parametrize(
+    "layout,expected_lines",
+    [
+        (table.TableLayout(page_size=2), 6 + 5),
+        (table.TableLayout(stream=True, sample_rows=0), 7),
+        (table.TableLayout(stream=True, max_rows=1), 6),
+    ],
+)
+def test_process_hosts_table_stream(monkeypatch, capsys, layout, expected_lines):
+    def fetch_host(host, port, *args):
+        return {"peername": host, "peerport": port, "expire_in_days": 3}
+
+    monkeypatch.setattr(ssl_certinfo, "fetch_host", fetch_host)
+    hosts = ["a.example", "b.example", "c.example"]
+    ssl_certinfo.process_hosts(hosts, 443, layout=layout)
+
+    out, err = capsys.readouterr()
+    assert len(out.splitlines()) == expected_lines
+
+
+@pytest.fixture
+def ca_file(tmp_path, certificate_authority):
+    path = tmp_path / "ca.pem"
+    path.write_bytes(certificate_authority.pem())
+    return str(path)
+
+
+def test_fetch_host_verify_ok(tls_server, ca_file):
+    context = ssl_certinfo.create_context(verify=True, ca_file=ca_file)
+    record = ssl_certinfo.fetch_host("localhost", tls_server.port, context=context)
+
+    assert "error" not in record
+    assert record["verify"] == "ok"
+    assert "verify_depth" not in record
+
+
+def test_fetch_host_verify_untrusted(tls_server, tmp_path):
+    other = tmp_path / "other.pem"
+    other.write_bytes(conftest.CertificateAuthority("other CA").pem())
+    context = ssl_certinfo.create_context(verify=True, ca_file=str(other))
+    record = ssl_certinfo.fetch_host("localhost", tls_server.port, context=context)
+
+    assert "error" not in record
+    assert record["CN"] == "localhost"
+    assert record["verify"] == "unknown_issuer"
+    assert record["verify_depth"] == 0
+
+
+@pytest.mark.parametrize(
+    "hostname,expected",
+    [
+        ("localhost", {"hostname_match": True, "matched_name": "localhost"}),
+        ("127.0.0.1", {"hostname_match": False}),
+    ],
+)
+def test_fetch_host_hostname_match(tls_server, hostname, expected):
+    record = ssl_certinfo.fetch_host(hostname, tls_server.port)
+    assert record["SAN"] == ["localhost"]
+    assert record["hostname_match"] == expected["hostname_match"]
+    assert record.get("matched_name") == expected.get("matched_name")
+
+
+def test_fetch_host_fields(tls_server):
+    record = ssl_certinfo.fetch_host(
+        "localhost", tls_server.port, fields=["CN", "key_type", "issuer"]
+    )
+    assert record["CN"] == "localhost"
+    assert record["key_type"] == "EC"
+    assert record["issuer"] == "CN=ssl_certinfo test CA"
+    assert "SAN" not in record and "expire_in_days" not in record
+
+
+def test_result_columns_fields(sample_result):
+    assert ssl_certinfo.result_columns(sample_result)[:5] == (
+        extractors.certificate_fields(extractors.DEFAULT_FIELDS)
+    )
+    results = {"a": {"serial": "1f", "CN": "a", "peername": "a", "peerport": 443}}
+    assert ssl_certinfo.result_columns(results) == ["CN", "serial"] + (
+        ssl_certinfo.PEER_COLUMNS
+    )
+
+
+def test_fetch_host_without_verify(tls_server):
+    context = ssl_certinfo.create_context()
+    record = ssl_certinfo.fetch_host("localhost", tls_server.port, context=context)
+    assert "verify" not in record
+
+
+def test_fetch_host_without_checks(monkeypatch, tls_server):
+    def fail(*args, **kwargs):
+        raise AssertionError("check run although not selected")
+
+    monkeypatch.setattr(ssl_certinfo.hostmatch, "hostname_match", fail)
+    monkeypatch.setattr(ssl_certinfo.ocsp, "certificate_status", fail)
+    record = ssl_certinfo.fetch_host("localhost", tls_server.port, fields=["CN"])
+
+    assert record["CN"] == "localhost"
+    assert "error" not in record
+    assert "hostname_match" not in record
+    assert "ocsp_status" not in record
+
+
+def test_create_context_invalid_ca_file(tmp_path):
+    with pytest.raises(SSL.Error):
+        ssl_certinfo.create_context(True, str(tmp_path / "missing.pem"))
+
+
+@pytest.mark.parametrize(
+    "errors,expected",
+    [
+        ([], {"verify": "ok"}),
+        ([(20, 0)], {"verify": "unknown_issuer", "verify_depth": 0}),
+        ([(10, 1), (20, 0)], {"verify": "expired", "verify_depth": 1}),
+        ([(99, 2)], {"verify": "x509_error_99", "verify_depth": 2}),
+    ],
+)
+def test_verify_result(errors, expected):
+    assert ssl_certinfo.verify_result(errors) == expected
+
+
+def test_process_hosts_verify(capsys, tls_server, ca_file):
+    context = ssl_certinfo.create_context(verify=True, ca_file=ca_file)
+    ssl_certinfo.process_hosts(
+        ["localhost"] * 3,
+        tls_server.port,
+        outform=OutputFormat.JSON,
+        workers=3,
+        context=context,
+    )
+
+    out, err = capsys.readouterr()
+    assert json.loads(out)["localhost"]["verify"] == "ok"
+
+
+def test_fetch_host_connection_info(tls_server):
+    record = ssl_certinfo.fetch_host("localhost", tls_server.port)
+
+    assert record["protocol"] == "TLSv1.3"
+    assert record["cipher"].startswith("TLS_")
+    if hasattr(SSL.Connection, "get_group_name"):
+        assert record["group"]
+    assert "alpn" not in record
+    assert "protocols" not in record
+
+
+def test_fetch_host_alpn_tls12(certificate_authority):
+    cert, key = certificate_authority.issue("localhost")
+    server = conftest.TLSServer(
+        cert, key, versions=(SSL.TLS1_2_VERSION, SSL.TLS1_2_VERSION), alpn=b"h2"
+    )
+    try:
+        record = ssl_certinfo.fetch_host("localhost", server.port)
+    finally:
+        server.close()
+
+    assert record["protocol"] == "TLSv1.2"
+    assert record["cipher"].startswith("ECDHE-ECDSA-")
+    assert record["alpn"] == "h2"
+
+
+@pytest.mark.parametrize(
+    "versions,expected",
+    [
+        ((SSL.TLS1_2_VERSION, SSL.TLS1_3_VERSION), "TLSv1.2;TLSv1.3"),
+        ((SSL.TLS1_2_VERSION, SSL.TLS1_2_VERSION), "TLSv1.2"),
+    ],
+)
+def test_process_hosts_probe_protocols(
+    capsys, certificate_authority, versions, expected
+):
+    cert, key = certificate_authority.issue("localhost")
+    server = conftest.TLSServer(cert, key, versions=versions)
+    try:
+        ssl_certinfo.process_hosts(
+            ["localhost"],
+            server.port,
+            outform=OutputFormat.JSON,
+            workers=2,
+            probe_protocols=True,
+        )
+    finally:
+        server.close()
+
+    out, err = capsys.readouterr()
+    assert json.loads(out)["localhost"]["protocols"] == expected
+
+
+def test_fetch_host_probe_timings(tls_server):
+    class SlowProber:
+        def probe(self, host, port, timeout, proxy):
+            time.sleep(0.2)
+            return ["TLSv1.3"]
+
+    timings = instrumentation.Timings()
+    record = ssl_certinfo.fetch_host(
+        "localhost", tls_server.port, timings=timings, prober=SlowProber()
+    )
+
+    summary = timings.summary()
+    assert record["protocols"] == "TLSv1.3"
+    assert summary["probe"]["total"] >= 0.2
+    assert summary["parse"]["total"] < 0.2
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.table` module.
+
+Use tox or py.test to run the test suite.
+"""
+import pytest
+
+from ssl_certinfo import table
+
+HEADERS = ("peer", "CN", "expire_in_days")
+ROWS = [
+    ("github.com", "github.com", "100"),
+    ("10.0.0.1", "", ""),
+    ("wikipedia.org", "*.wikipedia.org", "-3"),
+]
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        (None, ""),
+        (float("nan"), ""),
+        (443, "443"),
+        ("github.com", "github.com"),
+        (["github.com", "www.github.com"], "github.com;www.github.com"),
+        ([], ""),
+    ],
+)
+def test_format_cell(value, expected):
+    assert table.format_cell(value) == expected
+
+
+def test_record_to_row():
+    record = {"CN": "github.com", "peerport": 443}
+    assert table.record_to_row("github.com", record, ["CN", "SAN", "peerport"]) == (
+        "github.com",
+        "github.com",
+        "",
+        "443",
+    )
+
+
+@pytest.mark.parametrize(
+    "row,widths,expected",
+    [
+        (("a", "bb"), [3, 4], "|  a  |  bb  |"),
+        (("ab", "b"), [3, 4], "| ab  |  b   |"),
+        (("abcdef",), [4], "| abc~ |"),
+    ],
+)
+def test_format_row(row, widths, expected):
+    assert table.format_row(row, widths) == expected
+
+
+def test_render_table():
+    lines = table.render_table(ROWS, HEADERS).splitlines()
+
+    assert lines[0] == "+---------------+-----------------+----------------+"
+    assert lines[1] == "|     peer      |       CN        | expire_in_days |"
+    assert lines[3] == "|  github.com   |   github.com    |      100       |"
+    assert lines[4] == "|   10.0.0.1    |                 |                |"
+    assert lines[-1] == lines[0]
+    assert len(lines) == 7
+
+
+def test_render_table_empty():
+    assert table.render_table([], HEADERS) == ""
+
+
+def test_render_table_max_rows():
+    lines = table.render_table(iter(ROWS), HEADERS, max_rows=1).splitlines()
+
+    assert lines[3].split()[1] == "github.com"
+    assert lines[-1] == "... 2 more rows not shown"
+    assert len(lines) == 6
+
+
+def test_render_pages():
+    pages = list(table.render_pages(iter(ROWS), HEADERS, 2))
+
+    assert len(pages) == 2
+    assert len(pages[0].splitlines()) == 6
+    assert len(pages[1].splitlines()) == 5
+    assert pages[1].splitlines()[3].split()[1] == "wikipedia.org"
+
+
+def test_table_stream_sampled_widths():
+    lines = []
+    stream = table.TableStream(HEADERS, lines.append, sample_rows=2)
+    stream.add(ROWS[0])
+    assert lines == []
+    stream.add(ROWS[1])
+    assert len(lines) == 5
+    stream.add(ROWS[2])
+    stream.close()
+
+    assert lines[0] == "+------------+------------+----------------+"
+    assert lines[5] == "| wikipedia~ | *.wikiped~ |       -3       |"
+    assert lines[-1] == lines[0]
+
+
+def test_table_stream_preset_widths():
+    lines = []
+    stream = table.TableStream(HEADERS, lines.append, sample_rows=0, max_rows=2)
+    assert len(lines) == 3
+    for row in ROWS:
+        stream.add(row)
+    stream.close()
+
+    assert len(lines[0]) == len(table.separator([24, 24, 14]))
+    assert lines[3].split()[1] == "github.com"
+    assert lines[-1] == "... 1 more rows not shown"
+    assert len(lines) == 7
+
+
+def test_table_stream_empty():
+    lines = []
+    stream = table.TableStream(HEADERS, lines.append)
+    stream.close()
+    assert lines == []
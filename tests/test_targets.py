@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.targets` module.
+
+Use tox or py.test to run the test suite.
+"""
+import ipaddress
+import itertools
+
+import pytest
+
+from ssl_certinfo import targets
+
+
+@pytest.mark.parametrize(
+    "spec,kind,count,first",
+    [
+        ("github.com", "host", 1, "github.com"),
+        ("1.1.1.1", "host", 1, "1.1.1.1"),
+        ("2001:db8::1", "host", 1, "2001:db8::1"),
+        ("192.168.0.0/30", "network", 4, "192.168.0.0"),
+        ("192.168.0.5/30", "network", 4, "192.168.0.4"),
+        ("192.168.0.253 - 192.168.1.2", "range", 6, "192.168.0.253"),
+        ("2001:db8::/64", "network", 2**64, "2001:db8::"),
+        ("::/0", "network", 2**128, "::"),
+        ("2001:db8::1-2001:db8::ff", "range", 255, "2001:db8::1"),
+    ],
+)
+def test_parse_target(spec, kind, count, first):
+    target = targets.parse_target(spec)
+    assert (target.kind, target.count()) == (kind, count)
+    assert next(iter(target)) == first
+
+
+@pytest.mark.parametrize(
+    "spec", ["-invalid-", "10.0.0.1/33", "10.0.0.5 - 10.0.0.1", "10.0.0.1 - ::1"]
+)
+def test_parse_invalid_target(spec):
+    assert targets.parse_target(spec) is None
+
+
+def test_plan_counts_without_expanding():
+    plan = targets.plan_targets(["::/0", "10.0.0.0/8", "example.com"])
+    assert plan.total == 2**128 + 2**24 + 1
+    # Iteration is lazy, taking the first hosts does not expand the network
+    assert list(itertools.islice(plan, 2)) == ["::", "::1"]
+
+
+def test_plan_iterates_in_order():
+    plan = targets.plan_targets(["a.example", "10.0.0.254/31", "10.0.1.0-10.0.1.1"])
+    assert plan.total == 5
+    assert list(plan) == [
+        "a.example",
+        "10.0.0.254",
+        "10.0.0.255",
+        "10.0.1.0",
+        "10.0.1.1",
+    ]
+
+
+@pytest.mark.parametrize(
+    "specs,max_targets",
+    [(["::/0"], targets.DEFAULT_MAX_TARGETS), (["10.0.0.0/24", "10.0.1.0"], 256)],
+)
+def test_plan_limit(specs, max_targets):
+    with pytest.raises(targets.TargetLimitError, match=str(max_targets)):
+        targets.plan_targets(specs, max_targets)
+
+
+@pytest.mark.parametrize("max_targets", [None, 0, 257])
+def test_plan_within_limit(max_targets):
+    plan = targets.plan_targets(["10.0.0.0/24", "10.0.1.0"], max_targets)
+    assert plan.total == 257
+
+
+def test_plan_format():
+    plan = targets.plan_targets(["10.0.0.0/24", "example.com"])
+    lines = plan.format(workers=8, timeout=5).splitlines()
+
+    assert "10.0.0.0/24" in lines[3]
+    assert lines[3].split("|")[3].strip() == "256"
+    # 257 hosts on 8 workers take at most 33 rounds of 5 seconds
+    assert (
+        lines[-1] == "Total: 257 hosts, at most 00:02:45 with 8 workers and 5 s timeout"
+    )
+
+
+@pytest.mark.parametrize(
+    "seconds,expected",
+    [(0, "00:00:00"), (3661, "01:01:01"), (90061, "1d 01:01:01")],
+)
+def test_format_duration(seconds, expected):
+    assert targets.format_duration(seconds) == expected
+
+
+@pytest.mark.parametrize(
+    "intervals,expected",
+    [
+        ([], []),
+        ([(5, 9), (1, 3)], [(1, 3), (5, 9)]),
+        ([(1, 5), (3, 9), (10, 12)], [(1, 12)]),
+        ([(1, 10), (2, 3)], [(1, 10)]),
+    ],
+)
+def test_merge_intervals(intervals, expected):
+    assert targets.merge_intervals(intervals) == expected
+
+
+@pytest.fixture
+def exclusions():
+    return targets.Exclusions(
+        [
+            "10.0.0.0/30",
+            "10.0.0.10 - 10.0.0.20",
+            "10.0.0.15",
+            "10.0.1.255",
+            "2001:db8::/126",
+            "Honeypot.example.com.",
+            "*.fragile.example",
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "host,excluded",
+    [
+        ("honeypot.example.com", True),
+        ("HONEYPOT.example.com.", True),
+        ("www.honeypot.example.com", False),
+        ("a.fragile.example", True),
+        ("a.b.fragile.example", True),
+        ("fragile.example", False),
+        ("notfragile.example", False),
+    ],
+)
+def test_exclusions_hosts(exclusions, host, excluded):
+    assert exclusions.excludes_host(host) == excluded
+
+
+@pytest.mark.parametrize(
+    "address,excluded",
+    [
+        ("10.0.0.0", True),
+        ("10.0.0.3", True),
+        ("10.0.0.4", False),
+        ("10.0.0.9", False),
+        ("10.0.0.10", True),
+        ("10.0.0.20", True),
+        ("10.0.0.21", False),
+        ("10.0.1.255", True),
+        ("9.255.255.255", False),
+        ("2001:db8::3", True),
+        ("2001:db8::4", False),
+    ],
+)
+def test_exclusions_addresses(exclusions, address, excluded):
+    value = ipaddress.ip_address(address)
+    assert exclusions.excludes_address(value.version, int(value)) == excluded
+
+
+@pytest.mark.parametrize(
+    "host,excluded",
+    [
+        ("10.0.0.3", True),
+        ("10.0.0.4", False),
+        ("2001:db8::3", True),
+        ("a.fragile.example", True),
+        ("b.example", False),
+    ],
+)
+def test_exclusions_matches(exclusions, host, excluded):
+    assert exclusions.matches(host) == excluded
+
+
+def test_exclusions_invalid():
+    with pytest.raises(ValueError):
+        targets.Exclusions(["not a host"])
+
+
+def test_plan_with_exclusions():
+    plan = targets.plan_targets(
+        ["10.0.0.0/27", "10.0.0.2", "a.fragile.example", "b.example", "10.0.1.0/24"],
+        exclude=["10.0.0.0/30", "10.0.0.10 - 10.0.0.20", "*.fragile.example"]
+        + ["10.0.1.1 - 10.0.1.254"],
+    )
+    hosts = list(plan)
+
+    assert plan.total == len(hosts) == 32 - 4 - 11 + 1 + 2
+    assert hosts[:7] == ["10.0.0.4", "10.0.0.5", "10.0.0.6", "10.0.0.7"] + [
+        "10.0.0.8",
+        "10.0.0.9",
+        "10.0.0.21",
+    ]
+    assert hosts[-3:] == ["b.example", "10.0.1.0", "10.0.1.255"]
+
+
+def test_plan_excludes_blocks_without_enumerating():
+    plan = targets.plan_targets(["10.0.0.0/8"], exclude=["10.0.0.0/9", "10.255.0.0/16"])
+    assert plan.total == 2**23 - 2**16
+    assert next(iter(plan)) == "10.128.0.0"
+
+
+@pytest.mark.parametrize(
+    "adds,expected",
+    [
+        ([(1, 3), (7, 9)], [(1, 3), (7, 9)]),
+        ([(1, 3), (4, 6)], [(1, 6)]),
+        ([(1, 3), (7, 9), (2, 8)], [(1, 9)]),
+        ([(5, 6), (1, 2), (10, 12), (3, 3)], [(1, 3), (5, 6), (10, 12)]),
+        ([(1, 10), (3, 4)], [(1, 10)]),
+    ],
+)
+def test_interval_set_add(adds, expected):
+    intervals = targets.IntervalSet()
+    for first, last in adds:
+        intervals.add(first, last)
+    assert list(zip(intervals.starts, intervals.ends)) == expected
+
+
+def test_interval_set_subtract():
+    intervals = targets.IntervalSet([(3, 5), (8, 8), (12, 20)])
+    assert list(intervals.subtract(1, 14)) == [(1, 2), (6, 7), (9, 11)]
+    assert list(intervals.subtract(4, 5)) == []
+    assert list(intervals.subtract(21, 30)) == [(21, 30)]
+    assert 8 in intervals and 9 not in intervals
+
+
+@pytest.mark.parametrize(
+    "specs,expected",
+    [
+        (
+            ["10.0.0.0/30", "10.0.0.1-10.0.0.5", "10.0.0.4"],
+            ["10.0.0.0", "10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4", "10.0.0.5"],
+        ),
+        (
+            ["10.0.0.7", "10.0.0.4/30", "10.0.0.8/31"],
+            ["10.0.0.7", "10.0.0.4", "10.0.0.5", "10.0.0.6", "10.0.0.8", "10.0.0.9"],
+        ),
+        (
+            ["GitHub.com", "github.com.", "github.com", "www.github.com"],
+            ["github.com", "www.github.com"],
+        ),
+        (
+            ["2001:DB8:0::1", "2001:db8::1", "2001:db8:0:0:0:0:0:0/126"],
+            ["2001:db8::1", "2001:db8::", "2001:db8::2", "2001:db8::3"],
+        ),
+    ],
+)
+def test_plan_deduplicates(specs, expected):
+    plan = targets.plan_targets(specs)
+    assert plan.total == len(expected)
+    assert list(plan) == expected
+
+
+def test_plan_deduplicates_overlapping_networks():
+    # Memory stays proportional to the number of intervals, counts are exact
+    plan = targets.plan_targets(["10.0.0.0/24", "10.0.0.10-10.0.0.20", "10.0.0.15"])
+    assert [t.count() for t in plan.targets] == [256, 0, 0]
+
+    plan = targets.plan_targets(["::/1", "::/0", "10.0.0.0/8", "10.128.0.0/9"])
+    assert [t.count() for t in plan.targets] == [2**127, 2**127, 2**24, 0]
+    assert len(plan.targets[1].parts) == 1
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+
+"""Unit test for `ssl_certinfo.tlsconfig` module.
+
+Use tox or py.test to run the test suite.
+"""
+import pytest
+from OpenSSL import SSL
+
+from ssl_certinfo import scanner, ssl_certinfo, tlsconfig
+from tests import conftest
+
+CONFIG = """
+groups:
+  - name: internal
+    targets: [10.0.0.0/8, "*.corp.example.com"]
+    min_version: TLSv1.2
+  - name: legacy
+    targets: [10.1.0.0/16, legacy.example.com]
+    ciphers: ALL
+    server_name: legacy.corp.example.com
+"""
+
+
+@pytest.fixture
+def client_server(certificate_authority):
+    """TLS 1.2 server on localhost requiring a client certificate."""
+    cert, key = certificate_authority.issue("localhost")
+    server = conftest.TLSServer(
+        cert,
+        key,
+        versions=(SSL.TLS1_2_VERSION, SSL.TLS1_2_VERSION),
+        client_ca=certificate_authority.cert,
+    )
+    yield server
+    server.close()
+
+
+def write_config(tmp_path, text=CONFIG):
+    path = tmp_path / "tls.yaml"
+    path.write_text(text)
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "host,expected",
+    [
+        ("10.1.2.3", "internal"),
+        ("10.255.0.1", "internal"),
+        ("www.corp.example.com", "internal"),
+        ("legacy.example.com", "legacy"),
+        ("LEGACY.example.com.", "legacy"),
+        ("corp.example.com", None),
+        ("192.0.2.1", None),
+        ("example.com", None),
+    ],
+)
+def test_lookup_first_matching_group(tmp_path, host, expected):
+    config = tlsconfig.load_config(write_config(tmp_path))
+
+    group = config.lookup(host)
+
+    assert (group.name if group else None) == expected
+
+
+def test_groups_have_own_context(tmp_path):
+    config = tlsconfig.load_config(write_config(tmp_path))
+    internal, legacy = config.groups
+
+    assert internal.context is not legacy.context
+    assert config.lookup("10.2.0.1").context is config.lookup("10.3.0.1").context
+    assert internal.server_name is None
+    assert legacy.server_name == "legacy.corp.example.com"
+
+
+def test_groups_verify_with_options_of_scan(tmp_path, certificate_authority):
+    ca_file = tmp_path / "ca.pem"
+    ca_file.write_bytes(certificate_authority.pem())
+
+    config = tlsconfig.load_config(write_config(tmp_path), True, str(ca_file))
+
+    assert config.groups[0].context.get_verify_mode() == SSL.VERIFY_PEER
+
+
+def test_empty_config(tmp_path):
+    config = tlsconfig.load_config(write_config(tmp_path, "groups: []\n"))
+
+    assert not config
+    assert config.lookup("example.com") is None
+
+
+@pytest.mark.parametrize(
+    "text,message",
+    [
+        ("- a\n", "expected a mapping"),
+        ("hosts: []\n", "expected a mapping"),
+        ("groups: {}\n", "not a list"),
+        ("groups: [a]\n", "group 1 is not a mapping"),
+        ("groups: [{targets: [a.com]}]\n", "group 1 has no name"),
+        ("groups: [{name: a}]\n", "group a needs a list of targets"),
+        ("groups: [{name: a, targets: a.com}]\n", "needs a list of targets"),
+        ("groups: [{name: a, targets: [a.com], port: 1}]\n", "unknown keys"),
+        ("groups: [{name: a, targets: [a.com], ciphers: 1}]\n", "not a string"),
+        (
+            "groups: [{name: a, targets: [a.com]}, {name: a, targets: [b.com]}]\n",
+            "duplicate group a",
+        ),
+        ("groups: [{name: a, targets: [not valid]}]\n", "Not a valid exclusion"),
+        (
+            "groups: [{name: a, targets: [a.com], min_version: SSLv2}]\n",
+            "Unknown protocol version",
+        ),
+        (
+            "groups: [{name: a, targets: [a.com], ciphers: NO-SUCH-CIPHER}]\n",
+            "invalid TLS options of group a",
+        ),
+        (
+            "groups: [{name: a, targets: [a.com], client_cert: missing.pem}]\n",
+            "invalid TLS options of group a",
+        ),
+        ("groups: [\n", "expected"),
+    ],
+)
+def test_invalid_config(tmp_path, text, message):
+    with pytest.raises(tlsconfig.ConfigError, match=message):
+        tlsconfig.load_config(write_config(tmp_path, text))
+
+
+def test_missing_config(tmp_path):
+    with pytest.raises(OSError):
+        tlsconfig.load_config(str(tmp_path / "missing.yaml"))
+
+
+def test_client_certificate(tmp_path, certificate_authority, client_server):
+    cert, key = certificate_authority.issue("client")
+    certificate_authority.write_pem(tmp_path / "client.pem", cert, key)
+    config = tlsconfig.load_config(
+        write_config(
+            tmp_path,
+            "groups: [{name: mtls, targets: [localhost], client_cert: client.pem}]",
+        )
+    )
+
+    without = ssl_certinfo.fetch_host("localhost", client_server.port)
+    (record,) = scanner.scan(["localhost"], client_server.port, tls_config=config)
+
+    assert without["error"] == "tls"
+    assert "error" not in record
+    assert record["CN"] == "localhost"
+    assert record["target_group"] == "mtls"
+    assert client_server.handshakes == 1
+
+
+def test_separate_client_key(tmp_path, certificate_authority):
+    cert, key = certificate_authority.issue("client")
+    certificate_authority.write_pem(tmp_path / "both.pem", cert, key)
+    other_cert, other_key = certificate_authority.issue("other")
+    certificate_authority.write_pem(tmp_path / "other.pem", other_cert, other_key)
+
+    ssl_certinfo.create_context(
+        client_cert=str(tmp_path / "both.pem"), client_key=str(tmp_path / "both.pem")
+    )
+    with pytest.raises(SSL.Error):
+        ssl_certinfo.create_context(
+            client_cert=str(tmp_path / "both.pem"),
+            client_key=str(tmp_path / "other.pem"),
+        )
+
+
+def test_server_name_override(tmp_path, tls_server):
+    config = tlsconfig.load_config(
+        write_config(
+            tmp_path,
+            "groups: [{name: sni, targets: [127.0.0.1], server_name: localhost}]",
+        )
+    )
+
+    records = list(
+        scanner.scan(["127.0.0.1", "localhost"], tls_server.port, tls_config=config)
+    )
+
+    by_host = {record["peername"]: record for record in records}
+    assert by_host["127.0.0.1"]["target_group"] == "sni"
+    assert by_host["127.0.0.1"]["hostname_match"] is True
+    assert "target_group" not in by_host["localhost"]
+    # Ip addresses are only sent as server name if configured
+    assert tls_server.server_names == [b"localhost", b"localhost"]
+
+
+def test_min_version(tmp_path, certificate_authority):
+    cert, key = certificate_authority.issue("localhost")
+    server = conftest.TLSServer(
+        cert, key, versions=(SSL.TLS1_2_VERSION, SSL.TLS1_2_VERSION)
+    )
+    config = tlsconfig.load_config(
+        write_config(
+            tmp_path,
+            "groups: [{name: new, targets: [localhost], min_version: TLSv1.3}]",
+        )
+    )
+    try:
+        (record,) = scanner.scan(["localhost"], server.port, tls_config=config)
+    finally:
+        server.close()
+
+    assert record["error"] == "tls"
+    assert record["target_group"] == "new"
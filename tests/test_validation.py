@@ -29,13 +29,18 @@ def test_invalid_ip_address(test_input):
         "4.4.0.0/255.255.0.0",
         "192.0.2.0/24",
         "192.0.2.0/255.255.255.0",
+        "10.0.0.0/31",
+        "2001:db8::/64",
+        "2001:db8::/127",
     ],
 )
 def test_valid_ip_network(test_input):
     assert validation.is_valid_ip_network(test_input)
 
 
-@pytest.mark.parametrize("test_input", ["10.0.0.1", "10.0.0.1/33"])
+@pytest.mark.parametrize(
+    "test_input", ["10.0.0.1", "10.0.0.1/33", "10.0.0.1/32", "2001:db8::1/128"]
+)
 def test_invalid_ip_network(test_input):
     assert not validation.is_valid_ip_network(test_input)
 
@@ -57,6 +62,7 @@ def test_valid_ip_range(test_input):
         "10.0.0.1/32 - 10.0.0.5",  # start ip is cidr
         "a.b.c - 1.1.1.1",  # start is not a valid ip
         "abcde",  # characters
+        "10.0.0.1 - ::1",  # mixed ip versions
     ],
 )
 def test_invalid_ip_range(test_input):